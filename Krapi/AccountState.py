@@ -0,0 +1,295 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import time
+from threading import Lock
+from Records import Order, Trade
+from PublicApiRequests import Request_Tradable_Asset_Pairs
+from PrivateApiRequests import (Request_Balance, Request_Open_Orders, Request_Trade_History, Request_Add_Order,
+                                Request_Cancel_Order, Request_Cancel_Order_Batch, Request_Cancel_All)
+
+class Account_State_Cache(object):
+    """
+    In-memory copy of the account balance and the open orders.
+
+    The cache is seeded from Balance and OpenOrders. Afterwards it is kept up to date
+    locally: own order submissions and cancels are applied with apply_request() and
+    fills are applied from TradesHistory deltas, so a refresh() usually costs one
+    private call instead of two full queries. Balance and OpenOrders are only queried
+    again to reconcile, every reconcile_interval seconds or as soon as drift is detected
+    (a fill of an unknown order, a negative balance or mark_drift()).
+
+    public methods:
+    refresh()         - polls new fills or reconciles, call it once per strategy tick
+    reconcile()       - replaces the local state with the server state
+    apply_request()   - applies an own, successfully sent order or cancel request
+    mark_drift()      - forces a reconcile on the next refresh()
+    get_balance()     - returns the balance of an asset
+    get_balances()    - returns a copy of all balances
+    get_open_orders() - returns a list of Records.Order
+    get_open_order()  - returns the Records.Order of a txid or None
+
+    public variables:
+    private_calls: number of private requests sent by the cache
+    reconciles:    number of reconciles (including the seed)
+    last_drift:    largest absolute balance difference found by the last reconcile
+
+    """
+
+    def __init__(self, req_mgr, reconcile_interval = 300.0, fill_interval = 5.0, asset_pairs = None):
+        """
+        :type req_mgr:  RequestMgr.Request_Mgr
+        :param req_mgr: request manager with loaded credentials
+
+        :type reconcile_interval:  float
+        :param reconcile_interval: seconds between two reconciles without drift
+
+        :type fill_interval:  float
+        :param fill_interval: minimum seconds between two TradesHistory polls
+
+        :type asset_pairs:  dict
+        :param asset_pairs: asset pair info like Request_Tradable_Asset_Pairs.asset_pairs_dict (optional).
+                            Needed to book fills on base and quote asset, queried once if not set.
+
+        """
+
+        self.private_calls = 0
+        self.reconciles = 0
+        self.last_drift = 0.0
+        self.__req_mgr = req_mgr
+        self.__reconcile_interval = reconcile_interval
+        self.__fill_interval = fill_interval
+        self.__asset_pairs = asset_pairs
+        self.__lock = Lock()
+        self.__balances = {}
+        self.__orders = {}
+        self.__seen_trades = {}
+        self.__last_trade_time = None
+        self.__last_reconcile = 0.0
+        self.__last_fill_poll = 0.0
+        self.__drift = True
+
+    def refresh(self):
+        """
+        :return True if the cache is up to date, False if a request failed or the
+                rate limit of the request manager was reached (state is kept then)
+        """
+
+        now = time.time()
+        if self.__drift or now - self.__last_reconcile >= self.__reconcile_interval:
+            return self.reconcile()
+        if now - self.__last_fill_poll >= self.__fill_interval:
+            return self.__poll_fills()
+        return True
+
+    def reconcile(self):
+        """
+        Queries Balance and OpenOrders and replaces the local state.
+
+        :return True if the state was reconciled
+        """
+
+        balance = Request_Balance()
+        open_orders = Request_Open_Orders()
+        if not self.__send(balance) or not self.__send(open_orders):
+            return False
+
+        balances = dict((asset, float(amount)) for asset, amount in balance.balance_dict.iteritems())
+        orders = dict((order.txid, order) for order in open_orders.get_orders())
+
+        # Fills up to now are contained in the queried state. They are marked as seen
+        # together with the new state, so the next poll doesn't apply them again.
+        # A fill between the Balance and the TradesHistory request is missed until the next reconcile.
+        trades = self.__fetch_trades()
+        if trades is None:
+            return False
+
+        with self.__lock:
+            self.__mark_seen(trades)
+            assets = set(balances) | set(self.__balances)
+            self.last_drift = max([abs(balances.get(asset, 0.0) - self.__balances.get(asset, 0.0)) for asset in assets] or [0.0])
+            self.__balances = balances
+            self.__orders = orders
+            self.__drift = False
+            self.__last_reconcile = time.time()
+            self.reconciles += 1
+        return True
+
+    def apply_request(self, request):
+        """
+        Applies an own order or cancel request after it was sent successfully.
+
+        :type request:  Request.Request
+        :param request: Request_Add_Order, Request_Cancel_Order, Request_Cancel_Order_Batch or Request_Cancel_All
+
+        :ValueError - If the request type is not supported
+        """
+
+        if request.has_errors or not request.raw_response:
+            return
+
+        with self.__lock:
+            if isinstance(request, Request_Add_Order):
+                for txid in request.txid:
+                    self.__orders[txid] = Order(txid, None, request.userref, 'pending', self.__req_mgr.time(), None, request.pair,
+                                                request.type, request.order_type, float(request.price or 0),
+                                                float(request.price2 or 0), request.leverage, float(request.volume),
+                                                0.0, 0.0, 0.0, 0.0, '', request.oflags or '')
+
+            elif isinstance(request, Request_Cancel_Order):
+                if self.__orders.pop(str(request.txid), None) is None:
+                    # Canceled by user reference id, the affected orders are unknown
+                    self.__drift = True
+
+            elif isinstance(request, Request_Cancel_Order_Batch):
+                for txid in request.txid:
+                    if self.__orders.pop(str(txid), None) is None:
+                        self.__drift = True
+
+            elif isinstance(request, Request_Cancel_All):
+                self.__orders = {}
+
+            else:
+                raise ValueError("Request " + request.get_method() + " does not change the account state")
+
+    def mark_drift(self):
+        self.__drift = True
+
+    def get_balance(self, asset):
+        return self.__balances.get(asset, 0.0)
+
+    def get_balances(self):
+        return dict(self.__balances)
+
+    def get_open_orders(self):
+        return self.__orders.values()
+
+    def get_open_order(self, txid):
+        return self.__orders.get(txid)
+
+    def __send(self, request):
+        self.private_calls += 1
+        return self.__req_mgr.send_request(request)
+
+    def __fetch_trades(self):
+        """
+        :return dict txid -> trade info of the trades since the fill cursor (the newest
+                trades if there is no cursor yet) or None if a request failed
+        """
+
+        history = Request_Trade_History()
+        if self.__last_trade_time is None:
+            return history.trades_dict if self.__send(history) else None
+
+        # start is exclusive and trades may share a timestamp, seen trades are skipped by the caller
+        history.start = int(self.__last_trade_time) - 1
+        trades = {}
+        while True:
+            if not self.__send(history):
+                return None
+            trades.update(history.trades_dict)
+            if not history.trades_dict or len(trades) >= history.count:
+                return trades
+            history.offset = len(trades)
+
+    def __mark_seen(self, trades):
+        """Moves the fill cursor past trades without applying them. Must hold the lock."""
+
+        for txid, info in trades.iteritems():
+            self.__seen_trades[txid] = float(info['time'])
+        times = [float(info['time']) for info in trades.itervalues()]
+        if self.__last_trade_time is None:
+            self.__last_trade_time = max(times) if times else self.__req_mgr.time()
+        elif times:
+            self.__last_trade_time = max(self.__last_trade_time, max(times))
+        self.__prune_seen()
+
+    def __prune_seen(self):
+        """Trades older than the next start can't be returned again. Must hold the lock."""
+
+        start = int(self.__last_trade_time) - 1
+        self.__seen_trades = dict((txid, t) for txid, t in self.__seen_trades.iteritems() if t >= start)
+
+    def __poll_fills(self):
+        self.__last_fill_poll = time.time()
+        if self.__last_trade_time is None:
+            return self.reconcile()
+
+        trades = self.__fetch_trades()
+        if trades is None:
+            return False
+
+        fills = [Trade.from_history(txid, info) for txid, info in trades.iteritems() if txid not in self.__seen_trades]
+        missing = set(fill.pair for fill in fills) - set(self.__asset_pairs or {})
+        if missing and not self.__load_asset_pairs(missing):
+            return False
+
+        with self.__lock:
+            for fill in sorted(fills, key = lambda fill: fill.time):
+                if fill.txid in self.__seen_trades:
+                    # Marked by a reconcile in the meantime
+                    continue
+                self.__apply_fill(fill)
+                self.__seen_trades[fill.txid] = fill.time
+                self.__last_trade_time = max(self.__last_trade_time, fill.time)
+            self.__prune_seen()
+        return True
+
+    def __apply_fill(self, fill):
+        """Books a fill on base and quote asset and on its order. Must hold the lock."""
+
+        info = self.__asset_pairs.get(fill.pair)
+        if info is None:
+            self.__drift = True
+            return
+
+        # The fee is booked in the quote currency. Fees charged in the base currency (fcib)
+        # are corrected by the next reconcile.
+        base, quote = info['base'], info['quote']
+        if fill.side == 'buy':
+            self.__balances[base] = self.__balances.get(base, 0.0) + fill.volume
+            self.__balances[quote] = self.__balances.get(quote, 0.0) - fill.cost - fill.fee
+        else:
+            self.__balances[base] = self.__balances.get(base, 0.0) - fill.volume
+            self.__balances[quote] = self.__balances.get(quote, 0.0) + fill.cost - fill.fee
+
+        if self.__balances[base] < 0 or self.__balances[quote] < 0:
+            self.__drift = True
+
+        order = self.__orders.get(fill.ordertxid)
+        if order is None:
+            # Order placed outside of this process or already closed
+            self.__drift = True
+            return
+
+        order.volume_exec += fill.volume
+        order.status = 'open'
+        if order.volume_exec >= order.volume:
+            del self.__orders[order.txid]
+
+    def __load_asset_pairs(self, pairs):
+        request = Request_Tradable_Asset_Pairs()
+        request.asset_pair_list = sorted(pairs)
+        if not self.__req_mgr.send_request(request):
+            return False
+        self.__asset_pairs = dict(self.__asset_pairs or {}, **request.asset_pairs_dict)
+        return True
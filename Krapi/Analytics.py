@@ -0,0 +1,264 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import math
+from collections import deque
+from Records import Candle
+from RingBuffer import Ring_Buffer
+from CandleEngine import Candle_Engine
+
+class Candle_Resampler(object):
+    """
+    Aggregates candles of a base interval into candles of a larger interval.
+
+    The last base candle may be updated (the api returns the uncommitted candle
+    again until it is committed), so it is kept apart from the aggregate of the
+    committed base candles of the current bucket. Every update is O(1).
+
+    public methods:
+    update()  - adds or replaces a base candle, returns the completed candle or None
+    current() - the candle of the current, incomplete bucket or None
+    """
+
+    def __init__(self, interval):
+        """
+        :type interval:  int
+        :param interval: interval of the resampled candles in seconds
+        """
+
+        self.interval = interval
+        self.__bucket = None
+        self.__prefix = None
+        self.__last = None
+
+    def update(self, candle):
+        bucket = candle.time - candle.time % self.interval
+        completed = None
+        if self.__bucket is not None and bucket < self.__bucket:
+            return None
+
+        if bucket != self.__bucket:
+            completed = self.current()
+            self.__bucket, self.__prefix, self.__last = bucket, None, candle
+        elif candle.time == self.__last.time:
+            self.__last = candle
+        elif candle.time > self.__last.time:
+            self.__prefix = self.__merge(self.__prefix, self.__last)
+            self.__last = candle
+        return completed
+
+    def current(self):
+        if self.__last is None:
+            return None
+        return self.__merge(self.__prefix, self.__last)
+
+    def __merge(self, first, second):
+        if first is None:
+            return Candle(second.pair, self.__bucket, second.open, second.high, second.low, second.close,
+                          second.vwap, second.volume, second.count)
+        volume = first.volume + second.volume
+        vwap = (first.vwap * first.volume + second.vwap * second.volume) / volume if volume else second.close
+        return Candle(first.pair, self.__bucket, first.open, max(first.high, second.high), min(first.low, second.low),
+                      second.close, vwap, volume, first.count + second.count)
+
+
+class _Pair_State(object):
+    """Analytics state of one asset pair"""
+
+    def __init__(self, pair, base_interval, intervals, vwap_window, volatility_window, history):
+        self.vwap_values = Ring_Buffer(vwap_window)
+        self.vwap_volumes = Ring_Buffer(vwap_window)
+        self.returns = Ring_Buffer(volatility_window)
+        self.last_close = None
+        self.pending = None
+        self.resamplers = dict((interval, Candle_Resampler(interval)) for interval in intervals)
+        self.completed = dict((interval, deque(maxlen = history)) for interval in intervals)
+        self.builder = Candle_Engine(pair, 'time', base_interval)
+
+
+class Market_Analytics(object):
+    """
+    Incremental market analytics per asset pair.
+
+    Consumes new candles (OHLC) and trades (Trades) as they arrive and keeps
+    - the volume weighted average price over the last vwap_window trades
+    - the volatility (standard deviation of log returns) over the last volatility_window committed base candles
+    - candles resampled to larger intervals, the last history completed ones per interval
+    Every update is O(1), history is never processed again. All windows are
+    fixed size arrays (see RingBuffer.py), so memory is bounded per pair.
+
+    public methods:
+    update()             - consumes a sent Request_OHLC_Data or Request_Recent_Trades
+    add_candles()        - consumes base interval candles of a pair
+    add_trades()         - consumes trades of a pair
+    get_vwap()           - vwap of the trade window
+    get_volatility()     - volatility of the base candle window
+    get_candles()        - completed resampled candles
+    get_current_candle() - the incomplete resampled candle
+    get_pairs()          - pairs with state
+
+    """
+
+    def __init__(self, base_interval = 60, intervals = (900, 3600), vwap_window = 1000, volatility_window = 60,
+                 history = 1000, candles_from_trades = False):
+        """
+        :type base_interval:  int
+        :param base_interval: interval of the consumed candles in seconds
+
+        :type intervals:  tuple
+        :param intervals: intervals to resample to in seconds (multiples of base_interval)
+
+        :type vwap_window:  int
+        :param vwap_window: number of trades for the vwap
+
+        :type volatility_window:  int
+        :param volatility_window: number of base candle returns for the volatility
+
+        :type history:  int
+        :param history: number of completed candles kept per pair and interval
+
+        :type candles_from_trades:  bool
+        :param candles_from_trades: if True base candles are built from the consumed trades
+                                    (don't consume OHLC candles of the same pair then)
+
+        :ValueError - If an interval is no multiple of the base interval
+        """
+
+        for interval in intervals:
+            if interval % base_interval:
+                raise ValueError("Interval " + str(interval) + " is no multiple of " + str(base_interval))
+
+        self.base_interval = base_interval
+        self.intervals = tuple(intervals)
+        self.__vwap_window = vwap_window
+        self.__volatility_window = volatility_window
+        self.__history = history
+        self.__candles_from_trades = candles_from_trades
+        self.__pairs = {}
+
+    def update(self, request):
+        """
+        :type request:  PublicApiRequests.Request_OHLC_Data or PublicApiRequests.Request_Recent_Trades
+        :param request: successfully sent request
+
+        :ValueError - If the request is of another type or has another interval than base_interval
+        """
+
+        method = request.get_method()
+        if method == 'OHLC':
+            if int(request.interval) * 60 != self.base_interval:
+                raise ValueError("OHLC interval doesn't match the base interval")
+            for pair in request.asset_pairs_dict:
+                if pair != 'last':
+                    self.add_candles(pair, request.get_candles(pair))
+        elif method == 'Trades':
+            for pair in request.asset_pairs_dict:
+                if pair != 'last':
+                    self.add_trades(pair, request.get_trades(pair))
+        else:
+            raise ValueError("Request " + method + " is not supported")
+
+    def add_candles(self, pair, candles):
+        """
+        :param candles: Records.Candle of base_interval in time order. The newest candle
+                        may be passed again with updated values until it is committed.
+        """
+
+        state = self.__state(pair)
+        for candle in candles:
+            pending = state.pending
+            if pending is not None and candle.time < pending.time:
+                continue
+            if pending is not None and candle.time > pending.time:
+                # A newer candle commits the pending one
+                if state.last_close and pending.close > 0:
+                    state.returns.append(math.log(pending.close / state.last_close))
+                state.last_close = pending.close
+            state.pending = candle
+
+            for interval, resampler in state.resamplers.iteritems():
+                completed = resampler.update(candle)
+                if completed is not None:
+                    state.completed[interval].append(completed)
+
+    def add_trades(self, pair, trades):
+        """
+        :param trades: Records.Trade in time order
+        """
+
+        state = self.__state(pair)
+        trades = list(trades)
+        for trade in trades:
+            state.vwap_values.append(trade.price * trade.volume)
+            state.vwap_volumes.append(trade.volume)
+
+        if self.__candles_from_trades:
+            self.add_candles(pair, state.builder.add_trades(trades))
+        if self.__candles_from_trades and state.builder.current() is not None:
+            # The incomplete candle is passed on like the uncommitted OHLC candle
+            self.add_candles(pair, (state.builder.current(),))
+
+    def get_vwap(self, pair):
+        state = self.__pairs.get(pair)
+        if state is None or not state.vwap_volumes.sum():
+            return float('nan')
+        return state.vwap_values.sum() / state.vwap_volumes.sum()
+
+    def get_volatility(self, pair, annualize = False):
+        """
+        :return standard deviation of the log returns per base interval,
+                scaled to one year if annualize is True (nan for less than two returns)
+        """
+
+        state = self.__pairs.get(pair)
+        if state is None:
+            return float('nan')
+        volatility = state.returns.stdev()
+        if annualize:
+            volatility *= math.sqrt(365 * 24 * 3600.0 / self.base_interval)
+        return volatility
+
+    def get_candles(self, pair, interval, n = None):
+        """
+        :return list with the last n (default all kept) completed candles of an interval
+        """
+
+        state = self.__pairs.get(pair)
+        if state is None:
+            return []
+        candles = list(state.completed[interval])
+        return candles if n is None else candles[-n:]
+
+    def get_current_candle(self, pair, interval):
+        state = self.__pairs.get(pair)
+        return state.resamplers[interval].current() if state else None
+
+    def get_pairs(self):
+        return sorted(self.__pairs)
+
+    def __state(self, pair):
+        state = self.__pairs.get(pair)
+        if state is None:
+            state = _Pair_State(pair, self.base_interval, self.intervals, self.__vwap_window, self.__volatility_window,
+                                self.__history)
+            self.__pairs[pair] = state
+        return state
@@ -0,0 +1,278 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import os
+import cPickle
+from array import array
+from bisect import bisect_left, bisect_right
+
+class _Asset_Series(object):
+    """Balance series of one asset: sorted times, changes (amount - fee) and their prefix sums"""
+
+    def __init__(self):
+        self.times = array('d')
+        self.changes = array('d')
+        self.sums = array('d')
+        # Balance before the earliest entry, from its reported balance
+        self.base = 0.0
+
+    def add(self, rows):
+        """
+        :param rows: list of (time, change, balance) sorted by time
+        """
+
+        times, changes, sums = self.times, self.changes, self.sums
+        if not times or rows[0][0] < times[0]:
+            self.base = rows[0][2] - rows[0][1]
+
+        if times and rows[0][0] < times[-1]:
+            # Older entries: merge with the tail behind them and sum the tail again
+            index = bisect_right(times, rows[0][0])
+            tail = [(times[i], changes[i], None) for i in xrange(index, len(times))]
+            rows = sorted(tail + rows, key = lambda row: row[0])
+            del times[index:]
+            del changes[index:]
+            del sums[index:]
+
+        total = sums[-1] if sums else 0.0
+        for row_time, change, balance in rows:
+            total += change
+            times.append(row_time)
+            changes.append(change)
+            sums.append(total)
+
+    def balance_at(self, at):
+        index = bisect_right(self.times, at)
+        return self.base + self.sums[index - 1] if index else self.base
+
+
+class Balance_History(object):
+    """
+    Balances of an account over time, reconstructed from ledger entries.
+
+    Every asset keeps its entry times, changes (amount - fee) and the prefix sums
+    of the changes in arrays. The prefix sum after an entry is a checkpoint of the
+    balance, so the balance at any time is one binary search: O(log n).
+    The series starts at the reported balance of the earliest entry, so it matches
+    the balances of the api even if older entries were never loaded.
+
+    Newer entries extend the series at the end. Older entries (e.g. pages of a
+    backfill) are merged in and only the sums behind them are computed again.
+    Entries are identified by their ledger id, entries added twice are skipped.
+
+    public methods:
+    add_entries()  - adds Records.Ledger_Entry
+    add_columns()  - adds ledger columns (e.g. of ColumnarStore.Columnar_Reader.read_columns)
+    from_store()   - adds the entries of a columnar file
+    update()       - fetches and adds the entries since the newest known one
+    get_balance()  - balance of an asset at a time
+    get_balances() - balances of all assets at a time
+    get_series()   - (times, balances) of an asset
+    sample()       - balances of an asset at many sorted times in one pass
+    get_assets()   - assets with entries
+    get_last_time() - time of the newest entry
+    save(), load() - stores and restores the history
+
+    """
+
+    def __init__(self):
+        self.__assets = {}
+        self.__ids = set()
+        self.__last_time = None
+
+    def add_entries(self, entries):
+        """
+        :param entries: Records.Ledger_Entry in any order
+
+        :return number of added entries
+        """
+
+        ids, times, assets, amounts, fees, balances = [], [], [], [], [], []
+        for entry in entries:
+            ids.append(entry.ledger_id)
+            times.append(entry.time)
+            assets.append(entry.asset)
+            amounts.append(entry.amount)
+            fees.append(entry.fee)
+            balances.append(entry.balance)
+        return self.add_columns(ids, times, assets, amounts, fees, balances)
+
+    def add_columns(self, ids, times, assets, amounts, fees, balances):
+        """
+        :return number of added entries
+        """
+
+        known = self.__ids
+        rows = {}
+        for i in xrange(len(ids)):
+            if ids[i] in known:
+                continue
+            known.add(ids[i])
+            rows.setdefault(assets[i], []).append((times[i], amounts[i] - fees[i], balances[i]))
+
+        added = 0
+        for asset, asset_rows in rows.iteritems():
+            asset_rows.sort(key = lambda row: row[0])
+            series = self.__assets.get(asset)
+            if series is None:
+                series = _Asset_Series()
+                self.__assets[asset] = series
+            series.add(asset_rows)
+            added += len(asset_rows)
+            if self.__last_time is None or series.times[-1] > self.__last_time:
+                self.__last_time = series.times[-1]
+        return added
+
+    def from_store(self, reader, start = None, end = None):
+        """
+        :type reader:  ColumnarStore.Columnar_Reader
+        :param reader: reader of a file with Records.Ledger_Entry
+
+        :return number of added entries
+        """
+
+        columns = reader.read_columns(['ledger_id', 'time', 'asset', 'amount', 'fee', 'balance'], None, start, end)
+        return self.add_columns(columns['ledger_id'], columns['time'], columns['asset'], columns['amount'],
+                                columns['fee'], columns['balance'])
+
+    def update(self, req_mgr):
+        """
+        Fetches the ledger entries newer than the newest known entry (all if there is none).
+        Entries are only added once all pages were fetched, so an interrupted update
+        leaves no hole and can simply be repeated.
+
+        :type req_mgr:  RequestMgr.Request_Mgr
+        :param req_mgr: request manager with keys
+
+        :return - None  - If the rate limit of the request manager was reached
+                  False - If a request failed
+                  number of added entries otherwise
+        """
+
+        from PrivateApiRequests import Request_Ledger_Info
+
+        entries = []
+        end = int(req_mgr.time())
+        while True:
+            request = Request_Ledger_Info()
+            # start is exclusive and has a resolution of seconds, the overlap is skipped by id
+            request.start = int(self.__last_time) - 1 if self.__last_time is not None else None
+            request.end = end
+            request.offset = len(entries)
+            result = req_mgr.send_request(request)
+            if not result:
+                return result
+            page = request.get_ledger_entries().to_list()
+            entries.extend(page)
+            if not page or len(entries) >= int(request.amount):
+                break
+        return self.add_entries(entries)
+
+    def get_balance(self, asset, at = None):
+        """
+        :type at:  float
+        :param at: unix time (default: after the newest entry)
+
+        :return balance of the asset after all entries up to at, 0.0 for unknown assets
+        """
+
+        series = self.__assets.get(asset)
+        if series is None:
+            return 0.0
+        if at is None:
+            return series.base + series.sums[-1]
+        return series.balance_at(at)
+
+    def get_balances(self, at = None):
+        """:return dict asset -> balance at a time"""
+
+        return dict((asset, self.get_balance(asset, at)) for asset in self.__assets)
+
+    def get_series(self, asset, start = None, end = None):
+        """
+        :return tuple (times, balances) with arrays of the balances after each entry
+                with start <= time < end
+        """
+
+        series = self.__assets.get(asset)
+        if series is None:
+            return (array('d'), array('d'))
+        first = bisect_left(series.times, start) if start is not None else 0
+        last = bisect_left(series.times, end) if end is not None else len(series.times)
+        base = series.base
+        return (series.times[first:last], array('d', (base + total for total in series.sums[first:last])))
+
+    def sample(self, asset, times):
+        """
+        :param times: sorted unix times, e.g. the end of every day
+
+        :return array('d') with the balance at every time, merged in one pass
+        """
+
+        result = array('d')
+        series = self.__assets.get(asset)
+        if series is None:
+            result.extend(0.0 for at in times)
+            return result
+
+        entry_times, sums, base = series.times, series.sums, series.base
+        count = len(entry_times)
+        index = 0
+        for at in times:
+            while index < count and entry_times[index] <= at:
+                index += 1
+            result.append(base + sums[index - 1] if index else base)
+        return result
+
+    def get_assets(self):
+        return sorted(self.__assets)
+
+    def get_last_time(self):
+        return self.__last_time
+
+    def save(self, path):
+        """Stores the history, so a later run only has to fetch newer entries"""
+
+        state = {'assets':dict((asset, (series.times, series.changes, series.sums, series.base))
+                                for asset, series in self.__assets.iteritems()),
+                 'ids':self.__ids, 'last_time':self.__last_time}
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            cPickle.dump(state, f, cPickle.HIGHEST_PROTOCOL)
+        os.rename(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :return Balance_History stored with save()
+        """
+
+        with open(path, 'rb') as f:
+            state = cPickle.load(f)
+        history = cls()
+        for asset, (times, changes, sums, base) in state['assets'].iteritems():
+            series = _Asset_Series()
+            series.times, series.changes, series.sums, series.base = times, changes, sums, base
+            history.__assets[asset] = series
+        history.__ids = state['ids']
+        history.__last_time = state['last_time']
+        return history
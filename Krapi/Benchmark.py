@@ -0,0 +1,277 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+"""
+Offline benchmark suite for the request hot paths.
+
+Starts a Mock_Kraken_Server in a child process (so its cost is not measured)
+and runs the following scenarios against it:
+
+sync      -- single pair Ticker requests through Request_Mgr.send_request, 
+             with a new request per send and with a reused frozen template
+batch     -- all pair Ticker, Depth and OHLC requests through Request_Mgr.send_request
+paginated -- complete Ledgers and TradesHistory walks through Kraken_Connector
+             (the rate limit of Request_Mgr would dominate the measurement otherwise)
+
+For every scenario throughput, latency percentiles, cpu time per request and
+peak memory are reported. Results can be saved with --save and compared against
+a saved baseline with --baseline. The exit code is 1 if a scenario got slower
+than the allowed tolerance.
+
+usage: python Benchmark.py [--size 100] [--latency 0] [--iterations 200]
+                           [--save result.json] [--baseline result.json] [--tolerance 0.2]
+"""
+
+import argparse
+import subprocess
+import resource
+import tempfile
+import shutil
+import json
+import time
+import sys
+import os
+from CredentialMgr import Credential_Mgr
+from KrakenConnector import Kraken_Connector
+from RequestMgr import Request_Mgr
+from PublicApiRequests import Request_Ticker_Information, Request_Order_Book, Request_OHLC_Data
+from PrivateApiRequests import Request_Ledger_Info, Request_Trade_History
+
+class Benchmark_Result(object):
+    """
+    Measurements of one scenario.
+
+    public variables:
+    name:       scenario name
+    latencies:  list with the latency of every request in seconds
+    cpu_time:   user + system cpu time spent by the client in seconds
+    wall_time:  wall clock time of the whole scenario in seconds
+    peak_rss:   peak resident memory of the client process in kB after the scenario
+    """
+
+    def __init__(self, name, latencies, cpu_time, wall_time, peak_rss):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.cpu_time = cpu_time
+        self.wall_time = wall_time
+        self.peak_rss = peak_rss
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        index = min(len(self.latencies) - 1, int(round(p / 100.0 * (len(self.latencies) - 1))))
+        return self.latencies[index]
+
+    def throughput(self):
+        return len(self.latencies) / self.wall_time if self.wall_time else 0.0
+
+    def cpu_per_request(self):
+        return self.cpu_time / len(self.latencies) if self.latencies else 0.0
+
+    def to_dict(self):
+        return {
+            'requests':len(self.latencies),
+            'throughput':self.throughput(),
+            'p50':self.percentile(50),
+            'p90':self.percentile(90),
+            'p99':self.percentile(99),
+            'max':self.percentile(100),
+            'cpu_per_request':self.cpu_per_request(),
+            'peak_rss_kb':self.peak_rss
+        }
+
+
+def measure(name, send, iterations):
+    """
+    Calls send() iterations times and measures every call.
+
+    :type send: callable
+    :param send: sends one request and returns False on failure
+
+    :return Benchmark_Result
+
+    :Exception - If a request failed
+    """
+
+    latencies = []
+    cpu_start = sum(os.times()[:2])
+    wall_start = time.time()
+    for i in xrange(iterations):
+        start = time.time()
+        if send() is False:
+            raise Exception("Request failed in scenario " + name)
+        latencies.append(time.time() - start)
+    wall_time = time.time() - wall_start
+    cpu_time = sum(os.times()[:2]) - cpu_start
+    return Benchmark_Result(name, latencies, cpu_time, wall_time, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def run_sync(req_mgr, iterations):
+    def send():
+        req = Request_Ticker_Information()
+        req.asset_pair_list = ['XXBTZEUR']
+        return req_mgr.send_request(req)
+
+    template = Request_Ticker_Information()
+    template.asset_pair_list = ['XXBTZEUR']
+    template.freeze()
+
+    def send_template():
+        return req_mgr.send_request(template)
+
+    return [measure('sync.ticker', send, iterations), measure('sync.ticker_template', send_template, iterations)]
+
+
+def run_batch(req_mgr, iterations):
+    results = []
+    for name, request_class in (('batch.ticker', Request_Ticker_Information),
+                                ('batch.depth', Request_Order_Book),
+                                ('batch.ohlc', Request_OHLC_Data)):
+        def send():
+            return req_mgr.send_request(request_class())
+        results.append(measure(name, send, iterations))
+    return results
+
+
+def run_paginated(connection, cred_mgr, iterations):
+    results = []
+    for name, request_class, field, total in (('paginated.ledgers', Request_Ledger_Info, 'ledger_info_dict', 'amount'),
+                                              ('paginated.trades_history', Request_Trade_History, 'trades_dict', 'count')):
+        state = {'offset':0}
+
+        def send():
+            req = request_class()
+            req.offset = state['offset']
+            if not req.validate_response(connection.query_request(req, cred_mgr)):
+                return False
+            state['offset'] += len(getattr(req, field))
+            if state['offset'] >= getattr(req, total):
+                state['offset'] = 0
+            return True
+
+        results.append(measure(name, send, iterations))
+    return results
+
+
+def create_credentials(directory):
+    """
+    Creates throw away credentials for the stand-in server.
+
+    :return Credential_Mgr with loaded credentials
+    """
+
+    key_file = os.path.join(directory, 'BenchKey.txt')
+    with open(key_file, 'w') as f:
+        json.dump({'api_key':'benchmark', 'private_key':'YmVuY2htYXJr'}, f)
+
+    cred_mgr = Credential_Mgr()
+    cred_mgr.encrypt_keys(in_file=key_file, pwd='benchmark')
+    if not cred_mgr.load_credentials(tbk_file=os.path.join(directory, 'BenchKey.tbk'), pwd='benchmark'):
+        raise Exception("Loading benchmark credentials failed")
+    return cred_mgr
+
+
+def start_server(size, latency):
+    """
+    Starts a MockKrakenServer.py child process.
+
+    :return tuple with (process, url)
+    """
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MockKrakenServer.py')
+    process = subprocess.Popen([sys.executable, script, '--size', str(size), '--latency', str(latency)],
+                               stdout=subprocess.PIPE)
+    url = process.stdout.readline().strip()
+    return (process, url)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares results with a baseline.
+
+    :return list with names of scenarios that regressed
+    """
+
+    regressions = []
+    for name, result in results.iteritems():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if result['throughput'] < base['throughput'] * (1 - tolerance) or \
+           result['cpu_per_request'] > base['cpu_per_request'] * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for Krapi')
+    parser.add_argument('--size', type=int, default=100, help='rows per pair / history entries of the stand-in server')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated server latency in seconds')
+    parser.add_argument('--iterations', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--scenarios', default='sync,batch,paginated', help='comma separated list of scenarios')
+    parser.add_argument('--save', default=None, help='save results as json')
+    parser.add_argument('--baseline', default=None, help='compare results with a saved json result')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression against the baseline')
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenarios.split(',')
+    process, url = start_server(args.size, args.latency)
+    directory = tempfile.mkdtemp()
+    results = []
+
+    try:
+        req_mgr = Request_Mgr(3, url=url)
+        if 'sync' in scenarios:
+            results += run_sync(req_mgr, args.iterations)
+        if 'batch' in scenarios:
+            results += run_batch(req_mgr, args.iterations)
+        if 'paginated' in scenarios:
+            results += run_paginated(Kraken_Connector(url), create_credentials(directory), args.iterations)
+    finally:
+        process.terminate()
+        shutil.rmtree(directory)
+
+    print '%-26s %8s %10s %9s %9s %9s %9s %10s %10s' % ('scenario', 'requests', 'req/s', 'p50 ms', 'p90 ms',
+                                                          'p99 ms', 'max ms', 'cpu ms/req', 'rss kB')
+    summary = {}
+    for result in results:
+        stats = result.to_dict()
+        summary[result.name] = stats
+        print '%-26s %8d %10.1f %9.3f %9.3f %9.3f %9.3f %10.3f %10d' % (result.name, stats['requests'], stats['throughput'],
+                                                                       stats['p50'] * 1000, stats['p90'] * 1000,
+                                                                       stats['p99'] * 1000, stats['max'] * 1000,
+                                                                       stats['cpu_per_request'] * 1000, stats['peak_rss_kb'])
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        if regressions:
+            print 'Regressions: ' + ', '.join(regressions)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
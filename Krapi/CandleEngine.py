@@ -0,0 +1,241 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import time
+from Records import Candle
+
+class Candle_Engine(object):
+    """
+    Builds bars of one asset pair from trades.
+
+    bar_type 'time'   -- one bar per size seconds (any interval, not only the OHLC intervals)
+             'volume' -- a bar is completed once its volume reaches size
+             'tick'   -- a bar is completed after size trades
+
+    Trades are consumed in batches of columns in one tight loop. The incomplete
+    bar is carried over to the next batch, so streamed batches and one large
+    batch give the same bars. Bars carry the time of their first trade
+    (time bars the start of their interval) and the number of trades as count.
+
+    public methods:
+    add_trades()  - consumes Records.Trade, returns completed bars
+    add_columns() - consumes time, price and volume columns, returns completed bars
+    current()     - the incomplete bar or None
+    flush()       - completes the incomplete bar and returns it (or None)
+
+    """
+
+    bar_types = ('time', 'volume', 'tick')
+
+    def __init__(self, pair, bar_type = 'time', size = 60):
+        """
+        :type pair:  str
+        :param pair: asset pair of the bars
+
+        :type bar_type:  str
+        :param bar_type: 'time', 'volume' or 'tick'
+
+        :type size:  float
+        :param size: seconds, volume or number of trades per bar
+
+        :ValueError - If bar type or size are invalid
+        """
+
+        if bar_type not in self.bar_types:
+            raise ValueError("Bar type " + str(bar_type) + " is not supported")
+        if size <= 0:
+            raise ValueError("Bar size has to be positive")
+
+        self.pair = pair
+        self.bar_type = bar_type
+        self.size = int(size) if bar_type != 'volume' else float(size)
+        # open, high, low, close, volume, price * volume, count, time of the incomplete bar
+        self.__bar = None
+
+    def add_trades(self, trades):
+        times, prices, volumes = [], [], []
+        for trade in trades:
+            times.append(trade.time)
+            prices.append(trade.price)
+            volumes.append(trade.volume)
+        return self.add_columns(times, prices, volumes)
+
+    def add_columns(self, times, prices, volumes):
+        """
+        :param times:   trade times in time order (list or array('d'))
+        :param prices:  trade prices
+        :param volumes: trade volumes
+
+        :return list with the completed bars as Records.Candle
+        """
+
+        completed = []
+        time_bars = self.bar_type == 'time'
+        volume_bars = self.bar_type == 'volume'
+        tick_bars = self.bar_type == 'tick'
+        size = self.size
+
+        if self.__bar is not None:
+            o, h, l, c, v, pv, n, start = self.__bar
+        else:
+            o = h = l = c = v = pv = 0.0
+            n = 0
+            start = None
+
+        for i in xrange(len(prices)):
+            t = times[i]
+            p = prices[i]
+            q = volumes[i]
+
+            if time_bars:
+                bucket = int(t) - int(t) % size
+                if n:
+                    if bucket < start:
+                        # Older than the incomplete bar
+                        continue
+                    if bucket != start:
+                        completed.append(self.__candle(o, h, l, c, v, pv, n, start))
+                        n = 0
+            if not n:
+                o = h = l = p
+                v = pv = 0.0
+                start = bucket if time_bars else int(t)
+
+            if p > h:
+                h = p
+            elif p < l:
+                l = p
+            c = p
+            v += q
+            pv += p * q
+            n += 1
+
+            if (volume_bars and v >= size) or (tick_bars and n >= size):
+                completed.append(self.__candle(o, h, l, c, v, pv, n, start))
+                n = 0
+
+        self.__bar = (o, h, l, c, v, pv, n, start) if n else None
+        return completed
+
+    def current(self):
+        if self.__bar is None:
+            return None
+        return self.__candle(*self.__bar)
+
+    def flush(self):
+        candle = self.current()
+        self.__bar = None
+        return candle
+
+    def __candle(self, o, h, l, c, v, pv, n, start):
+        return Candle(self.pair, start, o, h, l, c, pv / v if v else c, v, n)
+
+
+def fetch_trades(req_mgr, pair, since = None, until = None, calls_per_second = 1.0, retries = 5):
+    """
+    Pages through the public trades of a pair with since.
+
+    :type req_mgr:  RequestMgr.Request_Mgr
+    :param req_mgr: request manager for the Trades requests
+
+    :type since:  float
+    :param since: unix time of the first trade (default: the last trades only)
+
+    :type until:  float
+    :param until: unix time to stop at (exclusive, default: up to now)
+
+    :type calls_per_second:  float
+    :param calls_per_second: request rate, the api allows about one public call per second
+
+    :return generator over lists of Records.Trade (one list per page)
+
+    :Exception - If a request still fails after retries attempts
+    """
+
+    from PublicApiRequests import Request_Recent_Trades
+
+    request = Request_Recent_Trades()
+    request.asset_pair_list = [pair]
+    request.since = str(int(since * 1000000000)) if since else None
+    request.freeze()
+    spacing = 1.0 / calls_per_second
+    last_call = 0.0
+
+    while True:
+        for attempt in xrange(retries):
+            wait = last_call + spacing * (2 ** attempt) - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            last_call = time.time()
+            if req_mgr.send_request(request):
+                break
+        else:
+            raise Exception("Trades request failed: " + ', '.join(request.errors))
+
+        trades = request.get_trades(pair).to_list()
+        if until is not None:
+            trades = [trade for trade in trades if trade.time < until]
+        if trades:
+            yield trades
+
+        if not trades or str(request.last_id) == str(request.since) or \
+           (until is not None and request.get_trades(pair)[-1].time >= until):
+            return
+        request.since = request.last_id
+
+
+def backfill(req_mgr, engine, since, until = None, writer = None, calls_per_second = 1.0):
+    """
+    Builds bars from the trade history of the engine's pair, also beyond the 720 candles
+    of the OHLC endpoint.
+
+    :type engine:  Candle_Engine
+    :param engine: engine for the bars
+
+    :type writer:  ColumnarStore.Columnar_Writer
+    :param writer: also stores the fetched trades (optional), so bars of other types
+                   or sizes can be built again with from_store() without api calls
+
+    :return list with the completed bars. The incomplete last bar stays in the engine
+    """
+
+    candles = []
+    for trades in fetch_trades(req_mgr, engine.pair, since, until, calls_per_second):
+        candles.extend(engine.add_trades(trades))
+        if writer is not None:
+            writer.write(trades)
+            writer.flush()
+    return candles
+
+
+def from_store(reader, engine, start = None, end = None):
+    """
+    Builds bars from trades of a columnar file (see ColumnarStore.py).
+
+    :type reader:  ColumnarStore.Columnar_Reader
+    :param reader: reader of a file with Records.Trade
+
+    :return list with the completed bars. The incomplete last bar stays in the engine
+    """
+
+    columns = reader.read_columns(['time', 'price', 'volume'], [engine.pair], start, end)
+    return engine.add_columns(columns['time'], columns['price'], columns['volume'])
@@ -0,0 +1,194 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import logging
+import time
+from collections import deque
+from threading import Thread, Event, Lock
+from PublicApiRequests import Request_Time
+
+_log = logging.getLogger(__name__)
+
+class Clock_Sync(object):
+    """
+    Estimates the offset of the local clock to the server clock from Time requests.
+
+    Every sample bounds the offset: the server time was in [unixtime, unixtime + 1)
+    at some point between sending and receiving, so
+
+        unixtime - received <= offset < unixtime + 1 - sent
+
+    Like the NTP clock filter only the samples with the shortest round trips of the
+    last window samples are used, their bounds are intersected and the offset is the
+    midpoint of the intersection. Samples spaced by fractions of a second fall at
+    different phases of the server second and narrow the bounds below the one second
+    resolution of Time. If the samples contradict each other the local clock was
+    stepped, then all but the newest sample are dropped.
+
+    time() only adds the offset to the local time, so it can be called for every
+    nonce. Install it with Request_Mgr.set_clock(clock_sync.time) to use corrected
+    time for nonces and time ranges (see Request_Mgr.time()).
+
+    public methods:
+    sample()          - sends one Time request and updates the offset
+    sync()            - takes several spaced samples
+    refresh()         - takes a sample if the last one is older than interval
+    start(), stop()   - samples every interval seconds in a daemon thread
+    time()            - local time corrected to server time
+    get_offset()      - server time - local time in seconds (0.0 before the first sample)
+    get_uncertainty() - half width of the offset bounds in seconds
+    get_round_trip()  - shortest round trip of the kept samples in seconds
+
+    public variables:
+    errors: number of samples of the sampling thread that raised an exception. They are
+            logged and the thread keeps sampling, time() keeps the last offset meanwhile.
+
+    """
+
+    def __init__(self, req_mgr, interval = 300, window = 8, best = 4):
+        """
+        :type req_mgr:  RequestMgr.Request_Mgr
+        :param req_mgr: request manager for the Time requests
+
+        :type interval:  float
+        :param interval: seconds between samples of start() and maximum age for refresh()
+
+        :type window:  int
+        :param window: number of samples kept
+
+        :type best:  int
+        :param best: number of samples with the shortest round trips used for the offset
+        """
+
+        self.__req_mgr = req_mgr
+        self.__request = Request_Time()
+        self.__request.freeze()
+        self.interval = interval
+        self.__best = best
+        self.__samples = deque(maxlen = window)
+        self.__lock = Lock()
+        self.__offset = 0.0
+        self.__uncertainty = None
+        self.__last_sample = None
+        self.__stop = Event()
+        self.__thread = None
+        self.errors = 0
+
+    def time(self):
+        return time.time() + self.__offset
+
+    def get_offset(self):
+        return self.__offset
+
+    def get_uncertainty(self):
+        """:return half width of the offset bounds, None before the first sample"""
+
+        return self.__uncertainty
+
+    def get_round_trip(self):
+        with self.__lock:
+            return min(sample[0] for sample in self.__samples) if self.__samples else None
+
+    def sample(self):
+        """
+        :return True if the sample was taken, False if the request failed
+        """
+
+        with self.__lock:
+            sent = time.time()
+            if not self.__req_mgr.send_request(self.__request):
+                return False
+            received = time.time()
+            unixtime = self.__request.unixtime
+
+            self.__samples.append((received - sent, unixtime - received, unixtime + 1 - sent))
+            self.__last_sample = received
+            low, high = self.__filter()
+            if low > high:
+                # The local clock was stepped
+                newest = self.__samples[-1]
+                self.__samples.clear()
+                self.__samples.append(newest)
+                low, high = newest[1], newest[2]
+
+            self.__offset = (low + high) / 2
+            self.__uncertainty = (high - low) / 2
+            return True
+
+    def sync(self, samples = 4, spacing = 1.25):
+        """
+        :type samples:  int
+        :param samples: number of samples
+
+        :type spacing:  float
+        :param spacing: seconds between samples, no whole number so samples fall at
+                        different phases of the server second
+
+        :return number of samples taken
+        """
+
+        taken = 0
+        for i in xrange(samples):
+            if i:
+                time.sleep(spacing)
+            taken += self.sample()
+        return taken
+
+    def refresh(self):
+        """:return False if a sample was due and failed"""
+
+        if self.__last_sample is None:
+            return self.sync() > 0
+        if time.time() - self.__last_sample >= self.interval:
+            return self.sample()
+        return True
+
+    def start(self):
+        self.__stop.clear()
+        self.__thread = Thread(target = self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        self.__stop.set()
+        if self.__thread:
+            self.__thread.join()
+
+    def __run(self):
+        while True:
+            try:
+                # Sync again until a first sample was taken
+                if self.__last_sample is None:
+                    self.sync()
+                else:
+                    self.sample()
+            except Exception:
+                _log.exception("Sampling the server time failed")
+                self.errors += 1
+            if self.__stop.wait(self.interval):
+                return
+
+    def __filter(self):
+        """:return bounds (low, high) of the offset from the samples with the shortest round trips"""
+
+        best = sorted(self.__samples)[:self.__best]
+        return (max(sample[1] for sample in best), min(sample[2] for sample in best))
@@ -0,0 +1,450 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+"""
+Compressed columnar files for trades, candles and ledger entries.
+
+File layout (all numbers little endian):
+
+    KRCF2\\0 <uint32 header length> <header json>
+    <row group> ...
+    <footer json> <uint64 footer length> KRCF2\\0
+
+The header names the record class, its fields and column types. A row group
+holds the records of one write and is self-contained:
+
+    KRRG <uint32 meta length> <meta json> <column blocks> <dictionary blocks>
+
+Every column is one zlib compressed block: float64 values for numeric fields and
+uint16/uint32 dictionary codes for string fields. The dictionary of a string
+column is a zlib compressed json list in the same row group. The meta of a row
+group holds the offsets of its blocks (relative to the first block), their total
+length and crc32, the number of rows,
+min and max time and the asset pairs it contains, so readers skip row groups
+that can't match a query without decompressing them.
+
+The footer is the list of all row group metas (offsets and statistics only, so
+it stays small). A writer rewrites it whenever a row group was written. If the
+process died before that, the row groups are found again by reading their
+metas from the start of the file and complete row groups are kept (see
+Columnar_Reader.recovered).
+"""
+
+import struct
+import zlib
+import json
+import mmap
+import os
+import sys
+from array import array
+from Records import Candle, Trade, Ledger_Entry
+
+_magic = 'KRCF2\0'
+_header = struct.Struct('<I')
+_tail = struct.Struct('<Q')
+_group_header = struct.Struct('<4sI')
+_group_magic = 'KRRG'
+
+# Column types per record field: d = float, i = integer, s = string
+# Integers are stored as float64, which is exact for timestamps and counts
+schemas = {
+    'Candle':       (Candle,       'siddddddi'),
+    'Trade':        (Trade,        'ssdddssssdd'),
+    'Ledger_Entry': (Ledger_Entry, 'ssdsssddd')
+}
+
+def _to_little_endian(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class Columnar_Writer(object):
+    """
+    Streams records into a columnar file.
+
+    Records are buffered until min_row_group_size of them can be written as one
+    row group, so frequent flushes don't fragment the file into small row groups
+    with poor compression.
+
+    public methods:
+    write() - adds records, a row group is written whenever row_group_size records are buffered
+    flush() - writes buffered records as a row group once min_row_group_size are buffered (or if forced)
+              and updates the footer
+    close() - writes all buffered records and closes the file
+
+    """
+
+    def __init__(self, path, record_class, append = False, row_group_size = 65536, min_row_group_size = 4096,
+                 level = 6):
+        """
+        :type path:  str
+        :param path: file to write
+
+        :type record_class:  class
+        :param record_class: Records.Candle, Records.Trade or Records.Ledger_Entry
+
+        :type append:  bool
+        :param append: appends row groups to an existing file of the same record class.
+                       Row groups of a file that was not closed are recovered first.
+
+        :type row_group_size:  int
+        :param row_group_size: maximum records per row group
+
+        :type min_row_group_size:  int
+        :param min_row_group_size: records flush() buffers before it writes a row group
+
+        :type level:  int
+        :param level: zlib compression level
+
+        :ValueError - If the record class is not supported or the file holds other records
+
+        """
+
+        if record_class.__name__ not in schemas:
+            raise ValueError("Records of type " + record_class.__name__ + " are not supported")
+
+        self.__record = record_class.__name__
+        self.__fields = record_class.__slots__
+        self.__types = schemas[record_class.__name__][1]
+        self.__row_group_size = row_group_size
+        self.__min_row_group_size = min(min_row_group_size, row_group_size)
+        self.__level = level
+        self.__buffer = []
+        self.__row_groups = []
+        self.__dirty = False
+
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            footer, self.__data_end, recovered = _read_footer(path)
+            if footer['record'] != self.__record:
+                raise ValueError(path + " holds " + footer['record'] + " records")
+            self.__row_groups = footer['row_groups']
+            self.__dirty = recovered
+            self.__file = open(path, 'r+b')
+        else:
+            header = json.dumps({'record':self.__record, 'fields':self.__fields, 'types':self.__types})
+            self.__file = open(path, 'wb')
+            self.__file.write(_magic + _header.pack(len(header)) + header)
+            self.__data_end = self.__file.tell()
+            self.__dirty = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, records):
+        for record in records:
+            self.__buffer.append(record.to_tuple())
+            if len(self.__buffer) >= self.__row_group_size:
+                self.__write_row_group()
+
+    def flush(self, force = False):
+        """
+        :type force:  bool
+        :param force: also writes less than min_row_group_size buffered records
+
+        :return True if all records are on disk, False if records are still buffered
+        """
+
+        if self.__buffer and (force or len(self.__buffer) >= self.__min_row_group_size):
+            self.__write_row_group()
+        if self.__dirty:
+            footer = json.dumps({'record':self.__record, 'fields':self.__fields, 'types':self.__types,
+                                 'row_groups':self.__row_groups})
+            self.__file.seek(self.__data_end)
+            self.__file.write(footer + _tail.pack(len(footer)) + _magic)
+            self.__file.truncate()
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__dirty = False
+        return not self.__buffer
+
+    def close(self):
+        self.flush(True)
+        self.__file.close()
+
+    def __write_row_group(self):
+        rows, self.__buffer = self.__buffer, []
+        columns = zip(*rows)
+        blocks = []
+        dictionaries = []
+
+        for index, column_type in enumerate(self.__types):
+            values = columns[index]
+            if column_type == 's':
+                dictionary = sorted(set(values))
+                codes = dict((value, code) for code, value in enumerate(dictionary))
+                data = array('H' if len(dictionary) < 65536 else 'I', [codes[value] for value in values])
+                dictionaries.append(zlib.compress(json.dumps(dictionary), self.__level))
+            else:
+                data = array('d', [float('nan') if value is None else value for value in values])
+                dictionaries.append(None)
+            blocks.append((zlib.compress(_to_little_endian(data).tostring(), self.__level), data.typecode))
+
+        times = columns[self.__fields.index('time')]
+        meta = {'rows':len(rows), 'min_time':min(times), 'max_time':max(times),
+                'pairs':sorted(set(columns[self.__fields.index('pair')])) if 'pair' in self.__fields else None}
+
+        # Offsets in the row group are relative to its first block, the footer gets absolute ones
+        position = 0
+        meta['columns'] = []
+        for block, typecode in blocks:
+            meta['columns'].append([position, len(block), typecode])
+            position += len(block)
+        for index, dictionary in enumerate(dictionaries):
+            if dictionary is not None:
+                meta['columns'][index].extend([position, len(dictionary)])
+                position += len(dictionary)
+        data = ''.join([block for block, typecode in blocks] + [d for d in dictionaries if d is not None])
+        meta['length'] = len(data)
+        meta['crc'] = zlib.crc32(data) & 0xffffffff
+        encoded = json.dumps(meta)
+
+        self.__file.seek(self.__data_end)
+        self.__file.write(_group_header.pack(_group_magic, len(encoded)) + encoded + data)
+        self.__row_groups.append(_absolute(meta, self.__data_end + _group_header.size + len(encoded)))
+        self.__data_end = self.__file.tell()
+        self.__dirty = True
+
+
+class Columnar_Reader(object):
+    """
+    Reads columnar files through a read only memory map.
+
+    Queries take the pairs and the time range to read. Row groups whose statistics
+    don't match are skipped, of the remaining row groups only the requested columns
+    (and their dictionaries) are decompressed.
+
+    public methods:
+    read_columns() - returns the matching rows as dict of columns
+    records()      - yields the matching rows as records
+    close()        - closes the file
+
+    public variables:
+    fields:     record fields of the file
+    rows:       number of rows in the file
+    row_groups: number of row groups in the file
+    recovered:  True if the file was not closed and its row groups were found without the footer
+
+    """
+
+    def __init__(self, path):
+        footer, data_end, self.recovered = _read_footer(path)
+        self.__record_class = schemas[footer['record']][0]
+        self.fields = tuple(footer['fields'])
+        self.__types = dict(zip(self.fields, footer['types']))
+        self.__row_groups = footer['row_groups']
+        self.rows = sum(group['rows'] for group in self.__row_groups)
+        self.row_groups = len(self.__row_groups)
+        self.__dictionaries = {}
+
+        self.__file = open(path, 'rb')
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def read_columns(self, columns = None, pairs = None, start = None, end = None):
+        """
+        :type columns:  list
+        :param columns: fields to read (default all)
+
+        :type pairs:  list
+        :param pairs: asset pairs to read (default all, ignored for files without pair field)
+
+        :type start:  float
+        :param start: minimum time (inclusive)
+
+        :type end:  float
+        :param end: maximum time (exclusive)
+
+        :return dict with field names as keys. Numeric fields are array('d'), strings are lists
+
+        """
+
+        columns = list(columns or self.fields)
+        result = dict((field, array('d') if self.__types[field] != 's' else []) for field in columns)
+        for group, mask in self.__scan(pairs, start, end):
+            for field in columns:
+                values = self.__decode(group, field)
+                if mask is not None:
+                    values = [value for value, keep in zip(values, mask) if keep]
+                result[field].extend(values)
+        return result
+
+    def records(self, pairs = None, start = None, end = None):
+        """
+        :return generator over the matching rows as Records.Candle, Records.Trade or Records.Ledger_Entry
+        """
+
+        record_class = self.__record_class
+        converters = [self.__converter(self.__types[field]) for field in self.fields]
+        for group, mask in self.__scan(pairs, start, end):
+            columns = [self.__decode(group, field) for field in self.fields]
+            for index, row in enumerate(zip(*columns)):
+                if mask is None or mask[index]:
+                    yield record_class(*[convert(value) for convert, value in zip(converters, row)])
+
+    def close(self):
+        self.__map.close()
+        self.__file.close()
+
+    def __scan(self, pairs, start, end):
+        """Yields (row group, row mask or None if all rows match) of the row groups that may match"""
+
+        has_pair = 'pair' in self.fields
+        pairs = set(pairs) if pairs and has_pair else None
+        for group in self.__row_groups:
+            if pairs is not None and not pairs.intersection(group['pairs']):
+                continue
+            if start is not None and group['max_time'] < start:
+                continue
+            if end is not None and group['min_time'] >= end:
+                continue
+
+            if (pairs is None or pairs.issuperset(group['pairs'])) and \
+               (start is None or group['min_time'] >= start) and (end is None or group['max_time'] < end):
+                yield (group, None)
+                continue
+
+            mask = [True] * group['rows']
+            if pairs is not None:
+                mask = [keep and pair in pairs for keep, pair in zip(mask, self.__decode(group, 'pair'))]
+            if start is not None or end is not None:
+                lower = start if start is not None else float('-inf')
+                upper = end if end is not None else float('inf')
+                mask = [keep and lower <= t < upper for keep, t in zip(mask, self.__decode(group, 'time'))]
+            yield (group, mask)
+
+    def __decode(self, group, field):
+        column = group['columns'][self.fields.index(field)]
+        offset, length, typecode = column[:3]
+        values = array(typecode)
+        values.fromstring(zlib.decompress(self.__map[offset:offset + length]))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        if self.__types[field] == 's':
+            dictionary = self.__dictionary(column[3], column[4])
+            return [dictionary[code] for code in values]
+        return values
+
+    def __dictionary(self, offset, length):
+        # Scans decode the pair column again for the result, keep the dictionaries of the last row group
+        dictionary = self.__dictionaries.get(offset)
+        if dictionary is None:
+            if len(self.__dictionaries) >= 16:
+                self.__dictionaries.clear()
+            dictionary = json.loads(zlib.decompress(self.__map[offset:offset + length]))
+            self.__dictionaries[offset] = dictionary
+        return dictionary
+
+    def __converter(self, column_type):
+        if column_type == 'i':
+            return lambda value: int(value) if value == value else None
+        if column_type == 'd':
+            return lambda value: value if value == value else None
+        return lambda value: value
+
+
+def _read_footer(path):
+    """
+    :return tuple with (footer dict, offset of the footer, True if the row groups were recovered)
+
+    :ValueError - If the file is no columnar file
+    """
+
+    with open(path, 'rb') as f:
+        if f.read(len(_magic)) != _magic:
+            raise ValueError(path + " is no columnar file")
+        header_length = _header.unpack(f.read(_header.size))[0]
+        header = json.loads(f.read(header_length))
+        data_start = f.tell()
+
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size >= data_start + len(_magic) + _tail.size:
+            f.seek(size - len(_magic) - _tail.size)
+            length = _tail.unpack(f.read(_tail.size))[0]
+            if f.read(len(_magic)) == _magic and length <= size - data_start - len(_magic) - _tail.size:
+                footer_start = size - len(_magic) - _tail.size - length
+                f.seek(footer_start)
+                try:
+                    return (json.loads(f.read(length)), footer_start, False)
+                except ValueError:
+                    pass
+
+        header['row_groups'], data_end = _recover_row_groups(f, data_start, size)
+        return (header, data_end, True)
+
+
+def _recover_row_groups(f, offset, size):
+    """
+    Reads the row group metas from the start of the file, up to the first incomplete row group.
+
+    :return tuple with (list with the metas, end of the last complete row group)
+    """
+
+    row_groups = []
+    while offset + _group_header.size <= size:
+        f.seek(offset)
+        magic, meta_length = _group_header.unpack(f.read(_group_header.size))
+        if magic != _group_magic:
+            break
+        try:
+            meta = json.loads(f.read(meta_length))
+        except ValueError:
+            break
+
+        start = offset + _group_header.size + meta_length
+        end = start + meta['length']
+        if end > size:
+            break
+        f.seek(start)
+        if zlib.crc32(f.read(meta['length'])) & 0xffffffff != meta['crc']:
+            break
+
+        row_groups.append(_absolute(meta, start))
+        offset = end
+    return (row_groups, offset)
+
+
+def _absolute(meta, start):
+    """
+    :return copy of a row group meta with the block offsets relative to the file start
+
+    :type start:  int
+    :param start: offset of the first block of the row group
+    """
+
+    columns = []
+    for column in meta['columns']:
+        column = list(column)
+        column[0] += start
+        if len(column) > 3:
+            column[3] += start
+        columns.append(column)
+    return dict(meta, columns = columns)
@@ -23,7 +23,6 @@
 import hashlib
 import os, random, struct
 import json
-from Crypto.Cipher import AES
 
 class Credential_Mgr(object):
     """
@@ -34,6 +33,7 @@ class Credential_Mgr(object):
                             So they don't have to lie in plain text on your pc
                             (DON'T FORGET THE PASSWORD)
     load_credentials()   -- decrypts the credentials from a tbk file
+    load_from_agent()    -- takes over credentials unlocked by a running KeyAgent.Key_Agent
     unload_credentials() -- removes credentials from credential manager
     get_credentials()    -- return credentials
 
@@ -64,6 +64,31 @@ class Credential_Mgr(object):
                 return False
 
 
+    def load_from_agent(self, name, socket_path = None):
+        """
+        Takes over already unlocked credentials from a key agent (see KeyAgent.py),
+        so short lived processes neither need the password nor PyCrypto.
+
+        :type name: str
+        :param name: name the credentials were added to the agent with
+
+        :type socket_path: str
+        :param socket_path: socket of the agent. Default is $KRAPI_AGENT_SOCK
+
+        :return: bool -- True if the agent handed out the credentials, False else
+        """
+        if self.__api_key is None and self.__private_key is None:
+            import KeyAgent
+            try:
+                credentials = KeyAgent.request_credentials(name, socket_path)
+            except Exception:
+                return False
+            if credentials is None:
+                return False
+            self.__api_key, self.__private_key = credentials
+            return True
+        return False
+
     def unload_credentials(self):
         """
         removes credentials from credential manager
@@ -137,6 +162,9 @@ class Credential_Mgr(object):
         else:
             out_file = '.'.join([s for s in out_split[:len(out_split)-1]]) + ".tbk"
 
+        # Imported on first use, PyCrypto is the slowest import of the package
+        from Crypto.Cipher import AES
+
         iv = ''.join(chr(random.randint(0, 0xFF)) for i in range(16))
         key = hashlib.sha256(pwd).digest()
         encryptor = AES.new(key, AES.MODE_CBC, iv)
@@ -175,34 +203,24 @@ class Credential_Mgr(object):
         """
 
 
-        out_file = in_file + '.dec'
+        from Crypto.Cipher import AES
 
+        # Decrypted in memory, the keys never touch the disk in plain text
         with open(in_file, 'rb') as infile:
             origsize = struct.unpack('<Q', infile.read(struct.calcsize('Q')))[0]
             iv = infile.read(16)
             key = hashlib.sha256(pwd).digest()
             decryptor = AES.new(key, AES.MODE_CBC, iv)
+            json_data = decryptor.decrypt(infile.read())[:origsize]
 
-            with open(out_file, 'wb') as outfile:
-                while True:
-                    chunk = infile.read(self._chunksize)
-                    if len(chunk) == 0:
-                        break
-                    outfile.write(decryptor.decrypt(chunk))
+        json_python = json.loads(json_data)
 
-                outfile.truncate(origsize)
+        try:
+            api_key = json_python['api_key']
+            private_key = json_python['private_key']
+            res = (api_key, private_key)
 
-        with open(out_file, 'r') as key_file:
-            json_data = key_file.read()
-            json_python = json.loads(json_data)
-
-            try:
-                api_key = json_python['api_key']
-                private_key = json_python['private_key']
-                res = (api_key, private_key)
-
-            except KeyError:
-                raise Exception('kraken key file has invalid json format')
+        except KeyError:
+            raise Exception('kraken key file has invalid json format')
 
-        os.remove(out_file)
         return res
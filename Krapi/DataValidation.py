@@ -0,0 +1,322 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+from Records import Trade, Ledger_Entry, Candle
+
+class Issue(object):
+    """
+    A problem found in a list of records.
+
+    kind:   'duplicate' - same key and same values as an earlier record
+            'conflict'  - same key as an earlier record but other values
+            'repeat'    - public trade with the same values as an earlier one. Public trades
+                          have no id, so it is kept: the same volume can trade twice at the
+                          same price and time
+            'order'     - time before the time of an earlier record (of the same pair or asset)
+            'gap'       - time distance to the previous record (of the same pair) larger than expected
+            'balance'   - ledger balance doesn't follow from the previous balance, amount and fee
+    index:  index of the record in the validated list
+    key:    key of the record (id, txid or (pair, time), None for public trades)
+    detail: description of the issue
+    """
+
+    __slots__ = ('kind', 'index', 'key', 'detail')
+
+    def __init__(self, kind, index, key, detail = ''):
+        self.kind = kind
+        self.index = index
+        self.key = key
+        self.detail = detail
+
+    def __repr__(self):
+        return 'Issue(' + self.kind + ', ' + str(self.index) + ', ' + repr(self.key) + ', ' + repr(self.detail) + ')'
+
+
+class Validation_Report(object):
+    """
+    Result of a validation.
+
+    public variables:
+    records: the validated records, repaired if repair was requested
+    issues:  list of Issue in the order they were found
+    counts:  dict kind -> number of issues
+
+    public methods:
+    is_valid() - True if no issues were found
+    summary()  - issue counts as one line
+    """
+
+    def __init__(self, records, issues):
+        self.records = records
+        self.issues = issues
+        self.counts = {}
+        for issue in issues:
+            self.counts[issue.kind] = self.counts.get(issue.kind, 0) + 1
+
+    def is_valid(self):
+        return not self.issues
+
+    def summary(self):
+        if not self.issues:
+            return 'no issues'
+        return ', '.join(str(count) + ' ' + kind for kind, count in sorted(self.counts.iteritems()))
+
+
+def record_key(record):
+    """
+    :return key that identifies a record: ledger id, txid (trades of the account),
+            (pair, time) for candles and None for public trades, which have no id
+    """
+
+    if isinstance(record, Ledger_Entry):
+        return record.ledger_id
+    if isinstance(record, Candle):
+        return (record.pair, record.time)
+    if isinstance(record, Trade) and record.txid is not None:
+        return record.txid
+    return None
+
+
+def _deduplicate(records, issues):
+    """
+    One pass with a dict of first indexes. For conflicts the last record wins
+    (e.g. the uncommitted candle that was returned again with new values).
+    Records without key are always kept, identical ones are reported as repeats.
+
+    :return list of the indexes to keep, in input order
+    """
+
+    first = {}
+    repeated = {}
+    keep = []
+    for index, record in enumerate(records):
+        key = record_key(record)
+        if key is None:
+            values = record.to_tuple()
+            if values in repeated:
+                issues.append(Issue('repeat', index, None, 'same values as row ' + str(repeated[values])))
+            else:
+                repeated[values] = index
+            keep.append(index)
+            continue
+
+        position = first.get(key)
+        if position is None:
+            first[key] = len(keep)
+            keep.append(index)
+        elif records[keep[position]] == record:
+            issues.append(Issue('duplicate', index, key))
+        else:
+            issues.append(Issue('conflict', index, key, 'replaces row ' + str(keep[position])))
+            keep[position] = index
+    return keep
+
+
+def _check_order(records, indexes, group, issues):
+    """Flags records older than an earlier record of the same group, one pass"""
+
+    latest = {}
+    for index in indexes:
+        record = records[index]
+        name = getattr(record, group)
+        if record.time < latest.get(name, record.time):
+            issues.append(Issue('order', index, record_key(record),
+                                str(record.time) + ' after ' + str(latest[name])))
+        else:
+            latest[name] = record.time
+
+
+def _repair(records, indexes, issues):
+    """:return records of indexes ordered by time (stable, linear for the sorted runs of pages)"""
+
+    repaired = [records[index] for index in indexes]
+    if any(issue.kind == 'order' for issue in issues):
+        repaired.sort(key = lambda record: record.time)
+    return repaired
+
+
+def validate_candles(candles, interval, repair = False, fill_gaps = False):
+    """
+    :type candles:  list
+    :param candles: Records.Candle of one interval, of one or more pairs
+
+    :type interval:  int
+    :param interval: candle interval in seconds
+
+    :type repair:  bool
+    :param repair: drop duplicates (the last of conflicting candles wins) and order by time
+
+    :type fill_gaps:  bool
+    :param fill_gaps: with repair, fill gaps with candles without trades at the previous close
+
+    :return Validation_Report
+    """
+
+    candles = list(candles)
+    issues = []
+    keep = _deduplicate(candles, issues)
+    _check_order(candles, keep, 'pair', issues)
+
+    ordered = sorted(keep, key = lambda index: candles[index].time)
+    previous = {}
+    for index in ordered:
+        candle = candles[index]
+        last = previous.get(candle.pair)
+        if last is not None and candle.time - last.time > interval:
+            issues.append(Issue('gap', index, record_key(candle),
+                                str((candle.time - last.time) // interval - 1) + ' candles missing after ' + str(last.time)))
+        previous[candle.pair] = candle
+
+    if not repair:
+        return Validation_Report(candles, issues)
+
+    repaired = [candles[index] for index in ordered]
+    if fill_gaps and any(issue.kind == 'gap' for issue in issues):
+        filled = []
+        previous = {}
+        for candle in repaired:
+            last = previous.get(candle.pair)
+            if last is not None:
+                for gap_time in xrange(last.time + interval, candle.time, interval):
+                    filled.append(Candle(last.pair, gap_time, last.close, last.close, last.close, last.close,
+                                         last.close, 0.0, 0))
+            filled.append(candle)
+            previous[candle.pair] = candle
+        # Fills of one pair are behind candles of other pairs, the runs are merged by the stable sort
+        filled.sort(key = lambda candle: candle.time)
+        repaired = filled
+    return Validation_Report(repaired, issues)
+
+
+def validate_trades(trades, repair = False, max_gap = None):
+    """
+    :type trades:  list
+    :param trades: Records.Trade, public or of the account, of one or more pairs
+
+    :type repair:  bool
+    :param repair: drop duplicates and order by time. Repeats of public trades are kept.
+
+    :type max_gap:  float
+    :param max_gap: report gaps of more than max_gap seconds between trades of a pair (optional)
+
+    :return Validation_Report
+    """
+
+    trades = list(trades)
+    issues = []
+    keep = _deduplicate(trades, issues)
+    _check_order(trades, keep, 'pair', issues)
+
+    if max_gap is not None:
+        previous = {}
+        for index in sorted(keep, key = lambda index: trades[index].time):
+            trade = trades[index]
+            last = previous.get(trade.pair)
+            if last is not None and trade.time - last > max_gap:
+                issues.append(Issue('gap', index, record_key(trade), str(trade.time - last) + ' seconds without trades'))
+            previous[trade.pair] = trade.time
+
+    return Validation_Report(_repair(trades, keep, issues) if repair else trades, issues)
+
+
+def validate_ledger(entries, repair = False, tolerance = 1e-8):
+    """
+    Besides duplicates and order, checks that every balance follows from the previous
+    balance of the asset: balance = previous balance + amount - fee. A mismatch usually
+    means missing entries between the two.
+
+    :type entries:  list
+    :param entries: Records.Ledger_Entry
+
+    :type repair:  bool
+    :param repair: drop duplicates and order by time. Balances are never changed.
+
+    :type tolerance:  float
+    :param tolerance: allowed difference relative to the balance (at least absolute)
+
+    :return Validation_Report
+    """
+
+    entries = list(entries)
+    issues = []
+    keep = _deduplicate(entries, issues)
+    _check_order(entries, keep, 'asset', issues)
+
+    balances = {}
+    for index in sorted(keep, key = lambda index: entries[index].time):
+        entry = entries[index]
+        balance = balances.get(entry.asset)
+        if balance is not None:
+            expected = balance + entry.amount - entry.fee
+            if abs(expected - entry.balance) > tolerance * max(1.0, abs(entry.balance)):
+                issues.append(Issue('balance', index, entry.ledger_id, 'expected ' + repr(expected) + ', got ' +
+                                    repr(entry.balance) + ' (' + entry.asset + ')'))
+        balances[entry.asset] = entry.balance
+
+    return Validation_Report(_repair(entries, keep, issues) if repair else entries, issues)
+
+
+class Stream_Validator(object):
+    """
+    Validates records page by page before they are stored, e.g. in KrapiCli.Exporter.
+
+    Drops records whose key was seen in this or an earlier page and orders every
+    page by time. Keys of all pages are kept in a set, so a stream is checked in
+    linear time. Order between pages is not checked, account exports page from
+    the newest entries back. Public trades have no key and are never dropped,
+    their pages follow the since cursor of the api, which doesn't repeat trades.
+
+    public methods:
+    add() - validates a page, returns the records to store and the issues
+    """
+
+    def __init__(self):
+        self.__seen = set()
+        self.issues = 0
+
+    def add(self, records):
+        """
+        :return tuple (records, list of Issue), issue indexes refer to the page
+        """
+
+        issues = []
+        seen = self.__seen
+        kept = []
+        last_time = None
+        ordered = True
+        for index, record in enumerate(records):
+            key = record_key(record)
+            if key is not None:
+                if key in seen:
+                    issues.append(Issue('duplicate', index, key))
+                    continue
+                seen.add(key)
+            if last_time is not None and record.time < last_time:
+                ordered = False
+            last_time = record.time
+            kept.append(record)
+
+        if not ordered:
+            issues.append(Issue('order', None, None, 'page reordered by time'))
+            kept.sort(key = lambda record: record.time)
+        self.issues += len(issues)
+        return (kept, issues)
@@ -0,0 +1,164 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+from array import array
+from bisect import bisect_right
+
+class Fee_Engine(object):
+    """
+    Computes trading fees from the fee tier schedules of AssetPairs.
+
+    The taker (fees) and maker (fees_maker) schedules of every pair are cached as
+    arrays of tier volumes and fees, so the fee of a trade is a binary search and
+    fees for whole arrays of trades are computed in one pass without api calls.
+    The 30 day volume of the account only has to be taken over from TradeVolume
+    once in a while with set_volume() or update_from_trade_volume().
+
+    public methods:
+    set_volume()               - sets the 30 day volume of the account
+    update_from_trade_volume() - takes over volume and currency of a Request_Trade_Volume
+    get_fee_rate()             - fee in percent of a pair for a volume
+    compute_fees()             - fees of many trades
+    next_tier()                - volume and fee of the next tier
+
+    public variables:
+    volume:   30 day volume of the account in the fee volume currency
+    currency: fee volume currency of the account
+
+    """
+
+    def __init__(self, asset_pairs, volume = 0.0):
+        """
+        :type asset_pairs:  dict
+        :param asset_pairs: Request_Tradable_Asset_Pairs.asset_pairs_dict ('info' or 'fees')
+
+        :type volume:  float
+        :param volume: 30 day volume of the account in the fee volume currency
+
+        """
+
+        self.volume = float(volume)
+        self.currency = None
+        self.__schedules = {}
+        for pair, info in asset_pairs.iteritems():
+            taker = info.get('fees') or [[0, 0]]
+            maker = info.get('fees_maker') or taker
+            self.__schedules[pair] = (self.__to_arrays(taker), self.__to_arrays(maker))
+
+    def set_volume(self, volume):
+        self.volume = float(volume)
+
+    def update_from_trade_volume(self, request):
+        """
+        :type request:  PrivateApiRequests.Request_Trade_Volume
+        :param request: successfully sent TradeVolume request
+        """
+
+        self.volume = float(request.volume)
+        self.currency = request.currency
+
+    def get_fee_rate(self, pair, maker = False, volume = None):
+        """
+        :type volume:  float
+        :param volume: 30 day volume (defaults to the volume of the account)
+
+        :return fee in percent
+
+        :KeyError - If the pair is unknown
+        """
+
+        volumes, fees = self.__schedules[pair][1 if maker else 0]
+        index = bisect_right(volumes, self.volume if volume is None else volume) - 1
+        return fees[max(index, 0)]
+
+    def compute_fees(self, pairs, prices, volumes, makers = False, volume_rate = None, volume = None):
+        """
+        Computes the fees of many historical or hypothetical trades in the quote currency.
+
+        :type pairs:  str or list
+        :param pairs: asset pair of all trades or one pair per trade
+
+        :type prices:  list
+        :param prices: price per trade (list or array('d'))
+
+        :type volumes:  list
+        :param volumes: volume per trade in the base currency (list or array('d'))
+
+        :type makers:  bool or list
+        :param makers: whether all trades or each trade was a maker trade
+
+        :type volume_rate:  float
+        :param volume_rate: value of one unit of the quote currency in the fee volume currency
+                            (e.g. from Valuation.Portfolio_Valuator.get_rate()). If set the cost
+                            of every trade is added to the 30 day volume before the next trade,
+                            so trades that cross a tier get the fee of the new tier.
+
+        :type volume:  float
+        :param volume: 30 day volume before the first trade (defaults to the volume of the account)
+
+        :return array('d') with the fee per trade
+
+        """
+
+        count = len(prices)
+        pair_list = [pairs] * count if isinstance(pairs, basestring) else pairs
+        maker_list = [makers] * count if isinstance(makers, bool) else makers
+        current = self.volume if volume is None else volume
+
+        fees = array('d')
+        rates = {}
+        for i in xrange(count):
+            cost = prices[i] * volumes[i]
+            schedule = (pair_list[i], maker_list[i])
+            cached = rates.get(schedule)
+            if cached is None or current >= cached[1]:
+                cached = self.__rate_and_limit(schedule[0], schedule[1], current)
+                rates[schedule] = cached
+            fees.append(cost * cached[0] / 100.0)
+            if volume_rate:
+                current += cost * volume_rate
+        return fees
+
+    def next_tier(self, pair, maker = False, volume = None):
+        """
+        :return tuple (tier volume, fee in percent, remaining volume) of the next tier,
+                None if the volume is already in the lowest fee tier
+        """
+
+        current = self.volume if volume is None else volume
+        volumes, fees = self.__schedules[pair][1 if maker else 0]
+        index = bisect_right(volumes, current)
+        if index >= len(volumes):
+            return None
+        return (volumes[index], fees[index], volumes[index] - current)
+
+    def __rate_and_limit(self, pair, maker, volume):
+        """:return tuple (fee in percent, volume at which the fee changes)"""
+
+        volumes, fees = self.__schedules[pair][1 if maker else 0]
+        index = bisect_right(volumes, volume)
+        limit = volumes[index] if index < len(volumes) else float('inf')
+        return (fees[max(index - 1, 0)], limit)
+
+    def __to_arrays(self, schedule):
+        schedule = sorted(schedule, key = lambda tier: float(tier[0]))
+        return (array('d', [float(tier[0]) for tier in schedule]), array('d', [float(tier[1]) for tier in schedule]))
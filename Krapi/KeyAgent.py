@@ -0,0 +1,273 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import SocketServer
+import socket
+import struct
+import json
+import os
+import stat
+import errno
+import sys
+import tempfile
+from threading import Thread, Lock
+
+_SO_PEERCRED = getattr(socket, 'SO_PEERCRED', 17)
+
+def default_socket_path():
+    """
+    :return $KRAPI_AGENT_SOCK or a socket in a private directory of the user in the temp directory
+    """
+
+    if os.environ.get('KRAPI_AGENT_SOCK'):
+        return os.environ['KRAPI_AGENT_SOCK']
+    return os.path.join(tempfile.gettempdir(), 'krapi-agent-' + str(os.getuid()), 'agent.sock')
+
+
+def request_credentials(name, socket_path = None, timeout = 5.0):
+    """
+    Asks a running Key_Agent for unlocked credentials.
+
+    :type name: str
+    :param name: name the credentials were added with
+
+    :type socket_path: str
+    :param socket_path: socket of the agent (default see default_socket_path())
+
+    :return tuple with (api_key, private_key) or None if the agent doesn't know the name
+            or refused the request
+
+    :socket.error - If no agent is listening on the socket
+    """
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(json.dumps({'name':name}) + '\n')
+        reply = sock.makefile('r').readline()
+    finally:
+        sock.close()
+
+    reply = json.loads(reply) if reply else {}
+    if 'api_key' not in reply:
+        return None
+    return (reply['api_key'], reply['private_key'])
+
+
+class Key_Agent(object):
+    """
+    Keeps unlocked credentials in memory and hands them to processes of the same user
+    over a unix socket, like ssh-agent. Child processes and cron jobs load their keys with
+    Credential_Mgr.load_from_agent() instead of decrypting tbk files on every start.
+
+    The socket is created in a directory only the user can access (mode 0700, owned by
+    the user, otherwise the agent refuses to start) and every connection is checked to
+    come from the same user (SO_PEERCRED, Linux only). A socket left behind by an agent
+    that died is replaced, the agent refuses to start if another agent answers on it.
+
+    public methods:
+    add()        - adds the credentials of a loaded Credential_Mgr under a name
+    remove()     - removes credentials
+    start()      - serves in a daemon thread
+    serve()      - serves until stop() is called
+    stop()       - stops serving and removes the socket
+
+    """
+
+    def __init__(self, socket_path = None):
+        """
+        :type socket_path: str
+        :param socket_path: path of the socket (default see default_socket_path())
+
+        :Exception - If the socket directory is not private, an agent is already running
+                     on the socket or something else is at the socket path
+        """
+
+        self.socket_path = socket_path or default_socket_path()
+        self.__credentials = {}
+        self.__lock = Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        if not os.path.lexists(directory):
+            os.makedirs(directory, 0700)
+        _check_private_directory(directory)
+        _remove_stale_socket(self.socket_path)
+
+        old_umask = os.umask(0077)
+        try:
+            self.__server = _Threaded_Unix_Server(self.socket_path, _Key_Agent_Handler)
+        finally:
+            os.umask(old_umask)
+        self.__server.agent = self
+        self.__thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def add(self, name, cred_mgr):
+        """
+        :type cred_mgr: CredentialMgr.Credential_Mgr
+        :param cred_mgr: credential manager with loaded credentials
+
+        :ValueError - If cred_mgr has no credentials loaded
+        """
+
+        credentials = cred_mgr.get_credentials()
+        if credentials is None:
+            raise ValueError("No credentials loaded for " + name)
+        with self.__lock:
+            self.__credentials[name] = credentials
+
+    def remove(self, name):
+        with self.__lock:
+            self.__credentials.pop(name, None)
+
+    def start(self):
+        self.__thread = Thread(target = self.serve)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def serve(self):
+        self.__server.serve_forever()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        with self.__lock:
+            self.__credentials = {}
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def _get(self, name):
+        with self.__lock:
+            return self.__credentials.get(name)
+
+
+def _check_private_directory(directory):
+    """
+    :Exception - If directory is no directory of the user with mode 0700
+    """
+
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise Exception("Socket directory " + directory + " is no directory")
+    if info.st_uid != os.getuid():
+        raise Exception("Socket directory " + directory + " belongs to another user")
+    if stat.S_IMODE(info.st_mode) != 0700:
+        raise Exception("Socket directory " + directory + " has mode " + oct(stat.S_IMODE(info.st_mode)) +
+                        ", 0700 is required")
+
+
+def _remove_stale_socket(socket_path):
+    """
+    Removes the socket of an agent that is not running anymore.
+
+    :Exception - If an agent answers on the socket or the path is no socket
+    """
+
+    try:
+        info = os.lstat(socket_path)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            return
+        raise
+    if not stat.S_ISSOCK(info.st_mode):
+        raise Exception(socket_path + " exists and is no socket")
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(1.0)
+    try:
+        sock.connect(socket_path)
+    except socket.error as e:
+        if e.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            raise
+    else:
+        raise Exception("An agent is already running on " + socket_path)
+    finally:
+        sock.close()
+    os.remove(socket_path)
+
+
+class _Threaded_Unix_Server(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Key_Agent_Handler(SocketServer.StreamRequestHandler):
+    """Answers one {"name": ...} line with the credentials or an error"""
+
+    def handle(self):
+        if sys.platform.startswith('linux'):
+            pid, uid, gid = struct.unpack('3i', self.request.getsockopt(socket.SOL_SOCKET, _SO_PEERCRED, struct.calcsize('3i')))
+            if uid != os.getuid():
+                self.wfile.write(json.dumps({'error':'Permission denied'}) + '\n')
+                return
+
+        try:
+            name = json.loads(self.rfile.readline())['name']
+        except (ValueError, KeyError, TypeError):
+            self.wfile.write(json.dumps({'error':'Invalid request'}) + '\n')
+            return
+
+        credentials = self.server.agent._get(name)
+        if credentials is None:
+            self.wfile.write(json.dumps({'error':'Unknown credentials ' + name}) + '\n')
+        else:
+            self.wfile.write(json.dumps({'api_key':credentials[0], 'private_key':credentials[1]}) + '\n')
+
+
+def main(argv=None):
+    import argparse
+    import getpass
+    from CredentialMgr import Credential_Mgr
+
+    parser = argparse.ArgumentParser(description='Keeps unlocked kraken api keys in memory for other krapi processes')
+    parser.add_argument('tbk_files', nargs='+', help='tbk files to unlock, the file name without extension is the key name')
+    parser.add_argument('--socket', default=None, help='socket path (default $KRAPI_AGENT_SOCK or a private temp directory)')
+    args = parser.parse_args(argv)
+
+    try:
+        agent = Key_Agent(args.socket)
+    except Exception as e:
+        print >> sys.stderr, e
+        return 1
+    for tbk_file in args.tbk_files:
+        name = os.path.splitext(os.path.basename(tbk_file))[0]
+        cred_mgr = Credential_Mgr()
+        if not cred_mgr.load_credentials(tbk_file=tbk_file, pwd=getpass.getpass('Password for ' + name + ': ')):
+            print >> sys.stderr, 'Loading keys of ' + name + ' failed'
+            continue
+        agent.add(name, cred_mgr)
+
+    print 'KRAPI_AGENT_SOCK=' + agent.socket_path + '; export KRAPI_AGENT_SOCK;'
+    sys.stdout.flush()
+    try:
+        agent.serve()
+    except KeyboardInterrupt:
+        agent.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
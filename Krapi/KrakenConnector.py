@@ -20,15 +20,58 @@
 #OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #SOFTWARE.
 
-import httplib
-import urllib
 import hashlib
 import base64
 import hmac
 import json
 import time
+from threading import Lock
 from CredentialMgr import Credential_Mgr
-from Request import Request
+from Request import Request, Lazy_Response
+from Transport import Http_Transport
+
+class Nonce_Source(object):
+    """
+    Increasing nonces of one api key, shared by all connectors of the process.
+
+    The api rejects a nonce that arrives after a higher one, so private requests of
+    a key are sent one at a time: lock is held from taking the nonce until the
+    response was received. Connectors of Request_Mgr, Order_Submitter and others
+    using the same key get the same source from for_key().
+
+    public methods:
+    for_key()    - returns the source of an api key
+    next_nonce() - returns the next nonce, must hold lock
+    """
+
+    __sources = {}
+    __sources_lock = Lock()
+
+    def __init__(self):
+        self.lock = Lock()
+        self.__last_nonce = 0
+
+    @classmethod
+    def for_key(cls, api_key):
+        with cls.__sources_lock:
+            source = cls.__sources.get(api_key)
+            if source is None:
+                source = cls()
+                cls.__sources[api_key] = source
+            return source
+
+    def next_nonce(self, clock):
+        """
+        :type clock:  callable
+        :param clock: returns the unix time, e.g. ClockSync.Clock_Sync.time
+
+        :return nonce as str
+        """
+
+        # Two requests within the same millisecond (or after the clock went back) still need increasing nonces
+        self.__last_nonce = max(int(1000*clock()), self.__last_nonce + 1)
+        return str(self.__last_nonce)
+
 
 class Kraken_Connector(object):
     """
@@ -38,24 +81,47 @@ class Kraken_Connector(object):
 
     public methods:
     query_request() - send a new request to api.kraken.com
+    set_clock()     - sets the clock for nonces
 
     """
 
-    def __init__(self):
-        self.__url = 'https://api.kraken.com'
+    def __init__(self, url = 'https://api.kraken.com', transport = None, clock = None):
+        """
+        :type url:  str
+        :param url: base url of the api. Defaults to api.kraken.com, 
+                    use http://host:port to talk to a local stand-in server
+                    (see MockKrakenServer.py)
+
+        :type transport:  Transport.Http_Transport
+        :param transport: transport used to send requests (optional). Defaults to a
+                          Transport.Http_Transport for url. Use Transport.Record_Transport
+                          or Transport.Replay_Transport to record or replay requests.
+
+        :type clock:  callable
+        :param clock: returns the unix time for nonces (optional). Defaults to time.time,
+                      use ClockSync.Clock_Sync.time for server time.
+
+        :ValueError - If the url scheme is neither http nor https
+
+        """
+
         self.__api_version = '0'
         self.__https_headers = { 'User-Agent': 'krapi/0.1.0 (+https://github.com/cavus700/KrankenApi---Krapi)' }
-        self.__https_connection = httplib.HTTPSConnection('api.kraken.com', timeout = 20)
-        self.__https_connection.connect()
+        self.__transport = transport if transport else Http_Transport(url)
+        self.__signer = None
+        self.__clock = clock if clock else time.time
             
     def __del__(self):
-        self.__https_connection.close()
+        self.__transport.close()
 
     def __enter__(self):
-        self.__init__()
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.__del__()
+        self.__transport.close()
+
+    def set_clock(self, clock):
+        self.__clock = clock if clock else time.time
 
     def query_request(self, request, cred_mgr = None ):
         """
@@ -68,7 +134,7 @@ class Kraken_Connector(object):
         :type cred_mgr:  CredentialMgr.CredentialMgr
         :param cred_mgr: CredentialMgr with loaded keys for private requests
 
-        :return response as json
+        :return response as json (as Request.Lazy_Response if request.lazy_result is set)
 
         :Exception - If cred_mgr not set for private request or request type is unknown
 
@@ -77,70 +143,85 @@ class Kraken_Connector(object):
         url_suff = '/' + self.__api_version + '/' + request.get_type() + '/' + request.get_method()
 
         if request.get_type() == 'public':
-            return self.__send_request(url_suff, request.get_dict_data())
+            return self.__send_request(url_suff, request.get_post_data(), lazy = request.lazy_result,
+                                       resend = request.read_only)
 
         elif request.get_type() == 'private':
             if not cred_mgr:
                 raise Exception("Credential manager neccessary for private requests")
 
-            headers, body = self.__compute_headers_and_nonce(url_suff, request.get_dict_data(), cred_mgr)
-            return self.__send_request(url_suff, body, headers)
+            if not cred_mgr.get_credentials():
+                raise Exception("No credentials set for private request")
+
+            nonces = Nonce_Source.for_key(cred_mgr.get_credentials()[0])
+            with nonces.lock:
+                headers, body = self.__compute_headers_and_nonce(url_suff, request.get_post_data(), cred_mgr,
+                                                                 nonces.next_nonce(self.__clock))
+                return self.__send_request(url_suff, body, headers, request.lazy_result)
         else:
             raise Exception("Unknown request type: " + request.get_type() + ". Only public and private supported")
 
 
-    def __send_request(self, url_suff, request = {}, headers = {}):
+    def __send_request(self, url_suff, body = '', headers = {}, lazy = False, resend = False):
         """
         Actually send the request
 
         :type url_suff:  str
         :param url_suff: url suffix for request
 
-        :type request:   dict
-        :param request:  dictionary with POST data
+        :type body:   str
+        :param body:  url encoded POST data
 
         :type headers:  dict
         :param header:  additional headers for request
 
+        :type lazy:  bool
+        :param lazy: return the undecoded response as Request.Lazy_Response
+
+        :type resend:  bool
+        :param resend: the transport may send the request again if the response is lost
+
         :return response as json
 
         """
 
-        url = self.__url + url_suff
-        body = urllib.urlencode(request)
-        headers.update(self.__https_headers)
-        self.__https_connection.request("POST", url, body, headers)
-        return json.loads(self.__https_connection.getresponse().read())
+        headers = dict(headers, **self.__https_headers)
+        response = self.__transport.send(url_suff, body, headers, resend)
+        return Lazy_Response(response) if lazy else json.loads(response)
 
-    def __compute_headers_and_nonce(self, url_suff, data, cred_mgr):
+    def __compute_headers_and_nonce(self, url_suff, data, cred_mgr, nonce):
         """
         Computes the signature and additional headers for private request
 
         :type url_suff:  str
         :param url_suff: url suffix for request
 
-        :type data:   dict
-        :param data:  dictionary with POST data
+        :type data:   str
+        :param data:  url encoded POST data without nonce
 
         :type cred_mgr:  CredentialMgr.CredentialMgr
         :param cred_mgr: credential manager with loaded keys 
 
-        :return  tuple with new header and POST data (header, data)
+        :type nonce:  str
+        :param nonce: nonce of the request (see Nonce_Source)
 
-        """
+        :return  tuple with new header and url encoded POST data (header, data)
 
-        if not cred_mgr.get_credentials():
-            raise Exception("No credentials set for private request")
+        """
 
         api_key, priv_key = cred_mgr.get_credentials()
-    
-        data['nonce'] = int(1000*time.time())
-        postdata = urllib.urlencode(data)
-        message = url_suff + hashlib.sha256(str(data['nonce']) + postdata).digest()
-        signature = hmac.new(base64.b64decode(priv_key), message, hashlib.sha512)
+
+        # Decoding the secret and the hmac key schedule are done once per key
+        if self.__signer is None or self.__signer[0] != priv_key:
+            self.__signer = (priv_key, hmac.new(base64.b64decode(priv_key), digestmod = hashlib.sha512))
+
+        postdata = 'nonce=' + nonce + ('&' + data if data else '')
+        message = url_suff + hashlib.sha256(nonce + postdata).digest()
+        signature = self.__signer[1].copy()
+        signature.update(message)
         headers = {
             'API-Key': api_key,
             'API-Sign': base64.b64encode(signature.digest())
         }
 
-        return (headers, data)
\ No newline at end of file
+        return (headers, postdata)
\ No newline at end of file
@@ -0,0 +1,464 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+"""
+Command line tool for bulk exports of market and account data.
+
+    python KrapiCli.py ohlc --pairs XXBTZEUR,XETHZEUR --interval 60 --output ohlc.csv
+    python KrapiCli.py trades --pairs XXBTZEUR --since 2017-09-01 --until 2017-09-02 --format jsonl --output trades.jsonl
+    python KrapiCli.py ledgers --key KrakenKey.tbk --output ledgers.csv
+    python KrapiCli.py trades-history --agent KrakenKey --output trades_history.csv
+
+Output formats are csv, jsonl and columnar (see ColumnarStore.py). Exports are
+streamed page by page. With --output the progress of every job is kept in
+<output>.state, an interrupted export continues where it stopped when the same
+command is run again. KrapiMain.py forwards its arguments here.
+"""
+
+import argparse
+import calendar
+import json
+import csv
+import sys
+import os
+import time
+from Queue import Queue, Empty
+from threading import Thread, Lock
+
+
+class Csv_Writer(object):
+    """Writes records as csv rows with a header line"""
+
+    def __init__(self, path, record_class, append):
+        self.__file = open(path, 'ab' if append else 'wb') if path else sys.stdout
+        self.__writer = csv.writer(self.__file)
+        if not append or self.__file.tell() == 0:
+            self.__writer.writerow(record_class.__slots__)
+
+    def write(self, records):
+        for record in records:
+            self.__writer.writerow(record.to_tuple())
+
+    def flush(self, force = False):
+        self.__file.flush()
+        if self.__file is not sys.stdout:
+            os.fsync(self.__file.fileno())
+        return True
+
+    def close(self):
+        if self.__file is not sys.stdout:
+            self.__file.close()
+
+
+class Jsonl_Writer(object):
+    """Writes records as one json object per line"""
+
+    def __init__(self, path, record_class, append):
+        self.__file = open(path, 'ab' if append else 'wb') if path else sys.stdout
+        self.__fields = record_class.__slots__
+
+    def write(self, records):
+        fields = self.__fields
+        for record in records:
+            self.__file.write(json.dumps(dict(zip(fields, record.to_tuple()))) + '\n')
+
+    def flush(self, force = False):
+        self.__file.flush()
+        if self.__file is not sys.stdout:
+            os.fsync(self.__file.fileno())
+        return True
+
+    def close(self):
+        if self.__file is not sys.stdout:
+            self.__file.close()
+
+
+def _columnar_writer(path, record_class, append):
+    from ColumnarStore import Columnar_Writer
+
+    if not path:
+        raise ValueError("The columnar format needs --output")
+    return Columnar_Writer(path, record_class, append)
+
+
+# Output formats: name -> writer taking (path, record class, append)
+formats = {
+    'csv':      Csv_Writer,
+    'jsonl':    Jsonl_Writer,
+    'columnar': _columnar_writer
+}
+
+
+class _Ohlc_Job(object):
+    """Committed candles of one pair. The api returns the last 720 candles of an interval at most"""
+
+    def __init__(self, pair, interval, since, until):
+        self.key = 'ohlc:' + pair + ':' + str(interval)
+        self.pair = pair
+        self.interval = interval
+        self.since = since
+        self.until = until
+
+    def page(self, cursor):
+        from PublicApiRequests import Request_OHLC_Data
+
+        request = Request_OHLC_Data()
+        request.asset_pair_list = [self.pair]
+        request.interval = self.interval
+        request.since = cursor if cursor is not None else (self.since - 1 if self.since else None)
+
+        def fetch(req_mgr):
+            if not req_mgr.send_request(request):
+                return None
+            # The last candle is not committed yet
+            candles = request.get_candles(self.pair).filter(lambda candle: candle.time < request.last_id)
+            if self.until:
+                candles = candles.filter(lambda candle: candle.time < self.until)
+            return (candles.to_list(), request.last_id, True)
+        return request, fetch
+
+
+class _Trades_Job(object):
+    """Public trades of one pair, paged with since"""
+
+    def __init__(self, pair, since, until):
+        self.key = 'trades:' + pair
+        self.pair = pair
+        self.since = since
+        self.until = until
+
+    def page(self, cursor):
+        from PublicApiRequests import Request_Recent_Trades
+
+        request = Request_Recent_Trades()
+        request.asset_pair_list = [self.pair]
+        request.since = cursor if cursor is not None else (str(int(self.since * 1000000000)) if self.since else None)
+
+        def fetch(req_mgr):
+            if not req_mgr.send_request(request):
+                return None
+            trades = request.get_trades(self.pair).to_list()
+            done = not trades or str(request.last_id) == str(request.since)
+            if self.until:
+                done = done or trades[-1].time >= self.until
+                trades = [trade for trade in trades if trade.time < self.until]
+            return (trades, str(request.last_id), done)
+        return request, fetch
+
+
+class _Account_Job(object):
+    """Ledgers or trade history, paged with an offset below a fixed end time"""
+
+    def __init__(self, name, since, until):
+        self.key = name
+        self.since = since
+        self.until = until
+
+    def page(self, cursor):
+        from PrivateApiRequests import Request_Ledger_Info, Request_Trade_History
+
+        # New entries would shift the offsets, so the end time is fixed with the first page
+        end, offset = cursor if cursor is not None else (self.until, 0)
+        if self.key == 'ledgers':
+            request = Request_Ledger_Info()
+        else:
+            request = Request_Trade_History()
+            request.type = 'all'
+        request.start = self.since - 1 if self.since else None
+        request.offset = offset
+
+        def fetch(req_mgr):
+            request.end = end or int(req_mgr.time())
+            if not req_mgr.send_request(request):
+                return None
+            if self.key == 'ledgers':
+                records, count = request.get_ledger_entries().to_list(), request.amount
+            else:
+                records, count = request.get_trades().to_list(), request.count
+            records.sort(key = lambda record: record.time)
+            next_offset = offset + len(records)
+            return (records, [request.end, next_offset], not records or next_offset >= int(count))
+        return request, fetch
+
+
+class _Rate_Limiter(object):
+    """Spaces calls of all workers by at least 1 / calls_per_second"""
+
+    def __init__(self, calls_per_second):
+        self.__spacing = 1.0 / calls_per_second
+        self.__next = 0.0
+        self.__lock = Lock()
+
+    def wait(self):
+        with self.__lock:
+            now = time.time()
+            wait = self.__next - now
+            self.__next = max(now, self.__next) + self.__spacing
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Exporter(object):
+    """
+    Runs export jobs with up to jobs worker threads and streams the records to one writer.
+
+    Public requests are spaced by the rate limiter, private requests additionally wait
+    for the call budget of the Request_Mgr. Every worker has its own Request_Mgr
+    (and connection), private jobs are run by one worker so they share one budget.
+    The cursor of a job is saved to the state file only once the writer has its pages
+    on disk. A writer's flush() returns False while it still buffers pages (the columnar
+    writer does until a row group is full), so a resumed export never skips a page.
+    With validate, duplicates are dropped and pages are ordered by time before they
+    are written (see DataValidation.Stream_Validator, duplicates are only detected
+    within one run).
+
+    public methods:
+    run() - runs all jobs, returns True if all jobs completed
+    """
+
+    def __init__(self, create_req_mgr, writer, state_file = None, jobs = 1, calls_per_second = 1.0, progress = sys.stderr,
+                 validate = False):
+        self.__create_req_mgr = create_req_mgr
+        self.__writer = writer
+        self.__state_file = state_file
+        self.__jobs = jobs
+        self.__limiter = _Rate_Limiter(calls_per_second)
+        self.__progress = progress
+        self.__lock = Lock()
+        self.__state = {}
+        self.__rows = {}
+        self.__last_progress = 0.0
+        self.__failed = []
+        self.__validate = validate
+        self.__issues = 0
+
+        if state_file and os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                self.__state = json.load(f)
+
+    def run(self, export_jobs):
+        queue = Queue()
+        for job in export_jobs:
+            if not self.__state.get(job.key, {}).get('done'):
+                queue.put(job)
+
+        def work():
+            req_mgr = self.__create_req_mgr()
+            while True:
+                try:
+                    job = queue.get_nowait()
+                except Empty:
+                    return
+                try:
+                    self.__run_job(req_mgr, job)
+                except Exception as e:
+                    with self.__lock:
+                        self.__failed.append(job.key)
+                    self.__report(job.key + ' failed: ' + str(e), force = True)
+
+        threads = [Thread(target = work) for i in xrange(max(1, min(self.__jobs, queue.qsize())))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+        if self.__writer.flush(True):
+            self.__save_state()
+
+        self.__report('done, ' + str(sum(self.__rows.values())) + ' rows written' +
+                      (', ' + str(self.__issues) + ' issues fixed' if self.__validate else ''), force = True)
+        return not self.__failed
+
+    def __run_job(self, req_mgr, job):
+        cursor = self.__state.get(job.key, {}).get('cursor')
+        validator = None
+        if self.__validate:
+            from DataValidation import Stream_Validator, Validation_Report
+            validator = Stream_Validator()
+        while True:
+            request, fetch = job.page(cursor)
+            result = None
+            while result is None:
+                self.__limiter.wait()
+                result = fetch(req_mgr)
+                if result is None and request.has_errors:
+                    raise Exception(', '.join(request.errors))
+
+            records, cursor, done = result
+            if validator is not None:
+                records, issues = validator.add(records)
+                if issues:
+                    self.__report(job.key + ': ' + Validation_Report(records, issues).summary(), force = True)
+            with self.__lock:
+                self.__writer.write(records)
+                self.__state[job.key] = {'cursor':cursor, 'done':done}
+                # The columnar writer buffers small pages, the cursor is saved once they are on disk
+                if self.__writer.flush():
+                    self.__save_state()
+                self.__rows[job.key] = self.__rows.get(job.key, 0) + len(records)
+                if validator is not None:
+                    self.__issues += len(issues)
+            self.__report(job.key + ': ' + str(self.__rows[job.key]) + ' rows')
+            if done:
+                return
+
+    def __save_state(self):
+        if not self.__state_file:
+            return
+        temp_file = self.__state_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self.__state, f)
+        os.rename(temp_file, self.__state_file)
+
+    def __report(self, message, force = False):
+        if not self.__progress:
+            return
+        with self.__lock:
+            if force or time.time() - self.__last_progress >= 1.0:
+                self.__last_progress = time.time()
+                self.__progress.write('[krapi] ' + message + '\n')
+                self.__progress.flush()
+
+
+def parse_time(value):
+    """
+    :param value: unix timestamp or utc date like 2017-09-01 or 2017-09-01T12:00:00
+
+    :return unix timestamp as int
+    """
+
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        pass
+    for pattern in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return calendar.timegm(time.strptime(value, pattern))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError("Invalid time: " + value)
+
+
+def create_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--since', type=parse_time, default=None, help='unix time or utc date (inclusive)')
+    common.add_argument('--until', type=parse_time, default=None, help='unix time or utc date (exclusive)')
+    common.add_argument('--format', default='csv', help='output format: ' + ', '.join(sorted(formats)))
+    common.add_argument('--output', default=None, help='output file (default stdout, not resumable)')
+    common.add_argument('--restart', action='store_true', help='ignore the state of a previous run')
+    common.add_argument('--url', default='https://api.kraken.com', help='base url of the api')
+    common.add_argument('--tier', type=int, default=3, choices=[2, 3, 4], help='verification tier of the account')
+    common.add_argument('--jobs', type=int, default=2, help='parallel workers for public exports')
+    common.add_argument('--calls-per-second', type=float, default=1.0, help='rate of requests of all workers')
+    common.add_argument('--quiet', action='store_true', help='no progress on stderr')
+    common.add_argument('--validate', action='store_true', help='drop duplicate rows (by id, public trades are kept) and order pages by time')
+
+    credentials = common.add_argument_group('credentials for private exports')
+    credentials.add_argument('--key', help='tbk file with the api keys (password from $KRAPI_PASSWORD or prompt)')
+    credentials.add_argument('--agent', help='name of the keys in a running key agent (see KeyAgent.py)')
+
+    parser = argparse.ArgumentParser(prog='krapi', description='Bulk export of kraken market and account data')
+    commands = parser.add_subparsers(dest='command')
+    ohlc = commands.add_parser('ohlc', parents=[common], help='committed candles of asset pairs')
+    ohlc.add_argument('--pairs', required=True, help='comma separated asset pairs')
+    ohlc.add_argument('--interval', type=int, default=1, help='interval in minutes')
+    trades = commands.add_parser('trades', parents=[common], help='public trades of asset pairs')
+    trades.add_argument('--pairs', required=True, help='comma separated asset pairs')
+    commands.add_parser('ledgers', parents=[common], help='ledger entries of the account')
+    commands.add_parser('trades-history', parents=[common], help='trade history of the account')
+    return parser
+
+
+def load_credentials(args):
+    """
+    :return Credential_Mgr with loaded credentials
+
+    :Exception - If no credentials were given or loading failed
+    """
+
+    from CredentialMgr import Credential_Mgr
+
+    cred_mgr = Credential_Mgr()
+    if args.agent:
+        if not cred_mgr.load_from_agent(args.agent):
+            raise Exception("Key agent has no keys named " + args.agent)
+    elif args.key:
+        import getpass
+        pwd = os.environ.get('KRAPI_PASSWORD') or getpass.getpass('Password for ' + args.key + ': ')
+        if not cred_mgr.load_credentials(tbk_file=args.key, pwd=pwd):
+            raise Exception("Loading keys from " + args.key + " failed")
+    else:
+        raise Exception("Private exports need --key or --agent")
+    return cred_mgr
+
+
+def create_jobs(args):
+    if args.command == 'ohlc':
+        return [_Ohlc_Job(pair, args.interval, args.since, args.until) for pair in args.pairs.split(',')]
+    if args.command == 'trades':
+        return [_Trades_Job(pair, args.since, args.until) for pair in args.pairs.split(',')]
+    return [_Account_Job(args.command, args.since, args.until)]
+
+
+def main(argv=None):
+    from RequestMgr import Request_Mgr
+    from Records import Candle, Trade, Ledger_Entry
+
+    args = create_parser().parse_args(argv)
+    if args.format not in formats:
+        print >> sys.stderr, 'Unknown format ' + args.format + ', supported: ' + ', '.join(sorted(formats))
+        return 2
+
+    cred_mgr = None
+    if args.command in ('ledgers', 'trades-history'):
+        try:
+            cred_mgr = load_credentials(args)
+        except Exception as e:
+            print >> sys.stderr, e
+            return 2
+
+    record_class = {'ohlc':Candle, 'trades':Trade, 'ledgers':Ledger_Entry, 'trades-history':Trade}[args.command]
+    state_file = args.output + '.state' if args.output else None
+    if state_file and args.restart and os.path.exists(state_file):
+        os.remove(state_file)
+    resume = state_file is not None and os.path.exists(state_file)
+
+    try:
+        writer = formats[args.format](args.output, record_class, resume)
+    except (ValueError, IOError) as e:
+        print >> sys.stderr, e
+        return 2
+
+    try:
+        exporter = Exporter(lambda: Request_Mgr(args.tier, cred_mgr, args.url), writer, state_file,
+                            args.jobs if cred_mgr is None else 1, args.calls_per_second,
+                            None if args.quiet else sys.stderr, args.validate)
+        completed = exporter.run(create_jobs(args))
+    finally:
+        writer.close()
+    return 0 if completed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
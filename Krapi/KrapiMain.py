@@ -1,12 +1,12 @@
 import sys
-import json
-import KrakenConnector
-from CredentialMgr import Credential_Mgr
-from RequestMgr import Request_Mgr
-from PublicApiRequests import * 
-from PrivateApiRequests import *
+
+# The examples and KrapiCli.py import what they need, so importing KrapiMain stays cheap
 
 def main(argv):
+    if len(argv) > 1:
+        import KrapiCli
+        return KrapiCli.main(argv[1:])
+
     public_request()
     private_request()
     return
@@ -16,6 +16,10 @@ def main(argv):
 ##################################################################
 
 def private_request():
+    from CredentialMgr import Credential_Mgr
+    from RequestMgr import Request_Mgr
+    from PrivateApiRequests import Request_Balance
+
     cre_mgr = Credential_Mgr()
     try:
         if not cre_mgr.encrypt_keys(in_file="KrakenKey.txt", pwd="Test"):
@@ -47,6 +51,9 @@ def private_request():
 #################################################################
 
 def public_request():    
+    from RequestMgr import Request_Mgr
+    from PublicApiRequests import Request_Time
+
     req_mgr = Request_Mgr(3)
     req = Request_Time()
     if not req_mgr.send_request(req):
@@ -56,4 +63,4 @@ def public_request():
         print req.raw_response
 
 if __name__ == "__main__":
-    main(sys.argv)
\ No newline at end of file
+    sys.exit(main(sys.argv))
\ No newline at end of file
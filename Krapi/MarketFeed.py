@@ -0,0 +1,448 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import socket
+import json
+import logging
+import time
+import zlib
+from collections import deque
+from Queue import Queue
+from threading import Thread, Lock, Condition
+from WebSocket import Web_Socket
+from PublicApiRequests import Request_Ticker_Information, Request_Order_Book, Request_Recent_Trades, Request_Spread, Request_OHLC_Data
+
+_log = logging.getLogger(__name__)
+
+class Feed_Subscription(object):
+    """
+    Interest of one consumer in a websocket channel and pair.
+
+    Every message is delivered as the same request object the REST api would
+    produce (Request_Ticker_Information, Request_Order_Book, Request_Recent_Trades,
+    Request_Spread or Request_OHLC_Data) with asset_pairs_dict filled for the pair.
+
+    Ticker, book and spread messages are conflated: a slow consumer only gets the
+    latest state. Trade and ohlc messages are queued up to max_queued, older messages
+    are dropped beyond that and counted in dropped, so they can be backfilled via REST.
+
+    public variables:
+    channel: 'ticker', 'book', 'trade', 'spread' or 'ohlc'
+    pair:    websocket pair name like 'XBT/EUR'
+    dropped: number of dropped messages
+
+    public methods:
+    get()    - returns the next delivered request object
+    cancel() - stops the subscription
+    """
+
+    _conflated = ('ticker', 'book', 'spread')
+
+    def __init__(self, feed, channel, pair, callback, options, max_queued):
+        self.channel = channel
+        self.pair = pair
+        self.options = options
+        self.dropped = 0
+        self.active = True
+        self.callback = callback
+        self.__feed = feed
+        self.__max_queued = 1 if channel in self._conflated else max_queued
+        self.__pending = deque()
+        self.__cond = Condition()
+
+    def get(self, timeout = None):
+        """
+        :return the next request object or None if no message arrived within timeout
+        """
+
+        with self.__cond:
+            if not self.__pending and self.active:
+                self.__cond.wait(timeout)
+            return self.__pending.popleft() if self.__pending else None
+
+    def cancel(self):
+        self.__feed.unsubscribe(self)
+
+    def _push(self, request):
+        """:return True if the subscription had no pending message before"""
+
+        with self.__cond:
+            was_empty = not self.__pending
+            if len(self.__pending) >= self.__max_queued:
+                self.__pending.popleft()
+                if self.channel not in self._conflated:
+                    self.dropped += 1
+            self.__pending.append(request)
+            self.__cond.notify()
+            return was_empty
+
+    def _pop(self):
+        with self.__cond:
+            return self.__pending.popleft() if self.__pending else None
+
+    def _close(self):
+        with self.__cond:
+            self.active = False
+            self.__cond.notify_all()
+
+
+class Local_Book(object):
+    """
+    Order book maintained from websocket snapshots and updates.
+    Price levels keep the strings as received, they are needed for the checksum.
+    """
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.asks = {}
+        self.bids = {}
+
+    def apply_snapshot(self, payload):
+        self.asks = dict((float(level[0]), level[:3]) for level in payload.get('as', []))
+        self.bids = dict((float(level[0]), level[:3]) for level in payload.get('bs', []))
+
+    def apply_update(self, side, levels):
+        book = self.asks if side == 'a' else self.bids
+        for level in levels:
+            price = float(level[0])
+            if float(level[1]) == 0:
+                book.pop(price, None)
+            else:
+                book[price] = level[:3]
+        if len(book) > self.depth:
+            keep = sorted(book)[:self.depth] if side == 'a' else sorted(book, reverse=True)[:self.depth]
+            for price in set(book) - set(keep):
+                del book[price]
+
+    def sorted_asks(self):
+        return [self.asks[price] for price in sorted(self.asks)]
+
+    def sorted_bids(self):
+        return [self.bids[price] for price in sorted(self.bids, reverse=True)]
+
+    def checksum(self):
+        return book_checksum(self.sorted_asks(), self.sorted_bids())
+
+
+def book_checksum(asks, bids):
+    """
+    Kraken book checksum: crc32 over the top 10 asks (ascending) and bids (descending),
+    each level as price and volume without '.' and leading zeros.
+
+    :return checksum as unsigned int
+    """
+
+    parts = []
+    for level in asks[:10] + bids[:10]:
+        parts.append(level[0].replace('.', '').lstrip('0'))
+        parts.append(level[1].replace('.', '').lstrip('0'))
+    return zlib.crc32(''.join(parts)) & 0xffffffff
+
+
+class Market_Feed(object):
+    """
+    Client for the public Kraken websocket api (ticker, book, trade, spread and ohlc channels).
+
+    The connection is re-established with exponential backoff and all subscriptions
+    are resubscribed. Books are validated with the checksum of every update and
+    resubscribed on a mismatch. Callbacks are called from one dispatcher thread, so
+    a slow callback never blocks the socket reader. An exception of a callback is
+    logged and doesn't stop the delivery to other subscriptions.
+
+    public methods:
+    start()       - connects in a daemon thread
+    stop()        - closes the connection
+    subscribe()   - subscribes to a channel of a pair
+    unsubscribe() - removes a subscription
+
+    public variables:
+    reconnects:          number of reconnects
+    checksum_failures:   number of book checksum mismatches
+    errors:              number of callbacks that raised an exception
+    """
+
+    _requests = {
+        'ticker': Request_Ticker_Information,
+        'book':   Request_Order_Book,
+        'trade':  Request_Recent_Trades,
+        'spread': Request_Spread,
+        'ohlc':   Request_OHLC_Data
+    }
+
+    def __init__(self, url = 'wss://ws.kraken.com', reconnect_delay = 1.0, max_reconnect_delay = 30.0,
+                 timeout = 10.0, max_queued = 1000):
+        """
+        :type url:  str
+        :param url: websocket url. Use ws://host:port of a MockKrakenFeed for tests
+
+        :type reconnect_delay:  float
+        :param reconnect_delay: first delay before reconnecting in seconds
+
+        :type max_reconnect_delay:  float
+        :param max_reconnect_delay: maximum delay before reconnecting in seconds
+
+        :type timeout:  float
+        :param timeout: reconnect if nothing (not even a heartbeat) was received for timeout seconds
+
+        :type max_queued:  int
+        :param max_queued: queued trade/ohlc messages per subscription
+
+        """
+
+        self.url = url
+        self.reconnects = 0
+        self.checksum_failures = 0
+        self.errors = 0
+        self.__reconnect_delay = reconnect_delay
+        self.__max_reconnect_delay = max_reconnect_delay
+        self.__timeout = timeout
+        self.__max_queued = max_queued
+        self.__subscriptions = []
+        self.__books = {}
+        self.__lock = Lock()
+        self.__ws = None
+        self.__running = False
+        self.__ready = Queue()
+        self.__threads = []
+
+    def start(self):
+        self.__running = True
+        for target in (self.__run, self.__dispatch):
+            thread = Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self.__threads.append(thread)
+
+    def stop(self):
+        self.__running = False
+        self.__ready.put(None)
+        with self.__lock:
+            ws = self.__ws
+        if ws:
+            ws.close()
+        for thread in self.__threads:
+            thread.join()
+        self.__threads = []
+
+    def subscribe(self, channel, pair, callback = None, depth = 10, interval = 1):
+        """
+        :type channel:  str
+        :param channel: 'ticker', 'book', 'trade', 'spread' or 'ohlc'
+
+        :type pair:  str
+        :param pair: websocket pair name like 'XBT/EUR'
+
+        :type callback:  callable
+        :param callback: called with the request object of every message (optional).
+                         Without callback messages are read with Feed_Subscription.get().
+
+        :type depth:  int
+        :param depth: book depth (10, 25, 100, 500, 1000)
+
+        :type interval:  int
+        :param interval: ohlc interval in minutes
+
+        :return Feed_Subscription
+
+        :ValueError - If the channel is not supported
+        """
+
+        if channel not in self._requests:
+            raise ValueError("Channel " + channel + " is not supported")
+
+        options = {'name':channel}
+        if channel == 'book':
+            options['depth'] = depth
+        elif channel == 'ohlc':
+            options['interval'] = interval
+
+        subscription = Feed_Subscription(self, channel, pair, callback, options, self.__max_queued)
+        with self.__lock:
+            shared = [s for s in self.__subscriptions if s.pair == pair and s.options == options]
+            self.__subscriptions.append(subscription)
+            ws = self.__ws
+        if ws and not shared:
+            self.__send_subscription(ws, 'subscribe', pair, options)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.__lock:
+            if subscription in self.__subscriptions:
+                self.__subscriptions.remove(subscription)
+            shared = [s for s in self.__subscriptions if s.pair == subscription.pair and s.options == subscription.options]
+            ws = self.__ws
+        if ws and not shared:
+            self.__send_subscription(ws, 'unsubscribe', subscription.pair, subscription.options)
+        subscription._close()
+
+    def __send_subscription(self, ws, event, pair, options):
+        try:
+            ws.send(json.dumps({'event':event, 'pair':[pair], 'subscription':options}))
+        except socket.error:
+            pass
+
+    def __run(self):
+        delay = self.__reconnect_delay
+        first = True
+        while self.__running:
+            try:
+                ws = Web_Socket.connect(self.url, self.__timeout)
+            except (socket.error, IOError):
+                time.sleep(delay)
+                delay = min(self.__max_reconnect_delay, delay * 2)
+                continue
+
+            if not first:
+                self.reconnects += 1
+            first = False
+
+            with self.__lock:
+                self.__ws = ws
+                self.__books = {}
+                subscribed = set()
+                for s in self.__subscriptions:
+                    key = (s.pair, tuple(sorted(s.options.items())))
+                    if key not in subscribed:
+                        subscribed.add(key)
+                        self.__send_subscription(ws, 'subscribe', s.pair, s.options)
+
+            try:
+                while self.__running:
+                    message = ws.recv()
+                    if message is None:
+                        break
+                    delay = self.__reconnect_delay
+                    self.__handle(ws, json.loads(message))
+            except (socket.error, IOError, ValueError):
+                pass
+
+            with self.__lock:
+                self.__ws = None
+            ws.close()
+            if self.__running:
+                time.sleep(delay)
+                delay = min(self.__max_reconnect_delay, delay * 2)
+
+    def __handle(self, ws, message):
+        if isinstance(message, dict):
+            # heartbeat, systemStatus, subscriptionStatus and pong events carry no market data
+            return
+
+        channel_name, pair = message[-2], message[-1]
+        channel = channel_name.split('-')[0]
+
+        if channel == 'book':
+            result = self.__handle_book(ws, channel_name, pair, message[1:-2])
+            if result is None:
+                return
+        elif channel == 'ticker':
+            data = dict(message[1])
+            if isinstance(data.get('o'), list):
+                data['o'] = data['o'][0]
+            result = {pair:data}
+        elif channel == 'trade':
+            result = {pair:message[1], 'last':str(int(float(message[1][-1][2]) * 1000000000)) if message[1] else None}
+        elif channel == 'spread':
+            bid, ask, timestamp = message[1][:3]
+            result = {pair:[[int(float(timestamp)), bid, ask]], 'last':int(float(timestamp))}
+        elif channel == 'ohlc':
+            row = message[1]
+            interval = int(channel_name.split('-')[1]) if '-' in channel_name else 1
+            end = int(float(row[1]))
+            result = {pair:[[end - interval * 60] + row[2:]], 'last':end - interval * 60}
+        else:
+            return
+
+        with self.__lock:
+            subscriptions = [s for s in self.__subscriptions if s.pair == pair and s.channel == channel and
+                             (channel not in ('book', 'ohlc') or channel_name == self.__channel_name(s.options))]
+
+        for subscription in subscriptions:
+            request = self._requests[channel]()
+            request.asset_pair_list = [pair]
+            request.validate_response({'error':[], 'result':result})
+            if subscription._push(request) and subscription.callback:
+                self.__ready.put(subscription)
+
+    def __handle_book(self, ws, channel_name, pair, payloads):
+        """
+        Applies a book snapshot or update.
+
+        :return REST like result for Request_Order_Book or None if the book is not valid
+        """
+
+        key = (channel_name, pair)
+        depth = int(channel_name.split('-')[1]) if '-' in channel_name else 10
+        checksum = None
+
+        for payload in payloads:
+            if 'as' in payload or 'bs' in payload:
+                book = Local_Book(depth)
+                book.apply_snapshot(payload)
+                self.__books[key] = book
+                continue
+
+            book = self.__books.get(key)
+            if book is None:
+                return None
+            if 'a' in payload:
+                book.apply_update('a', payload['a'])
+            if 'b' in payload:
+                book.apply_update('b', payload['b'])
+            if 'c' in payload:
+                checksum = int(payload['c'])
+
+        book = self.__books.get(key)
+        if book is None:
+            return None
+
+        if checksum is not None and book.checksum() != checksum:
+            self.checksum_failures += 1
+            del self.__books[key]
+            options = {'name':'book', 'depth':depth}
+            self.__send_subscription(ws, 'unsubscribe', pair, options)
+            self.__send_subscription(ws, 'subscribe', pair, options)
+            return None
+
+        return {pair:{'asks':book.sorted_asks(), 'bids':book.sorted_bids()}}
+
+    def __channel_name(self, options):
+        if options['name'] == 'book':
+            return 'book-' + str(options['depth'])
+        if options['name'] == 'ohlc':
+            return 'ohlc-' + str(options['interval'])
+        return options['name']
+
+    def __dispatch(self):
+        while True:
+            subscription = self.__ready.get()
+            if subscription is None:
+                return
+            while subscription.active:
+                request = subscription._pop()
+                if request is None:
+                    break
+                try:
+                    subscription.callback(request)
+                except Exception:
+                    _log.exception("Callback of %s %s failed", subscription.channel, subscription.pair)
+                    self.errors += 1
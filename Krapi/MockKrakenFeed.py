@@ -0,0 +1,245 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import SocketServer
+import socket
+import select
+import random
+import json
+import time
+import sys
+from threading import Thread, Lock
+from WebSocket import Web_Socket
+from MarketFeed import Local_Book, book_checksum
+
+class Mock_Kraken_Feed(object):
+    """
+    Local stand-in for the public Kraken websocket api (ws.kraken.com).
+    Answers subscribe/unsubscribe/ping events and pushes generated ticker,
+    book (snapshot, updates and checksum), trade, spread and ohlc messages.
+
+    public methods:
+    start()            -- starts serving in a daemon thread
+    stop()             -- stops the server
+    get_url()          -- returns the url to pass to MarketFeed.Market_Feed
+    drop_connections() -- closes all client connections (to test reconnects)
+
+    public variables:
+    corrupt_checksum:  if True the next book update carries a wrong checksum
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, interval=0.05, seed=0):
+        """
+        :type interval: float
+        :param interval: seconds between two messages of a subscription
+
+        :type seed: int
+        :param seed: seed for generated messages
+        """
+
+        self.interval = interval
+        self.corrupt_checksum = False
+        self.connections_accepted = 0
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._sockets = []
+        self.__server = _Threaded_Tcp_Server((host, port), _Mock_Feed_Handler)
+        self.__server.mock = self
+        self.__thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self.__thread = Thread(target=self.__server.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.drop_connections()
+        self.__server.server_close()
+
+    def get_url(self):
+        host, port = self.__server.server_address
+        return 'ws://' + host + ':' + str(port)
+
+    def drop_connections(self):
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+
+class _Threaded_Tcp_Server(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Mock_Feed_Handler(SocketServer.BaseRequestHandler):
+    """Serves one websocket connection of Mock_Kraken_Feed"""
+
+    def handle(self):
+        mock = self.server.mock
+        with mock._lock:
+            mock._sockets.append(self.request)
+            mock.connections_accepted += 1
+
+        try:
+            ws = Web_Socket.accept(self.request)
+        except IOError:
+            return
+
+        self.ws = ws
+        self.rnd = random.Random(mock._random.random())
+        self.channels = {}
+        self.next_channel_id = 1
+        ws.send(json.dumps({'connectionID':id(self), 'event':'systemStatus', 'status':'online', 'version':'1.0.0'}))
+
+        try:
+            next_push = time.time()
+            while True:
+                readable = ws.buffered() or select.select([self.request], [], [], max(0, next_push - time.time()))[0]
+                if readable:
+                    message = ws.recv()
+                    if message is None:
+                        return
+                    self.handle_event(json.loads(message))
+                if time.time() >= next_push:
+                    for key in list(self.channels):
+                        self.push(mock, key)
+                    if not self.channels:
+                        ws.send(json.dumps({'event':'heartbeat'}))
+                    next_push = time.time() + mock.interval
+        except (socket.error, ValueError):
+            pass
+        finally:
+            ws.close()
+
+    def handle_event(self, event):
+        if event.get('event') == 'ping':
+            self.ws.send(json.dumps({'event':'pong', 'reqid':event.get('reqid')}))
+            return
+
+        subscription = event.get('subscription', {})
+        name = subscription.get('name')
+        if name == 'book':
+            name += '-' + str(subscription.get('depth', 10))
+        elif name == 'ohlc':
+            name += '-' + str(subscription.get('interval', 1))
+
+        for pair in event.get('pair', []):
+            key = (name, pair)
+            status = {'event':'subscriptionStatus', 'pair':pair, 'channelName':name, 'subscription':subscription}
+            if event.get('event') == 'subscribe':
+                status.update({'status':'subscribed', 'channelID':self.next_channel_id})
+                self.channels[key] = {'id':self.next_channel_id, 'price':self.rnd.uniform(100, 10000), 'book':None}
+                self.next_channel_id += 1
+            elif event.get('event') == 'unsubscribe':
+                status['status'] = 'unsubscribed'
+                self.channels.pop(key, None)
+            self.ws.send(json.dumps(status))
+
+    def push(self, mock, key):
+        name, pair = key
+        state = self.channels[key]
+        rnd = self.rnd
+        state['price'] *= rnd.uniform(0.999, 1.001)
+        price = state['price']
+        now = time.time()
+
+        if name == 'ticker':
+            data = {'a':[_fmt(price * 1.001), 1, '1.000'], 'b':[_fmt(price * 0.999), 2, '2.000'],
+                    'c':[_fmt(price), _fmt(rnd.uniform(0, 5))], 'v':[_fmt(100), _fmt(1000)], 'p':[_fmt(price), _fmt(price)],
+                    't':[10, 100], 'l':[_fmt(price * 0.9), _fmt(price * 0.9)], 'h':[_fmt(price * 1.1), _fmt(price * 1.1)],
+                    'o':[_fmt(price), _fmt(price)]}
+            message = [state['id'], data, name, pair]
+
+        elif name.startswith('book'):
+            depth = int(name.split('-')[1])
+            if state['book'] is None:
+                snapshot = {'as':[[_fmt(price * (1 + 0.001 * i)), _fmt(rnd.uniform(0.1, 5)), '%.6f' % now] for i in xrange(1, depth + 1)],
+                            'bs':[[_fmt(price * (1 - 0.001 * i)), _fmt(rnd.uniform(0.1, 5)), '%.6f' % now] for i in xrange(1, depth + 1)]}
+                state['book'] = Local_Book(depth)
+                state['book'].apply_snapshot(snapshot)
+                message = [state['id'], snapshot, name, pair]
+            else:
+                book = state['book']
+                side = rnd.choice('ab')
+                levels = book.sorted_asks() if side == 'a' else book.sorted_bids()
+                update = [[levels[0][0], _fmt(rnd.uniform(0.1, 5)), '%.6f' % now]]
+                book.apply_update(side, update)
+                checksum = book_checksum(book.sorted_asks(), book.sorted_bids())
+                if mock.corrupt_checksum:
+                    mock.corrupt_checksum = False
+                    checksum += 1
+                message = [state['id'], {side:update, 'c':str(checksum)}, name, pair]
+
+        elif name == 'trade':
+            message = [state['id'], [[_fmt(price), _fmt(rnd.uniform(0, 2)), '%.6f' % now, rnd.choice('bs'), rnd.choice('ml'), '']], name, pair]
+
+        elif name == 'spread':
+            message = [state['id'], [_fmt(price * 0.999), _fmt(price * 1.001), '%.6f' % now, _fmt(1), _fmt(1)], name, pair]
+
+        elif name.startswith('ohlc'):
+            interval = int(name.split('-')[1]) * 60
+            end = int(now) - int(now) % interval + interval
+            message = [state['id'], ['%.6f' % now, '%.6f' % end, _fmt(price), _fmt(price * 1.001), _fmt(price * 0.999),
+                                     _fmt(price), _fmt(price), _fmt(rnd.uniform(0, 10)), rnd.randint(1, 50)], name, pair]
+        else:
+            return
+
+        self.ws.send(json.dumps(message))
+
+
+def _fmt(value):
+    return '%.5f' % value
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in server for the Kraken websocket api')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--interval', type=float, default=0.05, help='seconds between two messages of a subscription')
+    args = parser.parse_args(argv)
+
+    server = Mock_Kraken_Feed(args.host, args.port, args.interval)
+    print server.get_url()
+    sys.stdout.flush()
+    try:
+        server.start()
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
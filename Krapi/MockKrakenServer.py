@@ -0,0 +1,438 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import BaseHTTPServer
+import SocketServer
+import urlparse
+import random
+import json
+import time
+import os
+import sys
+from threading import Thread, Lock
+
+class Mock_Kraken_Server(object):
+    """
+    Local stand-in for api.kraken.com.
+    Replays recorded or generated payloads for public and private methods,
+    so requests can be benchmarked without touching the real api.
+
+    Recorded payloads are loaded from payload_dir. Each file has to be named
+    after the api method (e.g. Ticker.json, Ledgers.json) and contain a complete
+    api response like { "error":[], "result":{...} }. Methods without a recorded
+    payload are answered with generated data. AddOrder and the cancel methods
+    track the orders added through the server, so cancels of unknown orders fail.
+    Like the api, private requests whose nonce isn't higher than the last nonce
+    of the key are rejected with EAPI:Invalid nonce.
+
+    Requests are handled in one thread each, the generated payloads, the orders
+    and the random generator are shared between them and guarded by one lock.
+
+    public methods:
+    start()   -- starts serving in a daemon thread
+    stop()    -- stops the server
+    get_url() -- returns the base url to pass to Kraken_Connector or Request_Mgr
+    check_nonce() -- records the nonce of a private request, False if it is too low
+
+    """
+
+    page_size = 50
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, size=100, payload_dir=None, seed=0):
+        """
+        :type host: str
+        :param host: interface to bind to
+
+        :type port: int
+        :param port: port to bind to (0 picks a free port)
+
+        :type latency: float
+        :param latency: seconds to wait before every response
+
+        :type size: int
+        :param size: number of rows per pair for Depth, OHLC, Trades and Spread and
+                     number of entries for Ledgers and TradesHistory
+
+        :type payload_dir: str
+        :param payload_dir: directory with recorded payloads (optional)
+
+        :type seed: int
+        :param seed: seed for generated payloads
+
+        """
+
+        self.latency = latency
+        self.size = size
+        self.requests_served = 0
+        self._random = random.Random(seed)
+        self._recorded = {}
+        self._generated = {}
+        self._open_orders = {}
+        self._orders_added = 0
+        self._state_lock = Lock()
+        self._nonces = {}
+        self._nonce_lock = Lock()
+
+        if payload_dir:
+            for file_name in os.listdir(payload_dir):
+                method, ext = os.path.splitext(file_name)
+                if ext == '.json':
+                    with open(os.path.join(payload_dir, file_name), 'r') as payload_file:
+                        self._recorded[method] = payload_file.read()
+
+        self.__server = _Threaded_Http_Server((host, port), _Mock_Request_Handler)
+        self.__server.mock = self
+        self.__thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self.__thread = Thread(target=self.__server.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def get_url(self):
+        host, port = self.__server.server_address
+        return 'http://' + host + ':' + str(port)
+
+    def check_nonce(self, api_key, nonce):
+        """
+        :type api_key: str
+        :param api_key: API-Key header of the request
+
+        :type nonce: str
+        :param nonce: nonce of the POST data
+
+        :return True if the nonce is higher than every nonce seen for the key
+        """
+
+        try:
+            nonce = int(nonce)
+        except (TypeError, ValueError):
+            return False
+
+        with self._nonce_lock:
+            if nonce <= self._nonces.get(api_key, 0):
+                return False
+            self._nonces[api_key] = nonce
+            return True
+
+    def respond(self, api_type, method, data):
+        """
+        Builds the response body for a request.
+
+        :type api_type: str
+        :param api_type: 'public' or 'private'
+
+        :type method: str
+        :param method: api method like 'Ticker'
+
+        :type data: dict
+        :param data: decoded POST data
+
+        :return response body as json string
+
+        """
+
+        with self._state_lock:
+            self.requests_served += 1
+            return self.__respond(api_type, method, data)
+
+    def __respond(self, api_type, method, data):
+        if method in self._recorded:
+            return self._recorded[method]
+
+        if method == 'Time':
+            return json.dumps({'error':[], 'result':self.__generate(method, [])})
+
+        if method in ('Ledgers', 'TradesHistory'):
+            return self.__page(method, int(data.get('ofs', 0)), float(data.get('start', 0)))
+
+        if method in ('AddOrder', 'CancelOrder', 'CancelOrderBatch', 'CancelAll', 'OpenOrders'):
+            return json.dumps(self.__order(method, data))
+
+        if method == 'Trades' and 'since' in data:
+            return self.__trades_since(data.get('pair', 'XXBTZEUR').split(','), int(data['since']))
+
+        if api_type == 'public':
+            pairs = data.get('pair', 'XXBTZEUR').split(',')
+            key = (method, data.get('pair'))
+        else:
+            pairs = []
+            key = (method, None)
+
+        if key not in self._generated:
+            result = self.__generate(method, pairs)
+            if result is None:
+                return json.dumps({'error':['EGeneral:Unknown method'], 'result':{}})
+            self._generated[key] = json.dumps({'error':[], 'result':result})
+        return self._generated[key]
+
+    def __page(self, method, offset, start):
+        key = (method, offset, start)
+        if key not in self._generated:
+            if method not in self._generated:
+                self._generated[method] = self.__generate(method, [])
+            entries, field = self._generated[method]
+            # Newest first like the api
+            entries = [entry for entry in reversed(entries) if entry[1]['time'] > start]
+            page = dict(entries[offset:offset + self.page_size])
+            result = {field:page, 'count':len(entries)}
+            self._generated[key] = json.dumps({'error':[], 'result':result})
+        return self._generated[key]
+
+    def __trades_since(self, pairs, since):
+        """Pages of page_size trades after since (in nanoseconds) like the api"""
+
+        key = ('Trades', ','.join(pairs))
+        if key not in self._generated:
+            self._generated[key] = json.dumps({'error':[], 'result':self.__generate('Trades', pairs)})
+        generated = json.loads(self._generated[key])['result']
+
+        result = {'last':str(since)}
+        for pair in pairs:
+            rows = [row for row in generated[pair] if int(row[2] * 1000000000) > since][:self.page_size]
+            result[pair] = rows
+            if rows:
+                result['last'] = str(max(int(result['last']), int(rows[-1][2] * 1000000000)))
+        return json.dumps({'error':[], 'result':result})
+
+    def __order(self, method, data):
+        if method == 'AddOrder':
+            descr = {'order':' '.join([data.get('type', ''), data.get('volume', ''), data.get('pair', ''),
+                                       data.get('ordertype', '')] + (['@ ' + data['price']] if 'price' in data else []))}
+            if data.get('validate'):
+                return {'error':[], 'result':{'descr':descr}}
+            self._orders_added += 1
+            txid = 'O' + str(self._orders_added).zfill(6) + '-MOCK-ORDER'
+            descr.update({'pair':data.get('pair'), 'type':data.get('type'), 'ordertype':data.get('ordertype'),
+                          'price':data.get('price', '0'), 'price2':data.get('price2', '0'), 'leverage':'none'})
+            self._open_orders[txid] = {'refid':None, 'userref':data.get('userref'), 'status':'open', 'opentm':time.time(),
+                                       'starttm':0, 'expiretm':0, 'descr':descr, 'vol':data.get('volume', '0'),
+                                       'vol_exec':'0.00000000', 'cost':'0.00000', 'fee':'0.00000', 'price':'0.00000',
+                                       'misc':'', 'oflags':data.get('oflags', '')}
+            return {'error':[], 'result':{'descr':{'order':descr['order']}, 'txid':[txid]}}
+
+        if method == 'OpenOrders':
+            return {'error':[], 'result':{'open':dict(self._open_orders)}}
+
+        if method == 'CancelOrder':
+            txids = [data.get('txid')]
+        elif method == 'CancelOrderBatch':
+            txids = [value for key, value in data.iteritems() if key.startswith('orders[')]
+        else:
+            txids = list(self._open_orders)
+
+        canceled = [txid for txid in txids if txid in self._open_orders]
+        if not canceled and method == 'CancelOrder':
+            return {'error':['EOrder:Unknown order'], 'result':{}}
+        for txid in canceled:
+            self._open_orders.pop(txid, None)
+        return {'error':[], 'result':{'count':len(canceled)}}
+
+    def __generate(self, method, pairs):
+        rnd = self._random
+        now = int(time.time())
+
+        if method == 'Time':
+            return {'unixtime':now, 'rfc1123':time.strftime('%a, %d %b %y %H:%M:%S +0000', time.gmtime(now))}
+
+        if method == 'Ticker':
+            result = {}
+            for pair in pairs:
+                price = rnd.uniform(1, 10000)
+                result[pair] = {
+                    'a':[_fmt(price * 1.001), '1', '1.000'],
+                    'b':[_fmt(price * 0.999), '2', '2.000'],
+                    'c':[_fmt(price), _fmt(rnd.uniform(0, 5))],
+                    'v':[_fmt(rnd.uniform(0, 1000)), _fmt(rnd.uniform(1000, 5000))],
+                    'p':[_fmt(price), _fmt(price)],
+                    't':[rnd.randint(0, 1000), rnd.randint(1000, 5000)],
+                    'l':[_fmt(price * 0.95), _fmt(price * 0.9)],
+                    'h':[_fmt(price * 1.05), _fmt(price * 1.1)],
+                    'o':_fmt(price)
+                }
+            return result
+
+        if method == 'Depth':
+            result = {}
+            for pair in pairs:
+                price = rnd.uniform(1, 10000)
+                result[pair] = {
+                    'asks':[[_fmt(price * (1 + 0.0001 * i)), _fmt(rnd.uniform(0, 10)), now] for i in xrange(1, self.size + 1)],
+                    'bids':[[_fmt(price * (1 - 0.0001 * i)), _fmt(rnd.uniform(0, 10)), now] for i in xrange(1, self.size + 1)]
+                }
+            return result
+
+        if method == 'OHLC':
+            result = {'last':now - now % 60}
+            for pair in pairs:
+                price = rnd.uniform(1, 10000)
+                candles = []
+                for i in xrange(self.size):
+                    t = result['last'] - 60 * (self.size - 1 - i)
+                    o, c = price, price * rnd.uniform(0.99, 1.01)
+                    candles.append([t, _fmt(o), _fmt(max(o, c) * 1.001), _fmt(min(o, c) * 0.999), _fmt(c),
+                                    _fmt((o + c) / 2), _fmt(rnd.uniform(0, 50)), rnd.randint(1, 100)])
+                    price = c
+                result[pair] = candles
+            return result
+
+        if method == 'Trades':
+            result = {'last':str(now * 1000000000)}
+            for pair in pairs:
+                price = rnd.uniform(1, 10000)
+                result[pair] = [[_fmt(price * rnd.uniform(0.999, 1.001)), _fmt(rnd.uniform(0, 5)),
+                                 now - self.size + i + 0.5, rnd.choice('bs'), rnd.choice('ml'), '']
+                                for i in xrange(self.size)]
+            return result
+
+        if method == 'Spread':
+            result = {'last':now}
+            for pair in pairs:
+                price = rnd.uniform(1, 10000)
+                result[pair] = [[now - self.size + i, _fmt(price * 0.999), _fmt(price * 1.001)] for i in xrange(self.size)]
+            return result
+
+        if method == 'AssetPairs':
+            result = {}
+            for pair in pairs:
+                base, quote = (pair[:4], pair[4:]) if len(pair) == 8 else (pair[:-3], pair[-3:])
+                result[pair] = {'altname':pair, 'aclass_base':'currency', 'base':base, 'aclass_quote':'currency',
+                                'quote':quote, 'lot':'unit', 'pair_decimals':5, 'lot_decimals':8, 'lot_multiplier':1,
+                                'leverage_buy':[], 'leverage_sell':[], 'fee_volume_currency':'ZUSD',
+                                'fees':[[0, 0.26], [50000, 0.24], [100000, 0.22], [250000, 0.2], [500000, 0.18],
+                                        [1000000, 0.16], [2500000, 0.14], [5000000, 0.12], [10000000, 0.1]],
+                                'fees_maker':[[0, 0.16], [50000, 0.14], [100000, 0.12], [250000, 0.1], [500000, 0.08],
+                                              [1000000, 0.06], [2500000, 0.04], [5000000, 0.02], [10000000, 0]],
+                                'margin_call':80, 'margin_stop':40}
+            return result
+
+        if method == 'Balance':
+            return {'ZEUR':_fmt(rnd.uniform(0, 10000)), 'XXBT':_fmt(rnd.uniform(0, 10))}
+
+        if method == 'Ledgers':
+            balance = 0.0
+            entries = []
+            for i in xrange(self.size):
+                amount = rnd.uniform(-1, 1)
+                balance += amount
+                entries.append(('L' + str(i).zfill(6) + '-MOCK-' + str(i), {
+                    'refid':'R' + str(i), 'time':now - self.size + i + 0.5, 'type':'trade', 'aclass':'currency',
+                    'asset':'XXBT', 'amount':_fmt(amount), 'fee':'0.0000000000', 'balance':_fmt(balance)}))
+            return (entries, 'ledger')
+
+        if method == 'TradesHistory':
+            entries = []
+            for i in xrange(self.size):
+                price = rnd.uniform(1, 10000)
+                vol = rnd.uniform(0, 5)
+                entries.append(('T' + str(i).zfill(6) + '-MOCK-' + str(i), {
+                    'ordertxid':'O' + str(i), 'pair':'XXBTZEUR', 'time':now - self.size + i + 0.5,
+                    'type':rnd.choice(['buy', 'sell']), 'ordertype':'limit', 'price':_fmt(price),
+                    'cost':_fmt(price * vol), 'fee':_fmt(price * vol * 0.0026), 'vol':_fmt(vol),
+                    'margin':'0.00000', 'misc':''}))
+            return (entries, 'trades')
+
+        return None
+
+
+def _fmt(value):
+    return '%.5f' % value
+
+
+class _Threaded_Http_Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # Many clients connect at once in the multi account benchmarks
+    request_queue_size = 128
+
+
+class _Mock_Request_Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answers POST /0/<public|private>/<method> with the payloads of Mock_Kraken_Server"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_POST(self):
+        mock = self.server.mock
+        length = int(self.headers.getheader('Content-Length', 0))
+        data = dict(urlparse.parse_qsl(self.rfile.read(length)))
+        path = urlparse.urlparse(self.path).path.strip('/').split('/')
+
+        if len(path) != 3 or path[1] not in ('public', 'private'):
+            self.send_error(404)
+            return
+
+        if path[1] == 'private' and not self.headers.getheader('API-Key'):
+            body = json.dumps({'error':['EAPI:Invalid key'], 'result':{}})
+        elif path[1] == 'private' and not mock.check_nonce(self.headers.getheader('API-Key'), data.get('nonce')):
+            body = json.dumps({'error':['EAPI:Invalid nonce'], 'result':{}})
+        else:
+            body = mock.respond(path[1], path[2], data)
+
+        if mock.latency:
+            time.sleep(mock.latency)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in server for api.kraken.com')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before every response')
+    parser.add_argument('--size', type=int, default=100, help='rows per pair / history entries')
+    parser.add_argument('--payload-dir', default=None, help='directory with recorded <Method>.json payloads')
+    args = parser.parse_args(argv)
+
+    server = Mock_Kraken_Server(args.host, args.port, args.latency, args.size, args.payload_dir)
+    print server.get_url()
+    sys.stdout.flush()
+    try:
+        server.start()
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
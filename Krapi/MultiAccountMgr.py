@@ -0,0 +1,205 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import os
+import time
+from Queue import Queue, Empty
+from threading import Thread, Lock
+from CredentialMgr import Credential_Mgr
+from RequestMgr import Request_Mgr
+
+class Account_Result(object):
+    """
+    Results of a request plan for one account.
+
+    public variables:
+    account:  name of the account
+    requests: sent requests in plan order. Check has_errors and errors of each request
+    error:    exception that stopped the plan of the account (None if the plan completed)
+    elapsed:  seconds the plan of the account took
+    """
+
+    def __init__(self, account):
+        self.account = account
+        self.requests = []
+        self.error = None
+        self.elapsed = 0.0
+
+    def succeeded(self):
+        return self.error is None and not [request for request in self.requests if request.has_errors]
+
+
+class Multi_Account_Mgr(object):
+    """
+    Runs the same requests for many accounts concurrently.
+
+    Every account gets its own Credential_Mgr and Request_Mgr, so every account has
+    an independent call budget and its own connection with its own nonce stream.
+    The requests of one account are sent one after the other, the accounts are
+    worked on by up to max_concurrency threads at the same time.
+
+    public methods:
+    load_accounts() - decrypts many tbk files in parallel
+    add_account()   - adds an account with an already loaded Credential_Mgr
+    get_accounts()  - returns the names of all accounts
+    get_request_mgr() - returns the Request_Mgr of an account
+    run()           - runs a request plan for all (or some) accounts
+
+    """
+
+    def __init__(self, tier, url = 'https://api.kraken.com', max_concurrency = 8, max_wait = 60.0):
+        """
+        :type tier:  int
+        :param tier: verification tier of the accounts (see Request_Mgr)
+
+        :type url:  str
+        :param url: base url of the api
+
+        :type max_concurrency:  int
+        :param max_concurrency: maximum number of accounts with requests in flight
+
+        :type max_wait:  float
+        :param max_wait: maximum seconds a request waits for the call budget of its account
+
+        """
+
+        self.__tier = tier
+        self.__url = url
+        self.__max_concurrency = max_concurrency
+        self.__max_wait = max_wait
+        self.__accounts = {}
+        self.__lock = Lock()
+
+    def load_accounts(self, tbk_files, pwd, workers = 8):
+        """
+        Decrypts tbk files in parallel and adds the accounts.
+
+        :type tbk_files:  list or dict
+        :param tbk_files: paths of tbk files (the file name without extension is the account name)
+                          or dict with account names as keys and paths as values
+
+        :type pwd:  str or dict
+        :param pwd: password for all files or dict with a password per account name
+
+        :return dict with account names as keys and True if loading succeeded as values
+
+        """
+
+        if not isinstance(tbk_files, dict):
+            tbk_files = dict((os.path.splitext(os.path.basename(path))[0], path) for path in tbk_files)
+
+        def load(name):
+            cred_mgr = Credential_Mgr()
+            password = pwd[name] if isinstance(pwd, dict) else pwd
+            if not cred_mgr.load_credentials(tbk_file = tbk_files[name], pwd = password):
+                return False
+            try:
+                self.add_account(name, cred_mgr)
+            except Exception:
+                return False
+            return True
+
+        return self.__map(load, sorted(tbk_files), workers)
+
+    def add_account(self, name, cred_mgr):
+        """
+        :ValueError - If cred_mgr has no credentials loaded
+        """
+
+        if not isinstance(cred_mgr, Credential_Mgr) or cred_mgr.get_credentials() is None:
+            raise ValueError("No credentials loaded for account " + name)
+
+        req_mgr = Request_Mgr(self.__tier, cred_mgr, self.__url)
+        with self.__lock:
+            self.__accounts[name] = req_mgr
+
+    def get_accounts(self):
+        return sorted(self.__accounts)
+
+    def get_request_mgr(self, name):
+        return self.__accounts[name]
+
+    def run(self, plan, accounts = None):
+        """
+        Runs a request plan for every account.
+
+        :type plan:  list
+        :param plan: request classes or callables returning a new request, e.g.
+                     [Request_Balance, Request_Open_Orders, partial(Request_Ledger_Info)].
+                     Every account gets its own request objects.
+
+        :type accounts:  list
+        :param accounts: names of the accounts to run the plan for (default all)
+
+        :return dict with account names as keys and Account_Result as values
+
+        """
+
+        accounts = self.get_accounts() if accounts is None else accounts
+        return self.__map(lambda name: self.__run_plan(name, plan), accounts, self.__max_concurrency)
+
+    def __run_plan(self, name, plan):
+        result = Account_Result(name)
+        req_mgr = self.__accounts[name]
+        start = time.time()
+        try:
+            for factory in plan:
+                request = factory()
+                self.__send(req_mgr, request)
+                result.requests.append(request)
+        except Exception as e:
+            result.error = e
+        result.elapsed = time.time() - start
+        return result
+
+    def __send(self, req_mgr, request):
+        """Sends a request, waiting for the call budget of the account"""
+
+        deadline = time.time() + self.__max_wait
+        while req_mgr.send_request(request) is None:
+            if time.time() >= deadline:
+                raise Exception("Call budget exhausted for " + request.get_method())
+            time.sleep(0.25)
+
+    def __map(self, function, items, workers):
+        """Calls function for all items with up to workers threads, returns dict item -> result"""
+
+        queue = Queue()
+        for item in items:
+            queue.put(item)
+        results = {}
+
+        def work():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except Empty:
+                    return
+                results[item] = function(item)
+
+        threads = [Thread(target = work) for i in xrange(min(workers, len(items)))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
@@ -0,0 +1,165 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import time
+from collections import deque
+from threading import Thread, Lock, Event
+from KrakenConnector import Kraken_Connector
+from CredentialMgr import Credential_Mgr
+from PublicApiRequests import Request_Time
+
+class Order_Submitter(object):
+    """
+    Dedicated submission path for orders and cancels.
+
+    Owns its own connection, so orders never wait behind market data
+    requests of a Request_Mgr. Nonces of the key are shared with every other
+    connector of the process (see KrakenConnector.Nonce_Source), so an order waits
+    for a private request of the same key that is in flight, instead of being
+    rejected with EAPI:Invalid nonce. The connection is opened and used
+    once (Server Time) on creation, and optionally kept warm while idle, so
+    the first order doesn't pay for the tcp and tls handshake. Signing keys are
+    decoded once per credential manager (see Kraken_Connector).
+
+    Orders are not counted against the Request_Mgr call budget, the api limits
+    orders separately per pair.
+
+    public methods:
+    submit()              - sends an order or cancel request and records the ack latency
+    get_latency_stats()   - returns statistics over the recorded ack latencies
+    warm_up()             - sends a Server Time request over the connection
+    close()               - stops the keep alive thread and closes the connection
+
+    public variables:
+    latencies: deque with the last submit-to-ack latencies in seconds
+
+    """
+
+    def __init__(self, cred_mgr, url = 'https://api.kraken.com', transport = None, keep_alive = 15.0, history = 1000,
+                 clock = None):
+        """
+        :type cred_mgr:  CredentialMgr.Credential_Mgr
+        :param cred_mgr: credential manager with loaded keys
+
+        :type url:  str
+        :param url: base url of the api
+
+        :type transport:  Transport.Http_Transport
+        :param transport: transport used to send requests (optional)
+
+        :type keep_alive:  float
+        :param keep_alive: seconds of idleness after which the connection is used
+                           again to keep it open (None disables the keep alive thread)
+
+        :type history:  int
+        :param history: number of ack latencies kept for get_latency_stats()
+
+        :type clock:  callable
+        :param clock: returns the unix time used for nonces, e.g. ClockSync.Clock_Sync.time
+                      or Request_Mgr.time (default: time.time)
+
+        :ValueError - If cred_mgr is no Credential_Mgr
+
+        """
+
+        if not isinstance(cred_mgr, Credential_Mgr):
+            raise ValueError("cred_mgr has to be a Credential_Mgr")
+
+        self.latencies = deque(maxlen = history)
+        self.__cred_mgr = cred_mgr
+        self.__connector = Kraken_Connector(url, transport, clock)
+        self.__lock = Lock()
+        self.__last_used = 0.0
+        self.__closed = Event()
+
+        self.warm_up()
+
+        self.__thread = None
+        if keep_alive:
+            self.__thread = Thread(target = self.__keep_alive, args = (keep_alive,))
+            self.__thread.daemon = True
+            self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, request):
+        """
+        Sends an order or cancel request immediately.
+
+        :type request:  Request.Request
+        :param request: private request like PrivateApiRequests.Request_Add_Order
+
+        :return True if the request was acknowledged without errors. The latency from
+                submit to ack is stored in request.ack_latency (also for rejected orders)
+
+        """
+
+        with self.__lock:
+            start = time.time()
+            response = self.__connector.query_request(request, self.__cred_mgr)
+            end = time.time()
+            self.__last_used = end
+
+        request.ack_latency = end - start
+        self.latencies.append(request.ack_latency)
+        return request.validate_response(response)
+
+    def get_latency_stats(self):
+        """
+        :return dict with count, mean, p50, p90, p99 and max of the recorded latencies in seconds,
+                None if nothing was submitted yet
+        """
+
+        values = sorted(self.latencies)
+        if not values:
+            return None
+
+        def percentile(p):
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        return {'count':len(values), 'mean':sum(values) / len(values), 'p50':percentile(0.5),
+                'p90':percentile(0.9), 'p99':percentile(0.99), 'max':values[-1]}
+
+    def warm_up(self):
+        with self.__lock:
+            self.__connector.query_request(Request_Time())
+            self.__last_used = time.time()
+
+    def close(self):
+        self.__closed.set()
+        if self.__thread:
+            self.__thread.join()
+        with self.__lock:
+            self.__connector.__exit__(None, None, None)
+
+    def __keep_alive(self, interval):
+        while not self.__closed.wait(interval / 4.0):
+            if time.time() - self.__last_used >= interval:
+                try:
+                    self.warm_up()
+                except Exception:
+                    # The next submit reconnects (see Transport.Http_Transport)
+                    pass
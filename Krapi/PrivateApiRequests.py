@@ -20,7 +20,8 @@
 #OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #SOFTWARE.
 
-from Request import Request
+from Request import Request, Result_Field
+from Records import Record_View, Order, Trade, Ledger_Entry
 from abc import ABCMeta, abstractmethod
 
 class __Private_Request(Request):
@@ -42,6 +43,16 @@ class __Private_Request(Request):
     
     def set_otp(self, otp):
         self.dict["otp"] = str(otp)
+        if self._static_post_data is not None:
+            self.freeze()
+
+    def _new_dict_data(self):
+        """
+        :return new POST data dict with only the One-Time-Password (if set).
+                Used by requests whose POST data must not keep keys of earlier sends.
+        """
+
+        return {'otp':self.dict['otp']} if 'otp' in self.dict else {}
 
     @abstractmethod
     def get_method(self):
@@ -59,6 +70,8 @@ class Request_Balance(__Private_Request):
     public response variables:
     balance_dict: dictionary with assets as keys and balances as values    
     """
+
+    _result_fields = (('balance_dict', {}),)
     
     def __init__(self):
         super(Request_Balance, self).__init__()
@@ -100,6 +113,8 @@ class Request_Trade_Balance(__Private_Request):
                             ml = margin level = (equity / initial margin) * 100
 
     """
+
+    _result_fields = (('balance_info_dict', {}),)
     
     def __init__(self):
         super(Request_Trade_Balance, self).__init__()
@@ -176,7 +191,14 @@ class Request_Open_Orders(__Private_Request):
           For example, if the asset pair uses a lot size that has a scale of 8, the volume will use a scale of 8, 
           even if the currency it represents only has a scale of 2. Similarly, if the asset pair's pricing scale is 5, 
           the scale will remain as 5, even if the underlying currency has a scale of 8.
+
+    public methods:
+    get_orders(): lazy view of Records.Order
     """
+
+    _result_fields = (('open_orders_dict', {}),)
+
+    open_orders_dict = Result_Field('open')
     
     def __init__(self):
         super(Request_Open_Orders, self).__init__()
@@ -194,12 +216,9 @@ class Request_Open_Orders(__Private_Request):
             self.dict.update({'userref':self.userref})
         return self.dict
 
-    def validate_response(self, response):
-        if not super(Request_Open_Orders, self).validate_response(response):
-            return False
-        else:
-            self.open_orders_dict = response['result']['open']
-            return True
+    def get_orders(self):
+        return Record_View(self.open_orders_dict, Order.from_response)
+
 
 class Request_Closed_Orders(__Private_Request):
     """
@@ -225,8 +244,18 @@ class Request_Closed_Orders(__Private_Request):
 
     Note: Times given by order tx ids are more accurate than unix timestamps. 
           If an order tx id is given for the time, the order's open time is used
+
+    public methods:
+    get_orders(): lazy view of Records.Order
     """
+
+    _result_fields = (('closed_dict', {}), ('count', 0))
+
+    closed_dict = Result_Field('closed')
+    count = Result_Field('count')
     
+    _volatile_fields = (('start', 'start'), ('end', 'end'), ('offset', 'offset'))
+
     def __init__(self):
         super(Request_Closed_Orders, self).__init__()
         self.trades = 'false'
@@ -255,13 +284,8 @@ class Request_Closed_Orders(__Private_Request):
         self.dict.update({'closetime':self.close_time})
         return self.dict
 
-    def validate_response(self, response):
-        if not super(Request_Closed_Orders, self).validate_response(response):
-            return False
-        else:
-            self.closed_dict = response['result']['closed']
-            self.count = response['result']['count']
-            return True
+    def get_orders(self):
+        return Record_View(self.closed_dict, Order.from_response)
 
 
 class Request_Specific_Orders(__Private_Request):
@@ -278,7 +302,11 @@ class Request_Specific_Orders(__Private_Request):
     orders_txid_dict : dict with order information and their txid's as keys.
                              See Get open orders/Get closed orders
                           
+    public methods:
+    get_orders(): lazy view of Records.Order
     """
+
+    _result_fields = (('orders_txid_dict', {}),)
     
     def __init__(self):
         super(Request_Specific_Orders, self).__init__()
@@ -306,6 +334,9 @@ class Request_Specific_Orders(__Private_Request):
             self.orders_txid_dict = response['result']
             return True
 
+    def get_orders(self):
+        return Record_View(self.orders_txid_dict, Order.from_response)
+
 
 class Request_Trade_History(__Private_Request):
     """
@@ -330,8 +361,18 @@ class Request_Trade_History(__Private_Request):
                     
     Note: If the trade opened a position addtionial information is available (see official docu) and
     Unless otherwise stated, costs, fees, prices, and volumes are in the asset pair's scale, not the currency's scale.
+
+    public methods:
+    get_trades(): lazy view of Records.Trade
     """
+
+    _result_fields = (('trades_dict', {}), ('count', 0))
+
+    trades_dict = Result_Field('trades')
+    count = Result_Field('count')
     
+    _volatile_fields = (('start', 'start'), ('end', 'end'), ('ofs', 'offset'))
+
     def __init__(self):
         super(Request_Trade_History, self).__init__()
         self.type = 'any position'
@@ -354,13 +395,8 @@ class Request_Trade_History(__Private_Request):
             self.dict.update({'end':str(self.end)})
         return self.dict
 
-    def validate_response(self, response):
-        if not super(Request_Trade_History, self).validate_response(response):
-            return False
-        else:
-            self.trades_dict = response['result']['trades']
-            self.count = response['result']['count']
-            return True
+    def get_trades(self):
+        return Record_View(self.trades_dict, Trade.from_history)
 
 
 class Request_Specific_Trades(__Private_Request):
@@ -376,7 +412,11 @@ class Request_Specific_Trades(__Private_Request):
     trades_txid_dict : dict with trade information and their txid's as keys.
                              (See Request_Trade_History)
                           
+    public methods:
+    get_trades(): lazy view of Records.Trade
     """
+
+    _result_fields = (('trades_txid_dict', {}),)
     
     def __init__(self):
         super(Request_Specific_Trades, self).__init__()
@@ -401,6 +441,9 @@ class Request_Specific_Trades(__Private_Request):
             self.trades_txid_dict = response['result']
             return True
 
+    def get_trades(self):
+        return Record_View(self.trades_txid_dict, Trade.from_history)
+
 
 class Request_Open_Positions(__Private_Request):
     """
@@ -430,6 +473,8 @@ class Request_Open_Positions(__Private_Request):
                             viqc = volume in quote currency
                           
     """
+
+    _result_fields = (('position_txid_dict', {}), ('trades_txid_dict', {}))
     
     def __init__(self):
         super(Request_Open_Positions, self).__init__()
@@ -488,8 +533,18 @@ class Request_Ledger_Info(__Private_Request):
                                 balance = resulting balance
 
     Note: Times given by ledger ids are more accurate than unix timestamps.                     
+
+    public methods:
+    get_ledger_entries(): lazy view of Records.Ledger_Entry
     """
+
+    _result_fields = (('ledger_info_dict', {}), ('amount', 0))
+
+    ledger_info_dict = Result_Field('ledger')
+    amount = Result_Field('count')
     
+    _volatile_fields = (('start', 'start'), ('end', 'end'), ('ofs', 'offset'))
+
     def __init__(self):
         super(Request_Ledger_Info, self).__init__()
         self.aclass = 'currency'
@@ -522,13 +577,8 @@ class Request_Ledger_Info(__Private_Request):
         self.dict.update({'ofs':str(self.offset)})
         return self.dict
 
-    def validate_response(self, response):
-        if not super(Request_Ledger_Info, self).validate_response(response):
-            return False
-        else:
-            self.amount = response['result']['count']
-            self.ledger_info_dict = response['result']['ledger']
-            return True
+    def get_ledger_entries(self):
+        return Record_View(self.ledger_info_dict, Ledger_Entry.from_response)
 
 
 class Request_Specific_Ledgers(__Private_Request):
@@ -544,6 +594,8 @@ class Request_Specific_Ledgers(__Private_Request):
                              (See Request_Ledger_Info)
                           
     """
+
+    _result_fields = (('ledger_id_dict', {}), ('trades_txid_dict', {}))
     
     def __init__(self):
         super(Request_Specific_Ledgers, self).__init__()
@@ -596,6 +648,13 @@ class Request_Trade_Volume(__Private_Request):
             tiervolume = volume level of current tier (if not fixed fee.  nil if at lowest fee tier)
                           
     """
+
+    _result_fields = (('currency', ''), ('volume', 0), ('fees', {}), ('fees_maker', {}))
+
+    currency = Result_Field('currency')
+    volume = Result_Field('volume')
+    fees = Result_Field('fees')
+    fees_maker = Result_Field('fees_maker')
     
     def __init__(self):
         super(Request_Trade_Volume, self).__init__()
@@ -626,12 +685,215 @@ class Request_Trade_Volume(__Private_Request):
         self.dict.update({'pair':assets})
         return self.dict
 
+
+class Request_Add_Order(__Private_Request):
+    """
+    Overrides abstract methods from class __Private_Request.
+    Creates a request to add a standard order.
+    
+    public request variables:
+    pair:       asset pair
+    type:       type of order (buy/sell)
+    order_type: order type: market, limit (price = limit price), stop-loss (price = stop loss price),
+                            take-profit (price = take profit price), stop-loss-profit, stop-loss-profit-limit,
+                            stop-loss-limit, take-profit-limit, trailing-stop, trailing-stop-limit,
+                            stop-loss-and-limit, settle-position
+    price:      price (optional.  dependent upon ordertype)
+    price2:     secondary price (optional.  dependent upon ordertype)
+    volume:     order volume in lots
+    leverage:   amount of leverage desired (optional.  default = none)
+    oflags:     comma delimited list of order flags (optional): viqc, fcib, fciq, nompp, post
+    starttm:    scheduled start time (optional): 0 = now (default), +<n> = schedule start time <n> seconds from now,
+                                                 <n> = unix timestamp of start time
+    expiretm:   expiration time (optional): 0 = no expiration (default), +<n> = expire <n> seconds from now,
+                                            <n> = unix timestamp of expiration time
+    userref:    user reference id.  32-bit signed number.  (optional)
+    validate:   validate inputs only.  do not submit order (optional)
+
+    public response variables:
+    descr: order description info
+            order = order description
+            close = conditional close order description (if conditional close set)
+    txid:  list with transaction ids for order (if order was added successfully)
+    """
+
+    _result_fields = (('descr', {}), ('txid', []))
+
+    read_only = False
+
+    def __init__(self):
+        super(Request_Add_Order, self).__init__()
+        self.pair = None
+        self.type = 'buy'
+        self.order_type = 'limit'
+        self.price = None
+        self.price2 = None
+        self.volume = None
+        self.leverage = None
+        self.oflags = None
+        self.starttm = None
+        self.expiretm = None
+        self.userref = None
+        self.validate = False
+
+        self.descr = {}
+        self.txid = []
+
+    def get_method(self):
+        return "AddOrder"
+
+    def get_dict_data(self):
+        """
+        :ValueError - If pair, type, order_type or volume is not set
+        """
+
+        for name, value in (('pair', self.pair), ('type', self.type), ('order_type', self.order_type),
+                            ('volume', self.volume)):
+            if value is None or value == '':
+                raise ValueError("AddOrder needs " + name)
+
+        data = self._new_dict_data()
+        data.update({'pair':self.pair, 'type':self.type, 'ordertype':self.order_type, 'volume':str(self.volume)})
+        for key, value in (('price', self.price), ('price2', self.price2), ('leverage', self.leverage),
+                           ('oflags', self.oflags), ('starttm', self.starttm), ('expiretm', self.expiretm),
+                           ('userref', self.userref)):
+            if value is not None:
+                data.update({key:str(value)})
+        if self.validate:
+            data.update({'validate':'true'})
+        return data
+
     def validate_response(self, response):
-        if not super(Request_Trade_Volume, self).validate_response(response):
+        if not super(Request_Add_Order, self).validate_response(response):
             return False
         else:
-            self.currency = response['result']['currency']
-            self.volume = response['result']['volume']
-            self.fees = response['result']['fees']
-            self.fees_maker = response['result']['fees_maker']
-            return True
\ No newline at end of file
+            self.descr = response['result']['descr']
+            self.txid = response['result'].get('txid', [])
+            return True
+
+
+class Request_Cancel_Order(__Private_Request):
+    """
+    Overrides abstract methods from class __Private_Request.
+    Creates a request to cancel an open order.
+    
+    public request variables:
+    txid: transaction id or user reference id of the order(s) to cancel
+
+    public response variables:
+    count:   number of orders canceled
+    pending: if set, order(s) is/are pending cancellation
+    """
+
+    _result_fields = (('count', 0), ('pending', False))
+
+    read_only = False
+
+    def __init__(self):
+        super(Request_Cancel_Order, self).__init__()
+        self.txid = None
+
+        self.count = 0
+        self.pending = False
+
+    def get_method(self):
+        return "CancelOrder"
+
+    def get_dict_data(self):
+        """
+        :ValueError - If txid is not set
+        """
+
+        if self.txid is None or self.txid == '':
+            raise ValueError("CancelOrder needs txid")
+
+        data = self._new_dict_data()
+        data.update({'txid':str(self.txid)})
+        return data
+
+    def validate_response(self, response):
+        if not super(Request_Cancel_Order, self).validate_response(response):
+            return False
+        else:
+            self.count = response['result']['count']
+            self.pending = response['result'].get('pending', False)
+            return True
+
+
+class Request_Cancel_Order_Batch(__Private_Request):
+    """
+    Overrides abstract methods from class __Private_Request.
+    Creates a request to cancel multiple open orders at once.
+    
+    public request variables:
+    txid: list with transaction ids or user reference ids of the orders to cancel (50 maximum)
+
+    public response variables:
+    count: number of orders canceled
+    """
+
+    _result_fields = (('count', 0),)
+
+    read_only = False
+
+    def __init__(self):
+        super(Request_Cancel_Order_Batch, self).__init__()
+        self.txid = []
+
+        self.count = 0
+
+    def get_method(self):
+        return "CancelOrderBatch"
+
+    def get_dict_data(self):
+        """
+        :ValueError - If txid is empty, has more than 50 ids or an id is not set
+        """
+
+        if not self.txid or len(self.txid) > 50:
+            raise ValueError("CancelOrderBatch needs 1 to 50 txids")
+
+        data = self._new_dict_data()
+        for i, id in enumerate(self.txid):
+            if id is None or id == '':
+                raise ValueError("CancelOrderBatch txid " + str(i) + " is not set")
+            data.update({'orders[' + str(i) + ']':str(id)})
+        return data
+
+    def validate_response(self, response):
+        if not super(Request_Cancel_Order_Batch, self).validate_response(response):
+            return False
+        else:
+            self.count = response['result']['count']
+            return True
+
+
+class Request_Cancel_All(__Private_Request):
+    """
+    Overrides abstract methods from class __Private_Request.
+    Creates a request to cancel all open orders.
+
+    public response variables:
+    count: number of orders canceled
+    """
+
+    _result_fields = (('count', 0),)
+
+    read_only = False
+
+    def __init__(self):
+        super(Request_Cancel_All, self).__init__()
+        self.count = 0
+
+    def get_method(self):
+        return "CancelAll"
+
+    def get_dict_data(self):
+        return self.dict
+
+    def validate_response(self, response):
+        if not super(Request_Cancel_All, self).validate_response(response):
+            return False
+        else:
+            self.count = response['result']['count']
+            return True
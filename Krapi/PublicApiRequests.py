@@ -20,7 +20,9 @@
 #OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #SOFTWARE.
 
-from Request import Request
+from Request import Request, Result_Field
+from Records import Record_View, Candle, Book_Level, Trade
+from functools import partial
 from abc import ABCMeta, abstractmethod
 
 class __Public_Request(Request):
@@ -71,6 +73,14 @@ class Request_Time(__Public_Request):
     unixtime: contains the server time after successfull request
     rfc1123:  contains the server time  in rfc1123 standard after successfull request
     """
+
+    _result_fields = (('unixtime', None), ('rfc1123', None))
+
+    unixtime = Result_Field('unixtime')
+    rfc1123 = Result_Field('rfc1123')
+
+    # A shared response would be older than the send of the waiting request (see ClockSync.py)
+    coalesce = False
     
     def __init__(self):
         super(Request_Time, self).__init__()
@@ -83,14 +93,6 @@ class Request_Time(__Public_Request):
     def get_dict_data(self):
         return self.dict
 
-    def validate_response(self, response):
-        if not super(Request_Time, self).validate_response(response):
-            return False
-        else:
-            self.unixtime = response['result']['unixtime']
-            self.rfc1123 = response['result']['rfc1123']
-            return True
-
 
 class Request_Assets(__Public_Request):
     """
@@ -103,6 +105,8 @@ class Request_Assets(__Public_Request):
     public response variables:
     asset_dict: dict with asset information and asset strings as keys
     """
+
+    _result_fields = (('asset_dict', None),)
     
     def __init__(self):
         super(Request_Assets, self).__init__()
@@ -144,6 +148,8 @@ class Request_Tradable_Asset_Pairs(__Public_Request):
     public response variables:
     asset_pairs_dict: dict with asset pair information and asset pair strings as keys
     """
+
+    _result_fields = (('asset_pairs_dict', None),)
     
     def __init__(self):
         super(Request_Tradable_Asset_Pairs, self).__init__()
@@ -187,7 +193,13 @@ class Request_Ticker_Information(__Public_Request):
                            -- l = low array(<today>, <last 24 hours>),
                            -- h = high array(<today>, <last 24 hours>),
                            -- o = today's opening price
+
+    public methods:
+    get_best_ask(pair): best ask price of an asset pair as float
+    get_best_bid(pair): best bid price of an asset pair as float
     """
+
+    _result_fields = (('asset_pairs_dict', None),)
     
     def __init__(self):
         super(Request_Ticker_Information, self).__init__()
@@ -210,6 +222,12 @@ class Request_Ticker_Information(__Public_Request):
             self.asset_pairs_dict = response['result']
             return True
 
+    def get_best_ask(self, pair):
+        return float(self.asset_pairs_dict[pair]['a'][0])
+
+    def get_best_bid(self, pair):
+        return float(self.asset_pairs_dict[pair]['b'][0])
+
 
 class Request_OHLC_Data(__Public_Request):
     """
@@ -224,8 +242,17 @@ class Request_OHLC_Data(__Public_Request):
     public response variables:
     asset_pairs_dict: dict with asset pair ticker information. array of array entries(<time>, <open>, <high>, <low>, <close>, <vwap>, <volume>, <count>)
     last_id:          id to be used as since when polling for new, committed OHLC data
+
+    public methods:
+    get_candles(pair): lazy view of Records.Candle for an asset pair
     """
+
+    _result_fields = (('asset_pairs_dict', None), ('last_id', None))
+
+    last_id = Result_Field('last')
     
+    _volatile_fields = (('since', 'since'),)
+
     def __init__(self):
         super(Request_OHLC_Data, self).__init__()
         self.asset_pair_list = self._asset_pair_list
@@ -251,9 +278,12 @@ class Request_OHLC_Data(__Public_Request):
             return False
         else:
             self.asset_pairs_dict = response['result']
-            self.last_id = self.asset_pairs_dict['last']
             return True
 
+    def get_candles(self, pair):
+        rows = self.asset_pairs_dict.get(pair, []) if self.asset_pairs_dict else []
+        return Record_View(rows, partial(Candle.from_response, pair))
+
 
 class Request_Order_Book(__Public_Request):
     """
@@ -268,7 +298,13 @@ class Request_Order_Book(__Public_Request):
     asset_pairs_dict: dict with asset pair order book information. 
                          asks = ask side array of array entries(<price>, <volume>, <timestamp>)
                          bids = bid side array of array entries(<price>, <volume>, <timestamp>)
+
+    public methods:
+    get_asks(pair): lazy view of Records.Book_Level for the ask side of an asset pair
+    get_bids(pair): lazy view of Records.Book_Level for the bid side of an asset pair
     """
+
+    _result_fields = (('asset_pairs_dict', None),)
     
     def __init__(self):
         super(Request_Order_Book, self).__init__()
@@ -295,6 +331,16 @@ class Request_Order_Book(__Public_Request):
             self.asset_pairs_dict = response['result']
             return True
 
+    def get_asks(self, pair):
+        return self.__get_levels(pair, 'asks', 'ask')
+
+    def get_bids(self, pair):
+        return self.__get_levels(pair, 'bids', 'bid')
+
+    def __get_levels(self, pair, field, side):
+        rows = self.asset_pairs_dict[pair][field] if self.asset_pairs_dict and pair in self.asset_pairs_dict else []
+        return Record_View(rows, partial(Book_Level.from_response, pair, side))
+
 
 class Request_Recent_Trades(__Public_Request):
     """
@@ -308,8 +354,17 @@ class Request_Recent_Trades(__Public_Request):
     public response variables:
     asset_pairs_dict: dict with asset pair trade information. array of array entries (<price>, <volume>, <time>, <buy/sell>, <market/limit>, <miscellaneous>)
     last_id:          id to be used as since when polling for new trade data
+
+    public methods:
+    get_trades(pair): lazy view of Records.Trade for an asset pair
     """
+
+    _result_fields = (('asset_pairs_dict', None), ('last_id', None))
+
+    last_id = Result_Field('last')
     
+    _volatile_fields = (('since', 'since'),)
+
     def __init__(self):
         super(Request_Recent_Trades, self).__init__()
         self.asset_pair_list = self._asset_pair_list
@@ -334,11 +389,14 @@ class Request_Recent_Trades(__Public_Request):
             return False
         else:
             self.asset_pairs_dict = response['result']
-            self.last_id = self.asset_pairs_dict['last']
             return True
 
+    def get_trades(self, pair):
+        rows = self.asset_pairs_dict.get(pair, []) if self.asset_pairs_dict else []
+        return Record_View(rows, partial(Trade.from_public, pair))
 
-class Request_Recent_Trades(__Public_Request):
+
+class Request_Spread(__Public_Request):
     """
     Overrides abstract methods from class __Public_Request.
     Creates a request to get spread data for asset pairs.
@@ -351,9 +409,15 @@ class Request_Recent_Trades(__Public_Request):
     asset_pairs_dict: dict with asset pair spread information. array of array entries array of array entries(<time>, <bid>, <ask>)
     last_id:          id to be used as since when polling for new spread data
     """
+
+    _result_fields = (('asset_pairs_dict', None), ('last_id', None))
+
+    last_id = Result_Field('last')
     
+    _volatile_fields = (('since', 'since'),)
+
     def __init__(self):
-        super(Request_Recent_Trades, self).__init__()
+        super(Request_Spread, self).__init__()
         self.asset_pair_list = self._asset_pair_list
         self.since = None
 
@@ -372,9 +436,8 @@ class Request_Recent_Trades(__Public_Request):
         return self.dict
 
     def validate_response(self, response):
-        if not super(Request_Recent_Trades, self).validate_response(response):
+        if not super(Request_Spread, self).validate_response(response):
             return False
         else:
             self.asset_pairs_dict = response['result']
-            self.last_id = self.asset_pairs_dict['last']
             return True
\ No newline at end of file
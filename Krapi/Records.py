@@ -0,0 +1,232 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+from array import array
+from collections import Mapping
+
+class _Record(object):
+    """
+    Base class for compact typed records.
+    Subclasses only declare __slots__, so records carry no per instance dict.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_tuple() == other.to_tuple()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return self.__class__.__name__ + '(' + ', '.join(name + '=' + repr(getattr(self, name)) for name in self.__slots__) + ')'
+
+    def __getstate__(self):
+        return self.to_tuple()
+
+    def __setstate__(self, state):
+        _Record.__init__(self, *state)
+
+    def to_tuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+class Trade(_Record):
+    """
+    A public or private trade.
+    side is 'buy' or 'sell', order_type is 'market' or 'limit'.
+    txid, ordertxid, cost and fee are only set for trades of the own account.
+    """
+
+    __slots__ = ('txid', 'pair', 'time', 'price', 'volume', 'side', 'order_type', 'misc', 'ordertxid', 'cost', 'fee')
+
+    _sides = {'b':'buy', 's':'sell'}
+    _order_types = {'m':'market', 'l':'limit'}
+
+    @classmethod
+    def from_public(cls, pair, row):
+        """
+        :param row: array(<price>, <volume>, <time>, <buy/sell>, <market/limit>, <miscellaneous>) from Trades
+        """
+
+        return cls(None, pair, float(row[2]), float(row[0]), float(row[1]), cls._sides.get(row[3], row[3]),
+                   cls._order_types.get(row[4], row[4]), row[5], None, None, None)
+
+    @classmethod
+    def from_history(cls, txid, info):
+        """
+        :param info: trade info from TradesHistory or QueryTrades
+        """
+
+        return cls(txid, info['pair'], float(info['time']), float(info['price']), float(info['vol']), info['type'],
+                   info['ordertype'], info.get('misc', ''), info.get('ordertxid'), float(info['cost']), float(info['fee']))
+
+
+class Ledger_Entry(_Record):
+    """A ledger entry of the own account"""
+
+    __slots__ = ('ledger_id', 'refid', 'time', 'type', 'aclass', 'asset', 'amount', 'fee', 'balance')
+
+    @classmethod
+    def from_response(cls, ledger_id, info):
+        """
+        :param info: ledger info from Ledgers or QueryLedgers
+        """
+
+        return cls(ledger_id, info['refid'], float(info['time']), info['type'], info['aclass'], info['asset'],
+                   float(info['amount']), float(info['fee']), float(info['balance']))
+
+
+class Candle(_Record):
+    """An OHLC candle"""
+
+    __slots__ = ('pair', 'time', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count')
+
+    @classmethod
+    def from_response(cls, pair, row):
+        """
+        :param row: array(<time>, <open>, <high>, <low>, <close>, <vwap>, <volume>, <count>) from OHLC
+        """
+
+        return cls(pair, int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]),
+                   float(row[5]), float(row[6]), int(row[7]))
+
+
+class Book_Level(_Record):
+    """A price level of an order book. side is 'ask' or 'bid'"""
+
+    __slots__ = ('pair', 'side', 'price', 'volume', 'time')
+
+    @classmethod
+    def from_response(cls, pair, side, row):
+        """
+        :param row: array(<price>, <volume>, <timestamp>) from Depth or a websocket book
+        """
+
+        return cls(pair, side, float(row[0]), float(row[1]), int(float(row[2])))
+
+
+class Order(_Record):
+    """
+    An open or closed order of the own account.
+    price and price2 are the prices of the order description, avg_price is the average execution price.
+    """
+
+    __slots__ = ('txid', 'refid', 'userref', 'status', 'open_time', 'close_time', 'pair', 'side', 'order_type',
+                 'price', 'price2', 'leverage', 'volume', 'volume_exec', 'cost', 'fee', 'avg_price', 'misc', 'oflags')
+
+    @classmethod
+    def from_response(cls, txid, info):
+        """
+        :param info: order info from OpenOrders, ClosedOrders or QueryOrders
+        """
+
+        descr = info.get('descr', {})
+        return cls(txid, info.get('refid'), info.get('userref'), info.get('status'), float(info.get('opentm', 0)),
+                   float(info['closetm']) if 'closetm' in info else None, descr.get('pair'), descr.get('type'),
+                   descr.get('ordertype'), float(descr.get('price') or 0), float(descr.get('price2') or 0),
+                   descr.get('leverage'), float(info.get('vol', 0)), float(info.get('vol_exec', 0)),
+                   float(info.get('cost', 0)), float(info.get('fee', 0)), float(info.get('price', 0)),
+                   info.get('misc', ''), info.get('oflags', ''))
+
+
+class Record_View(object):
+    """
+    Lazy view over raw response data.
+    Records are only built while iterating, so a view costs nothing until it is used.
+    The view references the raw rows, it saves no memory by itself: the rows stay alive
+    as long as the view or the response of the request. Records of to_list() and arrays
+    of columns() don't reference the rows, keep those and reuse or drop the request
+    to hold history compactly.
+
+    public methods:
+    filter()  - returns a new view that only yields records matching a predicate
+    to_list() - materializes all records of the view
+    columns() - returns selected fields of all records as compact arrays
+    """
+
+    def __init__(self, source, factory, predicates = ()):
+        """
+        :type source: list or dict
+        :param source: raw rows of a response. For dicts (and other mappings) factory gets (key, value)
+
+        :type factory: callable
+        :param factory: builds a record from a raw row
+
+        """
+
+        self.__source = source
+        self.__factory = factory
+        self.__predicates = predicates
+
+    def __iter__(self):
+        factory = self.__factory
+        if isinstance(self.__source, Mapping):
+            records = (factory(key, value) for key, value in self.__source.iteritems())
+        else:
+            records = (factory(row) for row in self.__source)
+
+        if not self.__predicates:
+            return records
+        return (record for record in records if all(predicate(record) for predicate in self.__predicates))
+
+    def __len__(self):
+        if not self.__predicates:
+            return len(self.__source)
+        return sum(1 for record in self)
+
+    def __getitem__(self, index):
+        """Index access for list based views without predicates"""
+
+        if self.__predicates or isinstance(self.__source, Mapping):
+            raise TypeError("Index access is only supported for unfiltered list views")
+        return self.__factory(self.__source[index])
+
+    def filter(self, predicate):
+        """
+        :type predicate: callable
+        :param predicate: gets a record and returns True to keep it
+
+        :return Record_View
+        """
+
+        return Record_View(self.__source, self.__factory, self.__predicates + (predicate,))
+
+    def to_list(self):
+        return list(self)
+
+    def columns(self, *fields):
+        """
+        :param fields: numeric record fields like 'time', 'price'
+
+        :return tuple with one array('d') per field
+        """
+
+        result = tuple(array('d') for field in fields)
+        for record in self:
+            for column, field in zip(result, fields):
+                column.append(getattr(record, field))
+        return result
@@ -21,19 +21,50 @@
 #SOFTWARE.
 
 from abc import ABCMeta, abstractmethod
+from collections import Mapping
+import urllib
+import copy
+import json
+import re
 
 class Request:
     """
     Initiates a new request.
+
+    public variables:
+    lazy_result: if True the response is kept as undecoded json. A result field is only 
+                 decoded when it is accessed for the first time, and of a dict of pairs
+                 only the pairs that are read (see Lazy_Response and Result_Field).
+    read_only:   False for requests that change the account (like orders). Set by the class.
+    coalesce:    False for requests whose result depends on when they are sent (like Server Time),
+                 Request_Mgr never answers them with the response of a call in flight. Set by the class.
+
+    public methods:
+    get_post_data(): returns the url encoded POST data
+    freeze():        turns the request into a template for polling loops. The POST data 
+                     is encoded once, only volatile fields (like since or offset) are 
+                     encoded on every send. Call freeze() again after changing other fields.
+    reset():         clears the errors, the response and the result fields of the last send
     """
     
     __metaclass__ = ABCMeta
 
+    # (POST key, attribute) pairs that may change between sends of a frozen request
+    _volatile_fields = ()
+
+    # (attribute, value before the first send) pairs of the response variables, cleared by reset()
+    _result_fields = ()
+
+    read_only = True
+    coalesce = True
+
     def __init__(self):
         self.raw_response = {}
         self.has_errors = False
         self.errors = []
         self.dict = {}
+        self.lazy_result = False
+        self._static_post_data = None
 
     @abstractmethod
     def get_type(self):
@@ -47,11 +78,272 @@ class Request:
     def get_dict_data(self):
         pass
 
+    def get_post_data(self):
+        if self._static_post_data is None:
+            return urllib.urlencode(self.get_dict_data())
+
+        volatile = [(key, getattr(self, attr)) for key, attr in self._volatile_fields if getattr(self, attr) is not None]
+        if not volatile:
+            return self._static_post_data
+        if not self._static_post_data:
+            return urllib.urlencode(volatile)
+        return self._static_post_data + '&' + urllib.urlencode(volatile)
+
+    def freeze(self):
+        volatile_keys = [key for key, attr in self._volatile_fields]
+        data = self.get_dict_data()
+        self._static_post_data = urllib.urlencode([(key, value) for key, value in data.iteritems() if key not in volatile_keys])
+
+    def reset(self):
+        self.raw_response = {}
+        self.has_errors = False
+        self.errors = []
+        for attr, value in self._result_fields:
+            setattr(self, attr, copy.copy(value))
+
     def validate_response(self, response):
-        if 'error' in response:
-            if response['error']:
-                self.has_errors = True
-                self.errors = response['error']
-                return False
+        self.has_errors = False
+        self.errors = []
+
+        if isinstance(response, Lazy_Response):
+            errors = response.get_errors()
+        else:
+            errors = response.get('error')
+
+        if errors:
+            self.has_errors = True
+            self.errors = errors
+            return False
         self.raw_response = response
-        return True
\ No newline at end of file
+        return True
+
+    def get_result(self):
+        """
+        :return the result of the last successfull response. Decodes a lazy response on demand.
+        """
+
+        return self.raw_response['result']
+
+
+class Result_Field(object):
+    """
+    Response variable that is read from the result of the last successfull response
+    on its first access, so a lazy response is only decoded as far as it is read.
+    An assigned value (like the reset value of _result_fields) is returned until the
+    next successfull response.
+    """
+
+    def __init__(self, key):
+        """
+        :type key:  str
+        :param key: key of the variable in the result
+        """
+
+        self.key = key
+        self.__attr = '_result_field_' + key
+
+    def __get__(self, request, owner):
+        if request is None:
+            return self
+
+        response = request.raw_response
+        cached = request.__dict__.get(self.__attr)
+        if cached is not None and cached[0] is response:
+            return cached[1]
+        if not response:
+            return None
+
+        value = response['result'][self.key]
+        request.__dict__[self.__attr] = (response, value)
+        return value
+
+    def __set__(self, request, value):
+        request.__dict__[self.__attr] = (request.raw_response, value)
+
+
+class Lazy_Response(object):
+    """
+    Undecoded api response.
+    The error field is checked without decoding the response. The result is a
+    Lazy_Result that decodes the value of a key on its first access only, so
+    reading one pair doesn't decode the other pairs. Responses whose result
+    is never read are never decoded. decode() decodes the complete response
+    and drops the raw text, so the response is only held once.
+
+    public methods:
+    get_errors() - returns the errors of the response
+    decode()     - decodes the response and returns it as dict
+    """
+
+    # An empty error list as first or as last member of the response
+    _no_errors = re.compile(r'\s*\{\s*"error"\s*:\s*\[\s*\]')
+    _no_errors_last = re.compile(r'"error"\s*:\s*\[\s*\]\s*\}\s*\Z')
+
+    _result_object = re.compile(r'\s*\{\s*(?:"error"\s*:\s*\[\s*\]\s*,\s*)?"result"\s*:\s*(?=\{)')
+
+    def __init__(self, text):
+        self.__text = text
+        self.__decoded = None
+        self.__result = None
+
+    def get_errors(self):
+        if self.__decoded is None:
+            if self._no_errors.match(self.__text) or \
+               self._no_errors_last.match(self.__text, max(0, self.__text.rfind('"error"'))):
+                return []
+        return self.decode().get('error', [])
+
+    def decode(self):
+        if self.__decoded is None:
+            self.__decoded = json.loads(self.__text)
+            self.__text = None
+            self.__result = None
+        return self.__decoded
+
+    def __getitem__(self, key):
+        if key == 'result' and self.__decoded is None:
+            if self.__result is None:
+                match = self._result_object.match(self.__text)
+                if match is None:
+                    return self.decode()['result']
+                self.__result = Lazy_Result(self.__text, match.end())
+            return self.__result
+        return self.decode()[key]
+
+    def __contains__(self, key):
+        if key == 'result' and self.__decoded is None and self._result_object.match(self.__text):
+            return True
+        return key in self.decode()
+
+    def get(self, key, default = None):
+        return self[key] if key in self else default
+
+
+_json_string = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+def _json_nested(depth):
+    """:return pattern for arrays and objects up to depth levels deep"""
+
+    pattern = r'[\[{][^"\[\]{}]*(?:' + _json_string + r'[^"\[\]{}]*)*[\]}]'
+    for level in xrange(1, depth):
+        pattern = r'[\[{][^"\[\]{}]*(?:(?:' + _json_string + '|' + pattern + r')[^"\[\]{}]*)*[\]}]'
+    return pattern
+
+
+class Lazy_Result(Mapping):
+    """
+    Read only view on a json object in undecoded text.
+    A value is decoded on its first access only. If no string before a key contains
+    brackets or escapes (like in all market data), the key is looked up with str.find
+    and its depth is checked by counting brackets. Otherwise and for iterating, the
+    keys are scanned once with regular expressions, still without decoding the values.
+    Objects nested deeper than _max_depth levels are decoded completely then.
+    """
+
+    _max_depth = 6
+
+    _member = re.compile(r'\s*(' + _json_string + r')\s*:\s*(' + _json_string + '|' + _json_nested(_max_depth) +
+                         r'|[-+.\w]+)\s*([,}])')
+
+    _plain = re.compile(r'(?:[^"]*"[^"\\\[\]{}]*")*[^"]*\Z')
+
+    _colon = re.compile(r'\s*:\s*')
+
+    _empty = re.compile(r'\{\s*\}')
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, text, start):
+        """
+        :type text:  str
+        :param text: json text
+
+        :type start:  int
+        :param start: position of the object in text
+        """
+
+        self.__text = text
+        self.__start = start
+        self.__index = None
+        self.__positions = {}
+        self.__values = {}
+
+    def __getitem__(self, key):
+        if key not in self.__values:
+            position = self.__find(key)
+            if position is not None:
+                self.__values[key] = self._decoder.raw_decode(self.__text, position)[0]
+        return self.__values[key]
+
+    def __contains__(self, key):
+        if key not in self.__values and self.__find(key) is None:
+            # The whole object is decoded if it is nested too deep
+            return key in self.__values
+        return True
+
+    def __iter__(self):
+        return iter(self.__get_index())
+
+    def __len__(self):
+        return len(self.__get_index())
+
+    def __find(self, key):
+        """
+        :return position of the value of key in the text or None if the object has no such key
+                or if the whole object was decoded
+        """
+
+        if self.__index is not None:
+            return self.__index.get(key)
+        if key in self.__positions:
+            return self.__positions[key]
+
+        needle = json.dumps(key) if isinstance(key, basestring) else None
+        if needle is None or '\\' in needle:
+            return self.__get_index().get(key)
+
+        text = self.__text
+        start = self.__start
+        position = text.find(needle, start)
+        found = None
+        while position >= 0:
+            colon = self._colon.match(text, position + len(needle))
+            if colon:
+                if not self._plain.match(text, start, position):
+                    return self.__get_index().get(key)
+                # A key of this object starts outside of strings, one level below start
+                if text.count('"', start, position) % 2 == 0 and \
+                   text.count('{', start, position) + text.count('[', start, position) - \
+                   text.count('}', start, position) - text.count(']', start, position) == 1:
+                    found = colon.end()
+                    break
+            position = text.find(needle, position + 1)
+        self.__positions[key] = found
+        return found
+
+    def __get_index(self):
+        """:return dict of the keys and the positions of their values in the text"""
+
+        if self.__index is not None:
+            return self.__index
+
+        text = self.__text
+        index = {}
+        if self._empty.match(text, self.__start):
+            self.__index = index
+            return index
+
+        position = self.__start + 1
+        while True:
+            match = self._member.match(text, position)
+            if match is None:
+                # Nested too deep or malformed, decode the whole object
+                self.__values = self._decoder.raw_decode(text, self.__start)[0]
+                self.__index = dict.fromkeys(self.__values)
+                return self.__index
+            index[json.loads(match.group(1))] = match.start(2)
+            position = match.end()
+            if match.group(3) == '}':
+                break
+        self.__index = index
+        return index
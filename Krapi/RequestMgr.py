@@ -20,20 +20,44 @@
 #OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #SOFTWARE.
 
-from threading import Timer, Lock
+import time
+from threading import Timer, Lock, Event
+from Queue import Queue, Empty
 from CredentialMgr import Credential_Mgr
 from KrakenConnector import Kraken_Connector
-from Request import Request
+from Request import Request, Lazy_Response
+
+class _Flight(object):
+    """One call in flight, shared by identical concurrent requests"""
+
+    def __init__(self):
+        self.done = Event()
+        self.waiters = 0
+        self.response = None
+        self.error = None
+
 
 class Request_Mgr(object):
     """Handles all information needed for requests and sends them"""
 
-    def __init__(self, tier, cred_mgr=None):
+    def __init__(self, tier, cred_mgr=None, url='https://api.kraken.com', transport=None, connections=1, clock=None,
+                 coalesce=True):
         """
         Supported tiers are 2, 3 and 4. 
         They are needed to determine the request limit.
 
-        cred_mgr -- Credential manager for private requests
+        cred_mgr    -- Credential manager for private requests
+        url         -- Base url of the api (e.g. a local MockKrakenServer for benchmarks)
+        transport   -- Transport for the connection, e.g. Transport.Replay_Transport for backtests (optional)
+        connections -- Connections for concurrent public requests from several threads.
+                       Private requests always share one connection, one at a time,
+                       because the api rejects nonces that arrive out of order.
+                       Nonces are shared with other connectors of the same key,
+                       e.g. an OrderSubmitter.Order_Submitter (see KrakenConnector.Nonce_Source).
+                       Ignored if a transport is given.
+        clock       -- Returns the unix time for nonces and time ranges, e.g. ClockSync.Clock_Sync.time (optional)
+        coalesce    -- Identical public or read only private requests sent concurrently from
+                       several threads share one call (see send_request())
 
         :ValueError - If tier is not supported
         
@@ -59,7 +83,7 @@ class Request_Mgr(object):
         self._credentials = None
 
         if cred_mgr:
-            if isinstance(cred_mgr, CredentialMgr) and cred_mgr.get_credentials() != None:
+            if isinstance(cred_mgr, Credential_Mgr) and cred_mgr.get_credentials() != None:
                 self._credentials = cred_mgr
                 self._credentials_set = True
 
@@ -67,7 +91,16 @@ class Request_Mgr(object):
         self.__timer = Timer(self._request_reduce_interval, self.__update_requests)
         self.__timer.daemon = True
         self.__timer.start()
-        self.__connection = Kraken_Connector()
+        self.__clock = clock if clock else time.time
+        self.__connection = Kraken_Connector(url, transport, self.__clock)
+        self.__connection_lock = Lock()
+        self.__url = url
+        self.__pool = Queue()
+        self.__pool_size = connections - 1 if transport is None else 0
+        self.__pool_created = 0
+        self.__coalesce = coalesce
+        self.__flights = {}
+        self.coalesced_requests = 0
 
     def __del__(self):
         self.__timer.cancel()
@@ -92,6 +125,22 @@ class Request_Mgr(object):
                 return True
         return False
 
+    def set_clock(self, clock):
+        """
+        Sets the clock for nonces and time(), e.g. the time method of a ClockSync.Clock_Sync
+        that itself sends its Time requests through this manager.
+        """
+
+        self.__clock = clock if clock else time.time
+        self.__connection.set_clock(self.__clock)
+
+    def time(self):
+        """
+        :return current unix time of the clock, use it for since, start and end of time ranges
+        """
+
+        return self.__clock()
+
     def send_request(self, request):
         """
         Send a request to api.kraken.com.
@@ -99,6 +148,13 @@ class Request_Mgr(object):
         :type request: derived class from Request.Request
         :param requst: public or private request for api.kraken.com
 
+        Public and read only private requests (Request.read_only) with the same method and
+        POST data that are sent while such a request is in flight don't send again.
+        They wait for the call in flight and are validated with its response, so
+        they don't spend rate budget. Shared responses must be treated as read only.
+        coalesced_requests counts the requests that were served this way.
+        Requests whose timing matters (Request.coalesce is False, like Server Time) are always sent.
+
         :return - None - If send limit is excided or no key for private request is set. 
                   False - If request contains errors
                   True - If request was successfull
@@ -109,22 +165,101 @@ class Request_Mgr(object):
         if not isinstance(request, Request):
             raise ValueError("Request parameter was no derived class of Request-Class")
 
-        if request.get_type == 'private' and (not self._credentials_set or not self._credentials.get_credentials()) :
+        if request.get_type() == 'private' and (not self._credentials_set or not self._credentials.get_credentials()) :
             return None
 
-        # To avoid the 15 minute ban
-        if self._current_requests == self._max_requests:
-            return None
-        
-        if request.get_type() == 'private' :
+        if not self.__coalesce or not request.coalesce or not (request.get_type() == 'public' or request.read_only):
+            response = self.__query(request)
+            return None if response is None else request.validate_response(response)
+
+        key = (request.get_type(), request.get_method(), request.get_post_data(), request.lazy_result)
+        with self.__mutex:
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self.__flights[key] = flight
+            else:
+                flight.waiters += 1
+                self.coalesced_requests += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return None if flight.response is None else request.validate_response(flight.response)
+
+        response = None
+        try:
+            response = self.__query(request)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
             with self.__mutex:
+                del self.__flights[key]
+                shared = flight.waiters > 0
+            flight.response = response
+            if shared and isinstance(response, Lazy_Response):
+                # Decoding is not thread safe, decode once before the response is shared
+                try:
+                    response.decode()
+                except ValueError as error:
+                    flight.error = error
+            flight.done.set()
+
+        return None if response is None else request.validate_response(response)
+
+    def __query(self, request):
+        """
+        Sends a request within the rate budget.
+
+        :return response or None if the send limit is reached
+        """
+
+        # To avoid the 15 minute ban
+        with self.__mutex:
+            if self._current_requests == self._max_requests:
+                return None
+
+            if request.get_type() == 'private' :
                 self._current_requests += 1
 
         if request.get_type() == 'private':
-            return request.validate_response(self.__connection.query_request(request, self._credentials))
+            with self.__connection_lock:
+                response = self.__connection.query_request(request, self._credentials)
+
+        elif not self.__pool_size:
+            with self.__connection_lock:
+                response = self.__connection.query_request(request)
 
         else:
-            return request.validate_response(self.__connection.query_request(request))
+            connection = self.__acquire_connection()
+            try:
+                response = connection.query_request(request)
+            finally:
+                self.__pool.put(connection)
+
+        return response
+
+    def __acquire_connection(self):
+        """
+        Takes an idle connection of the pool for a public request.
+        Connections are opened on demand, up to connections - 1 besides the private one.
+        """
+
+        try:
+            return self.__pool.get_nowait()
+        except Empty:
+            pass
+
+        with self.__mutex:
+            create = self.__pool_created < self.__pool_size
+            if create:
+                self.__pool_created += 1
+        if create:
+            return Kraken_Connector(self.__url)
+        return self.__pool.get()
                                              
     def __update_requests(self):
         """
@@ -0,0 +1,180 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+from array import array
+
+class Ring_Buffer(object):
+    """
+    Fixed capacity buffer of numbers backed by one array.
+    Appending overwrites the oldest value once the buffer is full, so memory
+    stays bounded however many values are appended.
+
+    Sum and sum of squares of the contained values are kept up to date on every
+    append, so mean(), variance() and stdev() are O(1). They are kept relative to
+    a shift close to the values (prices are far from zero, plain squares of them
+    would cancel out in the variance) and recomputed from the values once per
+    capacity appends to bound rounding drift.
+
+    public methods:
+    append()   - appends a value, O(1)
+    extend()   - appends many values
+    to_array() - the values from oldest to newest as array
+    last()     - the newest n values from oldest to newest as array
+    mean(), variance(), stdev(), quantile(), quantiles()
+    clear()
+
+    public variables:
+    capacity: maximum number of values
+
+    """
+
+    def __init__(self, capacity, typecode = 'd'):
+        """
+        :type capacity:  int
+        :param capacity: maximum number of values
+
+        :type typecode:  str
+        :param typecode: array typecode of the values
+
+        :ValueError - If capacity is not positive
+        """
+
+        if capacity <= 0:
+            raise ValueError("Capacity has to be positive")
+
+        self.capacity = capacity
+        self.__values = array(typecode, [0] * capacity)
+        self.__start = 0
+        self.__count = 0
+        self.__shift = 0.0
+        self.__sum = 0.0
+        self.__sum_squares = 0.0
+        self.__appends = 0
+
+    def __len__(self):
+        return self.__count
+
+    def __getitem__(self, index):
+        """Index 0 is the oldest value, -1 the newest"""
+
+        if index < 0:
+            index += self.__count
+        if index < 0 or index >= self.__count:
+            raise IndexError("Ring buffer index out of range")
+        return self.__values[(self.__start + index) % self.capacity]
+
+    def __iter__(self):
+        return iter(self.to_array())
+
+    def append(self, value):
+        values = self.__values
+        if self.__count < self.capacity:
+            position = (self.__start + self.__count) % self.capacity
+            self.__count += 1
+        else:
+            position = self.__start
+            old = values[position] - self.__shift
+            self.__sum -= old
+            self.__sum_squares -= old * old
+            self.__start = (self.__start + 1) % self.capacity
+
+        values[position] = value
+        if self.__count == 1:
+            self.__shift = float(values[position])
+        value = values[position] - self.__shift
+        self.__sum += value
+        self.__sum_squares += value * value
+
+        self.__appends += 1
+        if self.__appends >= self.capacity:
+            self.__appends = 0
+            current = self.to_array()
+            self.__shift = float(sum(current)) / len(current)
+            self.__sum = sum(v - self.__shift for v in current)
+            self.__sum_squares = sum((v - self.__shift) ** 2 for v in current)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def clear(self):
+        self.__start = 0
+        self.__count = 0
+        self.__shift = 0.0
+        self.__sum = 0.0
+        self.__sum_squares = 0.0
+        self.__appends = 0
+
+    def to_array(self):
+        end = self.__start + self.__count
+        if end <= self.capacity:
+            return self.__values[self.__start:end]
+        return self.__values[self.__start:] + self.__values[:end - self.capacity]
+
+    def last(self, n):
+        """:return the newest n values (all if n >= len) from oldest to newest"""
+
+        values = self.to_array()
+        return values[max(0, len(values) - n):]
+
+    def sum(self):
+        return self.__sum + self.__shift * self.__count
+
+    def mean(self):
+        return self.__shift + self.__sum / self.__count if self.__count else float('nan')
+
+    def variance(self):
+        """:return sample variance (nan for less than two values)"""
+
+        n = self.__count
+        if n < 2:
+            return float('nan')
+        return max(0.0, (self.__sum_squares - self.__sum * self.__sum / n) / (n - 1))
+
+    def stdev(self):
+        return self.variance() ** 0.5
+
+    def quantile(self, q, n = None):
+        return self.quantiles([q], n)[0]
+
+    def quantiles(self, qs, n = None):
+        """
+        :type qs:  list
+        :param qs: quantiles between 0 and 1
+
+        :type n:  int
+        :param n: only use the newest n values (default all)
+
+        :return list with the linearly interpolated quantiles (nan if the buffer is empty)
+        """
+
+        values = sorted(self.to_array() if n is None else self.last(n))
+        if not values:
+            return [float('nan')] * len(qs)
+
+        result = []
+        for q in qs:
+            position = q * (len(values) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(values) - 1)
+            result.append(values[lower] + (values[upper] - values[lower]) * (position - lower))
+        return result
@@ -0,0 +1,435 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import os
+import sys
+import json
+import mmap
+import struct
+import time
+from collections import OrderedDict
+from Records import Candle
+from TickerTracker import Ticker_Tracker, parse_ticker
+
+_MAGIC = 'KRSM1\0\0\0'
+_HEADER = struct.Struct('<8sI')
+_SEQ = struct.Struct('<Q')
+_UPDATED = struct.Struct('<d')
+_SECTION_HEADER = 16
+_ALIGN = 64
+_CANDLE_FIELDS = 8
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class _Layout(object):
+    """Offsets and payload structs of a shared segment, derived from the directory"""
+
+    def __init__(self, pairs, depth, candles, data_offset):
+        self.pairs = list(pairs)
+        self.depth = depth
+        self.candles = candles
+        self.ticker = struct.Struct('<' + 'd' * len(Ticker_Tracker.fields))
+        self.book = struct.Struct('<II' + 'd' * 4 * depth)
+        self.candle_rows = struct.Struct('<II' + 'd' * _CANDLE_FIELDS * candles)
+        self.offsets = {}
+
+        offset = data_offset
+        for pair in self.pairs:
+            for kind, payload in (('ticker', self.ticker), ('book', self.book), ('candles', self.candle_rows)):
+                self.offsets[(pair, kind)] = offset
+                offset = _align(offset + _SECTION_HEADER + payload.size)
+        self.size = offset
+
+
+class Shared_Market_Writer(object):
+    """
+    Writes the latest tickers, order books and candles of a fixed set of pairs
+    into a memory mapped file for Shared_Market_Reader in other processes.
+
+    File layout: magic, directory length, json directory (pairs, depth, candles),
+    then one section per pair and kind ('ticker', 'book', 'candles') aligned to
+    64 bytes. A section is an 8 byte sequence number, the 8 byte time of the last
+    write and the payload.
+
+    Every section is protected by its own seqlock: the sequence number is odd while
+    the section is written and incremented again afterwards. Readers retry if the
+    sequence number was odd or changed while they read, so neither side ever waits
+    for a lock. There must be only one writer per file.
+    The file is created under a temporary name and renamed, so readers never see
+    a partial directory.
+
+    public methods:
+    write_ticker()  - writes a ticker of the api
+    write_book()    - writes an order book of the api (dict with 'asks' and 'bids')
+    write_candles() - writes the newest candles (rows of OHLC)
+    close()
+
+    """
+
+    def __init__(self, path, pairs, depth = 10, candles = 60):
+        """
+        :type path:  str
+        :param path: file of the segment, /dev/shm keeps it in memory on linux
+
+        :type pairs:  list
+        :param pairs: asset pairs of the segment
+
+        :type depth:  int
+        :param depth: order book levels per side
+
+        :type candles:  int
+        :param candles: newest candles kept per pair
+        """
+
+        directory = json.dumps({'pairs':list(pairs), 'depth':depth, 'candles':candles})
+        data_offset = _align(_HEADER.size + len(directory))
+        self.__layout = _Layout(pairs, depth, candles, data_offset)
+        self.__sequences = dict((key, 0) for key in self.__layout.offsets)
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(_HEADER.pack(_MAGIC, len(directory)) + directory)
+            temp_file.truncate(self.__layout.size)
+        self.__file = open(temp_path, 'r+b')
+        self.__mm = mmap.mmap(self.__file.fileno(), self.__layout.size)
+        os.rename(temp_path, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write_ticker(self, pair, ticker):
+        """
+        :param ticker: ticker of an asset pair from Ticker
+        """
+
+        layout = self.__layout
+        self.__write(pair, 'ticker', layout.ticker, parse_ticker(ticker))
+
+    def write_book(self, pair, book):
+        """
+        :param book: order book of an asset pair from Depth, {'asks':rows, 'bids':rows}.
+                     Levels beyond depth are dropped.
+        """
+
+        depth = self.__layout.depth
+        asks = book.get('asks', [])[:depth]
+        bids = book.get('bids', [])[:depth]
+        values = [len(asks), len(bids)]
+        for rows in (asks, bids):
+            for row in rows:
+                values.append(float(row[0]))
+                values.append(float(row[1]))
+            values.extend((0.0, 0.0) * (depth - len(rows)))
+        self.__write(pair, 'book', self.__layout.book, values)
+
+    def write_candles(self, pair, rows):
+        """
+        :param rows: candles of an asset pair from OHLC in time order, only the newest are kept
+        """
+
+        count = self.__layout.candles
+        rows = rows[-count:] if count else []
+        values = [len(rows), 0]
+        for row in rows:
+            values.extend(float(value) for value in row[:_CANDLE_FIELDS])
+        values.extend((0.0,) * (_CANDLE_FIELDS * (count - len(rows))))
+        self.__write(pair, 'candles', self.__layout.candle_rows, values)
+
+    def close(self):
+        if self.__mm is not None:
+            self.__mm.close()
+            self.__file.close()
+            self.__mm = None
+
+    def __write(self, pair, kind, payload, values):
+        key = (pair, kind)
+        offset = self.__layout.offsets.get(key)
+        if offset is None:
+            raise ValueError("Pair " + str(pair) + " is not part of the segment")
+
+        mm = self.__mm
+        sequence = self.__sequences[key] + 1
+        _SEQ.pack_into(mm, offset, sequence)
+        _UPDATED.pack_into(mm, offset + 8, time.time())
+        payload.pack_into(mm, offset + _SECTION_HEADER, *values)
+        _SEQ.pack_into(mm, offset, sequence + 1)
+        self.__sequences[key] = sequence + 1
+
+
+class Shared_Market_Reader(object):
+    """
+    Reads a segment of Shared_Market_Writer without locks and without copying the file.
+
+    Values are unpacked straight from the mapped file. A read is retried until the
+    section's sequence number was even and unchanged around it (see Shared_Market_Writer).
+
+    public methods:
+    get_ticker()    - ticker of a pair as dict (fields of TickerTracker.Ticker_Tracker)
+    get_best_ask(), get_best_bid()
+    get_book()      - (asks, bids) as lists of (price, volume)
+    get_candles()   - newest candles as Records.Candle
+    get_updated()   - time of the last write of a pair and kind
+    get_pairs()     - pairs of the segment
+    reopen()        - maps the file again if the writer created a new one
+    close()
+
+    """
+
+    def __init__(self, path, timeout = 1.0):
+        """
+        :type path:  str
+        :param path: file of the segment
+
+        :type timeout:  float
+        :param timeout: seconds to retry the read of a section that is written
+
+        :IOError - If the file is no segment of Shared_Market_Writer
+        """
+
+        self.__path = path
+        self.__timeout = timeout
+        self.__mm = None
+        self.__open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_pairs(self):
+        return list(self.__layout.pairs)
+
+    def get_ticker(self, pair):
+        """:return dict with the ticker fields or None if no ticker was written yet"""
+
+        section = self.__read(pair, 'ticker', self.__layout.ticker)
+        return dict(zip(Ticker_Tracker.fields, section[1])) if section else None
+
+    def get_best_ask(self, pair):
+        section = self.__read(pair, 'ticker', self.__layout.ticker)
+        return section[1][0] if section else None
+
+    def get_best_bid(self, pair):
+        section = self.__read(pair, 'ticker', self.__layout.ticker)
+        return section[1][3] if section else None
+
+    def get_book(self, pair):
+        """:return tuple (asks, bids) with lists of (price, volume) or None if no book was written yet"""
+
+        section = self.__read(pair, 'book', self.__layout.book)
+        if not section:
+            return None
+        values = section[1]
+        depth = self.__layout.depth
+        n_asks, n_bids = values[0], values[1]
+        asks = [(values[2 + 2 * i], values[3 + 2 * i]) for i in xrange(n_asks)]
+        bid_start = 2 + 2 * depth
+        bids = [(values[bid_start + 2 * i], values[bid_start + 1 + 2 * i]) for i in xrange(n_bids)]
+        return (asks, bids)
+
+    def get_candles(self, pair):
+        """:return list with the newest candles as Records.Candle, empty if none were written yet"""
+
+        section = self.__read(pair, 'candles', self.__layout.candle_rows)
+        if not section:
+            return []
+        values = section[1]
+        candles = []
+        for i in xrange(values[0]):
+            row = values[2 + i * _CANDLE_FIELDS:2 + (i + 1) * _CANDLE_FIELDS]
+            candles.append(Candle(pair, int(row[0]), row[1], row[2], row[3], row[4], row[5], row[6], int(row[7])))
+        return candles
+
+    def get_updated(self, pair, kind = 'ticker'):
+        """:return unix time of the last write of a pair and kind, None if never written"""
+
+        section = self.__read(pair, kind)
+        return section[0] if section else None
+
+    def reopen(self):
+        """
+        Maps the file again if it was replaced by a new writer.
+
+        :return True if the file was mapped again
+        """
+
+        if os.stat(self.__path).st_ino == self.__inode:
+            return False
+        self.close()
+        self.__open()
+        return True
+
+    def close(self):
+        if self.__mm is not None:
+            self.__mm.close()
+            self.__mm = None
+
+    def __open(self):
+        with open(self.__path, 'rb') as segment_file:
+            self.__inode = os.fstat(segment_file.fileno()).st_ino
+            mm = mmap.mmap(segment_file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        magic, length = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC:
+            mm.close()
+            raise IOError(self.__path + " is no shared market data segment")
+        directory = json.loads(mm[_HEADER.size:_HEADER.size + length])
+        self.__layout = _Layout(directory['pairs'], directory['depth'], directory['candles'],
+                                _align(_HEADER.size + length))
+        self.__mm = mm
+
+    def __read(self, pair, kind, payload = None):
+        """
+        :return tuple (time of the write, payload values) of a consistent read or None if never written.
+                Without payload only the time is read, the values are None then.
+
+        :KeyError  - If the pair is not part of the segment
+        :Exception - If no consistent read succeeded within timeout
+        """
+
+        mm = self.__mm
+        offset = self.__layout.offsets[(pair, kind)]
+        deadline = None
+        attempt = 0
+        while True:
+            sequence = _SEQ.unpack_from(mm, offset)[0]
+            if not sequence:
+                return None
+            if not sequence & 1:
+                updated = _UPDATED.unpack_from(mm, offset + 8)[0]
+                values = payload.unpack_from(mm, offset + _SECTION_HEADER) if payload else None
+                if _SEQ.unpack_from(mm, offset)[0] == sequence:
+                    return (updated, values)
+
+            attempt += 1
+            if attempt > 100:
+                # The writer may have been preempted in the middle of a write, let it run
+                if deadline is None:
+                    deadline = time.time() + self.__timeout
+                elif time.time() > deadline:
+                    break
+                time.sleep(0.0001)
+        raise Exception("No consistent read of " + kind + " " + pair)
+
+
+class Market_Publisher(object):
+    """
+    Polls tickers, order books and candles through one Request_Mgr and publishes
+    them with a Shared_Market_Writer, so worker processes read market data with
+    Shared_Market_Reader instead of polling themselves.
+
+    Polling is done by a SubscriptionMgr.Subscription_Mgr: one Ticker request for
+    all pairs, Depth and OHLC (one minute candles) per pair, only changes are written.
+
+    public methods:
+    start() - creates the segment and starts polling
+    stop()  - stops polling and closes the segment
+
+    """
+
+    def __init__(self, req_mgr, path, pairs, depth = 10, candles = 60, calls_per_second = 1.0,
+                 books = True, ohlc = True):
+        """
+        :type req_mgr:  RequestMgr.Request_Mgr
+        :param req_mgr: request manager for the polls
+
+        :type calls_per_second:  float
+        :param calls_per_second: rate budget of all polls
+
+        Other parameters see Shared_Market_Writer.
+        """
+
+        from SubscriptionMgr import Subscription_Mgr
+
+        self.pairs = list(pairs)
+        self.__path = path
+        self.__depth = depth
+        self.__candles = candles
+        self.__books = books
+        self.__ohlc = ohlc
+        self.__subscription_mgr = Subscription_Mgr(req_mgr, calls_per_second)
+        self.__writer = None
+        self.__rows = dict((pair, OrderedDict()) for pair in self.pairs)
+
+    def start(self):
+        self.__writer = Shared_Market_Writer(self.__path, self.pairs, self.__depth, self.__candles)
+        for pair in self.pairs:
+            self.__subscription_mgr.subscribe('Ticker', pair, self.__publish)
+            if self.__books:
+                self.__subscription_mgr.subscribe('Depth', pair, self.__publish)
+            if self.__ohlc:
+                self.__subscription_mgr.subscribe('OHLC', pair, self.__publish)
+        self.__subscription_mgr.start()
+
+    def stop(self):
+        self.__subscription_mgr.stop()
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+
+    def __publish(self, endpoint, pair, data):
+        if endpoint == 'Ticker':
+            self.__writer.write_ticker(pair, data)
+        elif endpoint == 'Depth':
+            self.__writer.write_book(pair, data)
+        elif endpoint == 'OHLC':
+            rows = self.__rows[pair]
+            for row in data:
+                rows[row[0]] = row
+            while len(rows) > self.__candles:
+                rows.popitem(last = False)
+            self.__writer.write_candles(pair, rows.values())
+
+
+def main(argv=None):
+    import argparse
+    from RequestMgr import Request_Mgr
+
+    parser = argparse.ArgumentParser(description='Publishes Kraken market data into a shared memory segment')
+    parser.add_argument('path', help='file of the segment, e.g. /dev/shm/krapi-market')
+    parser.add_argument('pairs', nargs='+', help='asset pairs like XXBTZEUR')
+    parser.add_argument('--url', default='https://api.kraken.com')
+    parser.add_argument('--tier', type=int, default=2)
+    parser.add_argument('--depth', type=int, default=10, help='order book levels per side')
+    parser.add_argument('--candles', type=int, default=60, help='newest one minute candles per pair')
+    parser.add_argument('--calls-per-second', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    publisher = Market_Publisher(Request_Mgr(args.tier, url = args.url), args.path, args.pairs, args.depth,
+                                 args.candles, args.calls_per_second)
+    publisher.start()
+    print 'Publishing ' + ', '.join(args.pairs) + ' to ' + args.path
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        publisher.stop()
+
+if __name__ == "__main__":
+    main()
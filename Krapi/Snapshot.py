@@ -0,0 +1,307 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import time
+from collections import Mapping
+from threading import Thread, Event
+from PublicApiRequests import Request_Ticker_Information, Request_Order_Book
+from PrivateApiRequests import Request_Balance
+from ClockSync import Clock_Sync
+
+class _Frozen_Dict(Mapping):
+    """Read only view of a decoded response. Nested dicts and lists are frozen on access."""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return _freeze(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '_Frozen_Dict(' + repr(self._data) + ')'
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return _Frozen_Dict(value)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class _Immutable(object):
+    """Base class for snapshot objects, attributes are set once in the constructor"""
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(self.__class__.__name__ + " is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(self.__class__.__name__ + " is immutable")
+
+
+class Snapshot_Component(_Immutable):
+    """
+    One response of a snapshot.
+
+    public variables:
+    name:            'Ticker', 'Depth <pair>' or 'Balance'
+    sent:            local unix time before the request was sent
+    received:        local unix time after the response was received
+    server_sent:     sent in server time (equal to sent if not aligned)
+    server_received: received in server time (equal to received if not aligned)
+    data:            read only result of the response
+    """
+
+    __slots__ = ('name', 'sent', 'received', 'server_sent', 'server_received', 'data')
+
+    def get_latency(self):
+        return self.received - self.sent
+
+    def get_midpoint(self):
+        """:return best estimate of the server time the data was taken at"""
+
+        return (self.server_sent + self.server_received) / 2
+
+
+class Snapshot(_Immutable):
+    """
+    Immutable view of tickers, order books and balances requested at the same time.
+
+    The data of a component was taken by the server somewhere between its sent and
+    received time. Skew metrics describe how far apart the components may be:
+
+    skew:         largest distance between the midpoints of two components
+    window:       time from the first send to the last receive, no component
+                  was taken outside this window
+    max_latency:  largest round trip of a component
+    clock_offset: server time - local time that was added to all times (0.0 if not aligned)
+
+    public methods:
+    get_component()  - component by name
+    get_ticker()     - ticker data of a pair
+    get_best_ask(), get_best_bid()
+    get_book()       - order book data ('asks' and 'bids') of a pair
+    get_balances()   - balances of the account
+    """
+
+    __slots__ = ('components', 'pairs', 'time', 'skew', 'window', 'max_latency', 'clock_offset', '_by_name')
+
+    def __init__(self, components, pairs, clock_offset):
+        midpoints = [component.get_midpoint() for component in components]
+        start = min(component.server_sent for component in components)
+        end = max(component.server_received for component in components)
+        _Immutable.__init__(self, components = tuple(components), pairs = tuple(pairs),
+                            time = sum(midpoints) / len(midpoints),
+                            skew = max(midpoints) - min(midpoints),
+                            window = end - start,
+                            max_latency = max(component.get_latency() for component in components),
+                            clock_offset = clock_offset,
+                            _by_name = dict((component.name, component) for component in components))
+
+    def get_component(self, name):
+        return self._by_name.get(name)
+
+    def get_ticker(self, pair):
+        component = self._by_name.get('Ticker')
+        return component.data.get(pair) if component else None
+
+    def get_best_ask(self, pair):
+        ticker = self.get_ticker(pair)
+        return float(ticker['a'][0]) if ticker else None
+
+    def get_best_bid(self, pair):
+        ticker = self.get_ticker(pair)
+        return float(ticker['b'][0]) if ticker else None
+
+    def get_book(self, pair):
+        component = self._by_name.get('Depth ' + pair)
+        return component.data.get(pair) if component else None
+
+    def get_balances(self):
+        component = self._by_name.get('Balance')
+        return component.data if component else None
+
+
+class Snapshot_Builder(object):
+    """
+    Builds snapshots of tickers, order books and the account balance for many pairs.
+
+    All requests of a snapshot are sent concurrently from one thread each and are
+    released at the same moment, so the components are as close to simultaneous as
+    the connections allow. One Ticker request covers all pairs, Depth is requested per pair.
+    Create the Request_Mgr with connections >= number of requests (see get_request_count()),
+    otherwise requests wait for a free connection and the skew grows.
+
+    With align = True local times are converted to server time with the offset
+    of a ClockSync.Clock_Sync, which is refreshed every align_interval seconds.
+
+    public methods:
+    build()             - sends the requests and returns a Snapshot
+    get_request_count() - number of requests per snapshot
+
+    """
+
+    def __init__(self, req_mgr, pairs, depth = 10, books = True, balance = True, align = False,
+                 align_interval = 300, timeout = 30, clock = None):
+        """
+        :type req_mgr:  RequestMgr.Request_Mgr
+        :param req_mgr: request manager, with keys if balance is True
+
+        :type pairs:  list
+        :param pairs: asset pairs
+
+        :type depth:  int
+        :param depth: order book levels per side (None for the api default)
+
+        :type books:  bool
+        :param books: include order books
+
+        :type balance:  bool
+        :param balance: include the account balance
+
+        :type align:  bool
+        :param align: convert times to server time
+
+        :type align_interval:  float
+        :param align_interval: seconds until the clock offset is estimated again
+
+        :type clock:  ClockSync.Clock_Sync
+        :param clock: clock for align (optional). Defaults to an own one, pass a shared
+                      one (e.g. started in the background) to avoid Time requests here.
+
+        :type timeout:  float
+        :param timeout: seconds to wait for all responses
+        """
+
+        self.__req_mgr = req_mgr
+        self.pairs = list(pairs)
+        self.__depth = depth
+        self.__books = books
+        self.__balance = balance
+        self.__align = align
+        self.__timeout = timeout
+        self.__clock = clock
+        if align and clock is None:
+            self.__clock = Clock_Sync(req_mgr, align_interval)
+
+    def get_request_count(self):
+        return 1 + (len(self.pairs) if self.__books else 0) + (1 if self.__balance else 0)
+
+    def build(self):
+        """
+        :return Snapshot
+
+        :Exception - If a request failed or timed out
+        """
+
+        clock_offset = 0.0
+        if self.__align:
+            if not self.__clock.refresh() and self.__clock.get_uncertainty() is None:
+                raise Exception("Time request failed, snapshot can't be aligned")
+            clock_offset = self.__clock.get_offset()
+
+        requests = self.__create_requests()
+        results = [None] * len(requests)
+        errors = [None] * len(requests)
+        go = Event()
+
+        def send(index, name, request):
+            go.wait()
+            sent = time.time()
+            try:
+                success = self.__req_mgr.send_request(request)
+            except Exception as error:
+                errors[index] = error
+                return
+            results[index] = (name, request, sent, time.time(), success)
+
+        threads = [Thread(target = send, args = (index, name, request))
+                   for index, (name, request) in enumerate(requests)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        go.set()
+
+        deadline = time.time() + self.__timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.time()))
+
+        components = []
+        failed = []
+        for index, (name, request) in enumerate(requests):
+            result = results[index]
+            if errors[index] is not None:
+                failed.append(name + ' (' + errors[index].__class__.__name__ + ': ' + str(errors[index]) + ')')
+                continue
+            if result is None:
+                failed.append(name + ' (timeout)')
+                continue
+            name, request, sent, received, success = result
+            if not success:
+                failed.append(name + (' (' + ', '.join(request.errors) + ')' if request.errors else ' (rate limit)'))
+                continue
+            components.append(Snapshot_Component(name = name, sent = sent, received = received,
+                                                 server_sent = sent + clock_offset,
+                                                 server_received = received + clock_offset,
+                                                 data = _freeze(self.__result(request))))
+
+        if failed:
+            raise Exception("Snapshot requests failed: " + ', '.join(failed))
+        return Snapshot(components, self.pairs, clock_offset)
+
+    def __create_requests(self):
+        requests = []
+
+        ticker = Request_Ticker_Information()
+        ticker.asset_pair_list = list(self.pairs)
+        requests.append(('Ticker', ticker))
+
+        if self.__books:
+            for pair in self.pairs:
+                book = Request_Order_Book()
+                book.asset_pair_list = [pair]
+                book.count = self.__depth
+                requests.append(('Depth ' + pair, book))
+
+        if self.__balance:
+            requests.append(('Balance', Request_Balance()))
+
+        return requests
+
+    def __result(self, request):
+        if isinstance(request, Request_Balance):
+            return request.balance_dict
+        return request.asset_pairs_dict
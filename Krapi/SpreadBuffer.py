@@ -0,0 +1,239 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+from bisect import bisect_left
+from RingBuffer import Ring_Buffer
+
+class _Pair_Spreads(object):
+    """Spread samples of one asset pair"""
+
+    def __init__(self, capacity):
+        self.times = Ring_Buffer(capacity)
+        self.bids = Ring_Buffer(capacity)
+        self.asks = Ring_Buffer(capacity)
+        self.spreads = Ring_Buffer(capacity)
+        self.relative = Ring_Buffer(capacity)
+        self.last_row = None
+        # Rows of the newest second kept so far with their number, the overlap of the next poll
+        self.overlap = {}
+
+
+class Spread_Buffer(object):
+    """
+    Keeps the last capacity spread samples (time, bid, ask) per asset pair.
+
+    Samples are fed from Spread requests, which are polled incrementally with
+    since = last_id (see poll()). Every pair is held in fixed capacity arrays
+    (see RingBuffer.py), so memory stays bounded however long a monitor runs.
+    Appending is O(1). The spread (ask - bid) and the relative spread
+    ((ask - bid) / mid) are stored with the samples, so window statistics
+    don't have to touch bid and ask again.
+
+    Window statistics cover all kept samples, the newest n samples or the samples
+    since a unix time start.
+
+    public methods:
+    update()          - adds the samples of a sent Spread request
+    add_samples()     - adds (time, bid, ask) rows of a pair
+    poll()            - sends a Spread request with since and adds the new samples
+    get_samples()     - (times, bids, asks) arrays of a window
+    get_mean_spread() - mean spread of a window
+    get_quantiles()   - spread quantiles of a window
+    get_last()        - newest (time, bid, ask) sample
+    get_pairs()       - pairs with samples
+
+    """
+
+    def __init__(self, capacity = 10000):
+        """
+        :type capacity:  int
+        :param capacity: samples kept per pair
+
+        :ValueError - If capacity is not positive
+        """
+
+        if capacity <= 0:
+            raise ValueError("Capacity has to be positive")
+
+        self.capacity = capacity
+        self.__pairs = {}
+        self.__request = None
+
+    def update(self, request):
+        """
+        :type request:  PublicApiRequests.Request_Spread
+        :param request: successfully sent request
+
+        :return number of added samples
+
+        :ValueError - If the request is no Spread request
+        """
+
+        if request.get_method() != 'Spread':
+            raise ValueError("Request " + request.get_method() + " is not supported")
+
+        added = 0
+        for pair, rows in request.asset_pairs_dict.iteritems():
+            if pair != 'last':
+                added += self.add_samples(pair, rows)
+        return added
+
+    def add_samples(self, pair, rows):
+        """
+        :param rows: (<time>, <bid>, <ask>) rows in time order, as str or float.
+                     Rows older than the newest kept sample are skipped. Rows of the
+                     same second as the newest kept sample are skipped if they were
+                     already kept, compared by (time, bid, ask) and counted, so the
+                     overlap of polls with since isn't added twice, but a second
+                     identical sample within one response is.
+
+        :return number of added samples
+        """
+
+        state = self.__pairs.get(pair)
+        if state is None:
+            state = _Pair_Spreads(self.capacity)
+            self.__pairs[pair] = state
+
+        added = 0
+        times, bids, asks = state.times, state.bids, state.asks
+        spreads, relative = state.spreads, state.relative
+        last_row = state.last_row
+        overlap = state.overlap
+        counts = {}
+        for row in rows:
+            sample = (float(row[0]), float(row[1]), float(row[2]))
+            sample_time, bid, ask = sample
+            if last_row is not None:
+                if sample_time < last_row[0]:
+                    continue
+                if sample_time > last_row[0]:
+                    overlap = {}
+                    counts = {}
+            count = counts.get(sample, 0) + 1
+            counts[sample] = count
+            if count <= overlap.get(sample, 0):
+                continue
+            overlap[sample] = count
+            last_row = sample
+            times.append(sample_time)
+            bids.append(bid)
+            asks.append(ask)
+            spreads.append(ask - bid)
+            relative.append(2 * (ask - bid) / (ask + bid) if ask + bid else 0.0)
+            added += 1
+
+        state.last_row = last_row
+        state.overlap = overlap
+        return added
+
+    def poll(self, req_mgr, pairs):
+        """
+        Sends a Spread request for pairs, incrementally with since from the previous poll.
+
+        :type req_mgr:  RequestMgr.Request_Mgr
+        :param req_mgr: request manager for the request
+
+        :type pairs:  list
+        :param pairs: asset pairs. Another pair list restarts without since.
+
+        :return number of added samples or None if the request failed
+        """
+
+        from PublicApiRequests import Request_Spread
+
+        request = self.__request
+        if request is None or request.asset_pair_list != list(pairs):
+            request = Request_Spread()
+            request.asset_pair_list = list(pairs)
+            request.freeze()
+            self.__request = request
+
+        if not req_mgr.send_request(request):
+            return None
+        request.since = request.last_id
+        return self.update(request)
+
+    def get_samples(self, pair, n = None, start = None):
+        """
+        :return tuple (times, bids, asks) with arrays of the window from oldest to newest
+        """
+
+        state, n = self.__window(pair, n, start)
+        if not n:
+            return ([], [], [])
+        return (state.times.last(n), state.bids.last(n), state.asks.last(n))
+
+    def get_mean_spread(self, pair, n = None, start = None, relative = False):
+        """
+        :type n:  int
+        :param n: newest n samples only (optional)
+
+        :type start:  float
+        :param start: samples since this unix time only (optional)
+
+        :type relative:  bool
+        :param relative: spread relative to the mid price instead of absolute
+
+        :return mean spread of the window, nan without samples
+        """
+
+        state, n = self.__window(pair, n, start)
+        if not n:
+            return float('nan')
+        spreads = state.relative if relative else state.spreads
+        if n == len(spreads):
+            return spreads.mean()
+        return sum(spreads.last(n)) / n
+
+    def get_quantiles(self, pair, qs = (0.5, 0.9, 0.99), n = None, start = None, relative = False):
+        """
+        :return list with the spread quantiles qs of the window (linear interpolation), nan without samples
+        """
+
+        state, n = self.__window(pair, n, start)
+        if not n:
+            return [float('nan')] * len(qs)
+        spreads = state.relative if relative else state.spreads
+        return spreads.quantiles(qs, n)
+
+    def get_last(self, pair):
+        state = self.__pairs.get(pair)
+        return state.last_row if state else None
+
+    def get_pairs(self):
+        return sorted(self.__pairs)
+
+    def __window(self, pair, n, start):
+        """:return tuple (state, number of samples in the window)"""
+
+        state = self.__pairs.get(pair)
+        if state is None:
+            return (None, 0)
+
+        size = len(state.times)
+        if n is None or n > size:
+            n = size
+        if start is not None:
+            times = state.times.last(n)
+            n -= bisect_left(times, start)
+        return (state, n)
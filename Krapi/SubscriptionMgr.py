@@ -0,0 +1,356 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import heapq
+import logging
+import time
+from Queue import Queue, Empty
+from threading import Thread, Condition
+from PublicApiRequests import Request_Ticker_Information, Request_Order_Book, Request_Recent_Trades, Request_Spread, Request_OHLC_Data
+
+_log = logging.getLogger(__name__)
+
+class Subscription(object):
+    """
+    Interest of one consumer in an endpoint and asset pair.
+    Changes are passed to the callback (if any) and queued for changes().
+
+    public methods:
+    changes() - generator over (endpoint, pair, data) changes
+    cancel()  - stops the subscription
+
+    """
+
+    def __init__(self, mgr, endpoint, pair, callback, max_queued):
+        self.endpoint = endpoint
+        self.pair = pair
+        self.active = True
+        self.__mgr = mgr
+        self.__callback = callback
+        self.__queue = Queue(max_queued) if not callback else None
+
+    def changes(self, timeout = None):
+        """
+        Yields changes until the subscription is cancelled or no change arrived within timeout.
+
+        :type timeout:  float
+        :param timeout: seconds to wait for a change (None waits forever)
+
+        :Exception - If the subscription was created with a callback
+        """
+
+        if self.__queue is None:
+            raise Exception("Subscription delivers changes to its callback")
+
+        while self.active:
+            try:
+                change = self.__queue.get(timeout = timeout) if timeout is not None else self.__queue.get()
+            except Empty:
+                return
+            if change is None:
+                return
+            yield change
+
+    def cancel(self):
+        self.__mgr.unsubscribe(self)
+
+    def _deliver(self, change):
+        if self.__callback:
+            self.__callback(*change)
+            return
+
+        # A slow consumer loses the oldest change instead of blocking the poller
+        while True:
+            try:
+                self.__queue.put_nowait(change)
+                return
+            except Exception:
+                try:
+                    self.__queue.get_nowait()
+                except Empty:
+                    pass
+
+    def _close(self):
+        self.active = False
+        if self.__queue is not None:
+            try:
+                self.__queue.put_nowait(None)
+            except Exception:
+                pass
+
+
+class _Feed(object):
+    """One polled request stream shared by all subscriptions of an endpoint and pair"""
+
+    def __init__(self, endpoint, pair, interval):
+        self.endpoint = endpoint
+        self.pair = pair
+        self.interval = interval
+        self.due = 0.0
+        self.subscriptions = []
+        self.last = {}
+        self.request = None
+        self.pairs = set()
+
+    def get_request(self):
+        if self.request is None:
+            if self.endpoint == 'Ticker':
+                request = Request_Ticker_Information()
+                request.asset_pair_list = sorted(self.pairs)
+            else:
+                request = Subscription_Mgr.endpoints[self.endpoint]()
+                request.asset_pair_list = [self.pair]
+            request.freeze()
+            self.request = request
+        return self.request
+
+    def extract_changes(self, request):
+        """
+        :return list with (pair, data) tuples that changed since the last poll
+        """
+
+        result = request.asset_pairs_dict
+        changes = []
+
+        if self.endpoint == 'Ticker':
+            for pair in self.pairs:
+                if pair in result and result[pair] != self.last.get(pair):
+                    self.last[pair] = result[pair]
+                    changes.append((pair, result[pair]))
+
+        elif self.endpoint == 'Depth':
+            book = result.get(self.pair)
+            if book is not None and book != self.last.get(self.pair):
+                self.last[self.pair] = book
+                changes.append((self.pair, book))
+
+        elif self.endpoint == 'OHLC':
+            # The last, uncommitted candle is returned again until it is committed
+            all_rows = result.get(self.pair, [])
+            rows = [row for row in all_rows if row != self.last.get(row[0])]
+            self.last = dict((row[0], row) for row in all_rows)
+            request.since = request.last_id
+            if rows:
+                changes.append((self.pair, rows))
+
+        else:
+            rows = result.get(self.pair, [])
+            request.since = request.last_id
+            if rows:
+                changes.append((self.pair, rows))
+
+        return changes
+
+
+class Subscription_Mgr(object):
+    """
+    Polls public market data once for all subscribers and delivers changes only.
+
+    Ticker subscriptions of all pairs are coalesced into one request. Depth, Trades,
+    Spread and OHLC are polled once per pair, Trades, Spread and OHLC incrementally
+    with since. All polls are issued from one thread through Request_Mgr.send_request
+    and spaced by calls_per_second, so N consumers of a feed cost one call stream.
+    Poll intervals adapt to the observed change rate between min_interval and max_interval.
+    A failing poll (error response or exception) is logged and backs the feed off, an
+    exception of a callback is logged and doesn't stop the delivery to other subscriptions.
+
+    public methods:
+    subscribe()   - registers interest in an endpoint and pair
+    unsubscribe() - removes a subscription
+    start()       - starts polling in a daemon thread
+    stop()        - stops polling
+
+    public variables:
+    errors: number of polls and deliveries that raised an exception
+
+    """
+
+    endpoints = {
+        'Ticker': Request_Ticker_Information,
+        'Depth':  Request_Order_Book,
+        'Trades': Request_Recent_Trades,
+        'Spread': Request_Spread,
+        'OHLC':   Request_OHLC_Data
+    }
+
+    def __init__(self, req_mgr, calls_per_second = 1.0, min_interval = 1.0, max_interval = 30.0, max_queued = 1000):
+        """
+        :type req_mgr:  RequestMgr.Request_Mgr
+        :param req_mgr: request manager used for all polls
+
+        :type calls_per_second:  float
+        :param calls_per_second: rate budget for all feeds together
+
+        :type min_interval:  float
+        :param min_interval: shortest poll interval of a feed in seconds
+
+        :type max_interval:  float
+        :param max_interval: longest poll interval of a feed in seconds
+
+        :type max_queued:  int
+        :param max_queued: changes kept per iterator subscription before the oldest are dropped
+
+        """
+
+        self.__req_mgr = req_mgr
+        self.__call_spacing = 1.0 / calls_per_second
+        self.__min_interval = min_interval
+        self.__max_interval = max_interval
+        self.__max_queued = max_queued
+        self.__feeds = {}
+        self.__schedule = []
+        self.__last_call = 0.0
+        self.__running = False
+        self.__thread = None
+        self.__cond = Condition()
+        self.errors = 0
+
+    def subscribe(self, endpoint, pair, callback = None):
+        """
+        :type endpoint:  str
+        :param endpoint: 'Ticker', 'Depth', 'Trades', 'Spread' or 'OHLC'
+
+        :type pair:  str
+        :param pair: asset pair like 'XXBTZEUR'
+
+        :type callback:  callable
+        :param callback: called with (endpoint, pair, data) on every change (optional).
+                         Without callback changes are read with Subscription.changes().
+
+        :return Subscription
+
+        :ValueError - If the endpoint is not supported
+        """
+
+        if endpoint not in self.endpoints:
+            raise ValueError("Endpoint " + endpoint + " is not supported")
+
+        subscription = Subscription(self, endpoint, pair, callback, self.__max_queued)
+        key = (endpoint, None if endpoint == 'Ticker' else pair)
+
+        with self.__cond:
+            feed = self.__feeds.get(key)
+            if feed is None:
+                feed = _Feed(endpoint, key[1], self.__min_interval)
+                self.__feeds[key] = feed
+                heapq.heappush(self.__schedule, (feed.due, id(feed), feed))
+            if pair not in feed.pairs:
+                feed.pairs.add(pair)
+                feed.request = None
+            feed.subscriptions.append(subscription)
+            self.__cond.notify()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.__cond:
+            key = (subscription.endpoint, None if subscription.endpoint == 'Ticker' else subscription.pair)
+            feed = self.__feeds.get(key)
+            if feed and subscription in feed.subscriptions:
+                feed.subscriptions.remove(subscription)
+                if not [s for s in feed.subscriptions if s.pair == subscription.pair]:
+                    feed.pairs.discard(subscription.pair)
+                    feed.request = None
+                if not feed.subscriptions:
+                    del self.__feeds[key]
+        subscription._close()
+
+    def start(self):
+        self.__running = True
+        self.__thread = Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        with self.__cond:
+            self.__running = False
+            self.__cond.notify()
+        if self.__thread:
+            self.__thread.join()
+
+    def __run(self):
+        while True:
+            with self.__cond:
+                feed = self.__next_feed()
+                if feed is None:
+                    return
+
+            self.__poll(feed)
+
+            with self.__cond:
+                feed.due = time.time() + feed.interval
+                if self.__feeds.get((feed.endpoint, feed.pair)) is feed:
+                    heapq.heappush(self.__schedule, (feed.due, id(feed), feed))
+
+    def __next_feed(self):
+        """Waits for the next due feed within the rate budget. Must hold the lock."""
+
+        while self.__running:
+            # Drop feeds without subscriptions
+            while self.__schedule and self.__feeds.get((self.__schedule[0][2].endpoint, self.__schedule[0][2].pair)) is not self.__schedule[0][2]:
+                heapq.heappop(self.__schedule)
+
+            if not self.__schedule:
+                self.__cond.wait()
+                continue
+
+            due = max(self.__schedule[0][0], self.__last_call + self.__call_spacing)
+            wait = due - time.time()
+            if wait > 0:
+                self.__cond.wait(wait)
+                continue
+
+            self.__last_call = time.time()
+            return heapq.heappop(self.__schedule)[2]
+        return None
+
+    def __poll(self, feed):
+        with self.__cond:
+            request = feed.get_request()
+
+        try:
+            changes = feed.extract_changes(request) if self.__req_mgr.send_request(request) else None
+        except Exception:
+            _log.exception("Polling %s %s failed", feed.endpoint, feed.pair or 'all pairs')
+            self.errors += 1
+            changes = None
+
+        if changes is None:
+            # Rate limit of the request manager, api or connection error, back off
+            feed.interval = min(self.__max_interval, feed.interval * 2)
+            return
+
+        if changes:
+            feed.interval = max(self.__min_interval, feed.interval / 2)
+        else:
+            feed.interval = min(self.__max_interval, feed.interval * 1.5)
+
+        with self.__cond:
+            subscriptions = list(feed.subscriptions)
+
+        for pair, data in changes:
+            for subscription in subscriptions:
+                if subscription.pair == pair and subscription.active:
+                    try:
+                        subscription._deliver((feed.endpoint, pair, data))
+                    except Exception:
+                        _log.exception("Delivering %s %s failed", feed.endpoint, pair)
+                        self.errors += 1
@@ -0,0 +1,163 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+from array import array
+
+class Ticker_Tracker(object):
+    """
+    Keeps the last ticker of every asset pair and reports changed fields only.
+
+    All tickers are stored in one array('d') with a row of len(fields) floats per
+    pair, in the order of get_pairs(). An update parses the new tickers into a
+    second array and compares whole rows of both arrays first (in C), so only the
+    fields of pairs that actually changed are compared and reported one by one.
+    The work per update beyond parsing grows with the number of changes, not
+    with the number of pairs.
+
+    Fields with a threshold are only reported once they moved by at least the
+    threshold since they were reported last, smaller moves add up.
+
+    public methods:
+    update()       - consumes a Ticker request or its result, returns the changes
+    get()          - last value of a field of a pair
+    get_ticker()   - last values of a pair as dict
+    get_column()   - last values of a field for all pairs as array (order of get_pairs())
+    get_pairs()    - tracked pairs
+
+    """
+
+    fields = ('ask', 'ask_whole_lot_volume', 'ask_lot_volume',
+              'bid', 'bid_whole_lot_volume', 'bid_lot_volume',
+              'last', 'last_volume',
+              'volume_today', 'volume_24h',
+              'vwap_today', 'vwap_24h',
+              'trades_today', 'trades_24h',
+              'low_today', 'low_24h',
+              'high_today', 'high_24h',
+              'open')
+
+    def __init__(self, thresholds = None):
+        """
+        :type thresholds:  dict
+        :param thresholds: field -> minimum absolute change to report (optional)
+
+        :ValueError - If a threshold names an unknown field
+        """
+
+        self.__width = len(self.fields)
+        self.__field_index = dict((field, i) for i, field in enumerate(self.fields))
+        self.__thresholds = {}
+        for field, threshold in (thresholds or {}).iteritems():
+            if field not in self.__field_index:
+                raise ValueError("Unknown ticker field " + str(field))
+            self.__thresholds[self.__field_index[field]] = threshold
+
+        self.__pairs = []
+        self.__pair_index = {}
+        self.__values = array('d')
+
+    def update(self, tickers):
+        """
+        :type tickers:  PublicApiRequests.Request_Ticker_Information or dict
+        :param tickers: successfully sent request or its asset_pairs_dict.
+                        Pairs missing in tickers keep their last values.
+
+        :return list of (pair, field, old, new, change) tuples, change = new - old.
+                For new pairs all fields are reported with old and change None.
+        """
+
+        if hasattr(tickers, 'asset_pairs_dict'):
+            tickers = tickers.asset_pairs_dict
+
+        width = self.__width
+        old = self.__values
+        new = array('d', old)
+        new_pairs = []
+        for pair, ticker in tickers.iteritems():
+            row = parse_ticker(ticker)
+            index = self.__pair_index.get(pair)
+            if index is None:
+                self.__pair_index[pair] = len(self.__pairs)
+                self.__pairs.append(pair)
+                new.extend(row)
+                new_pairs.append(pair)
+            else:
+                new[index * width:(index + 1) * width] = row
+
+        changes = []
+        thresholds = self.__thresholds
+        fields = self.fields
+        pairs = self.__pairs
+        for start in xrange(0, len(old), width):
+            end = start + width
+            if new[start:end] == old[start:end]:
+                continue
+            pair = pairs[start // width]
+            for position in xrange(start, end):
+                value, last = new[position], old[position]
+                if value == last:
+                    continue
+                field = position - start
+                if field in thresholds and abs(value - last) < thresholds[field]:
+                    # Too small to report, keep the reported value so small moves add up
+                    new[position] = last
+                    continue
+                changes.append((pair, fields[field], last, value, value - last))
+
+        for pair in new_pairs:
+            start = self.__pair_index[pair] * width
+            changes.extend((pair, field, None, new[start + i], None) for i, field in enumerate(fields))
+
+        self.__values = new
+        return changes
+
+    def get(self, pair, field):
+        index = self.__pair_index.get(pair)
+        if index is None:
+            return None
+        return self.__values[index * self.__width + self.__field_index[field]]
+
+    def get_ticker(self, pair):
+        index = self.__pair_index.get(pair)
+        if index is None:
+            return None
+        start = index * self.__width
+        return dict(zip(self.fields, self.__values[start:start + self.__width]))
+
+    def get_column(self, field):
+        return self.__values[self.__field_index[field]::self.__width]
+
+    def get_pairs(self):
+        return list(self.__pairs)
+
+
+def parse_ticker(ticker):
+    """:return ticker of the api as array in the order of Ticker_Tracker.fields"""
+
+    a, b, c = ticker['a'], ticker['b'], ticker['c']
+    v, p, t, l, h = ticker['v'], ticker['p'], ticker['t'], ticker['l'], ticker['h']
+    o = ticker['o']
+    if isinstance(o, (list, tuple)):
+        o = o[0]
+    return array('d', (float(a[0]), float(a[1]), float(a[2]), float(b[0]), float(b[1]), float(b[2]),
+                       float(c[0]), float(c[1]), float(v[0]), float(v[1]), float(p[0]), float(p[1]),
+                       float(t[0]), float(t[1]), float(l[0]), float(l[1]), float(h[0]), float(h[1]), float(o)))
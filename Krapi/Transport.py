@@ -0,0 +1,427 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import select
+import socket
+import urllib
+import urlparse
+import struct
+import zlib
+import json
+import time
+import os
+from array import array
+from collections import deque
+from threading import Lock
+
+class Http_Transport(object):
+    """
+    Default transport of Kraken_Connector.
+    Sends requests over one persistent http(s) connection. The connection is
+    opened with the first request, creating a transport costs nothing.
+    A request that could not be written is sent again on a new connection. A request
+    whose response is lost is only sent again with resend, the server may have
+    processed it.
+
+    public methods:
+    send()  - sends a POST request and returns the response body
+    close() - closes the connection
+
+    """
+
+    def __init__(self, url = 'https://api.kraken.com'):
+        """
+        :type url:  str
+        :param url: base url of the api (http or https)
+
+        :ValueError - If the url scheme is neither http nor https
+
+        """
+
+        # httplib and ssl are only imported once a transport is created, replays don't need them
+        import httplib
+
+        parsed_url = urlparse.urlparse(url)
+        if parsed_url.scheme == 'https':
+            connection_class = httplib.HTTPSConnection
+        elif parsed_url.scheme == 'http':
+            connection_class = httplib.HTTPConnection
+        else:
+            raise ValueError("Unsupported url scheme: " + parsed_url.scheme + ". Only http and https supported")
+
+        self.__url = url.rstrip('/')
+        self.__connection = connection_class(parsed_url.netloc, timeout = 20)
+        self.__unsent_errors = (httplib.CannotSendRequest, socket.error)
+        self.__lost_errors = (httplib.BadStatusLine, socket.error)
+
+    def send(self, url_suff, body, headers, resend = False):
+        """
+        :type url_suff:  str
+        :param url_suff: url suffix for request
+
+        :type body:  str
+        :param body: url encoded POST data
+
+        :type headers:  dict
+        :param headers: headers for request
+
+        :type resend:  bool
+        :param resend: True if the request may be sent again when the response is lost.
+                       The server may have processed the first send, so only for
+                       public read only requests.
+
+        :return response body as str
+
+        """
+
+        sock = self.__connection.sock
+        if sock is not None and select.select([sock], [], [], 0)[0]:
+            # The server closed the idle keep-alive connection, nothing is pending on it
+            self.__connection.close()
+
+        try:
+            self.__connection.request("POST", self.__url + url_suff, body, headers)
+        except socket.timeout:
+            self.__connection.close()
+            raise
+        except self.__unsent_errors:
+            # The request was not (completely) written, the server can't have processed it
+            self.__connection.close()
+            self.__connection.request("POST", self.__url + url_suff, body, headers)
+
+        try:
+            return self.__connection.getresponse().read()
+        except socket.timeout:
+            self.__connection.close()
+            raise
+        except self.__lost_errors:
+            self.__connection.close()
+            if not resend:
+                raise
+            self.__connection.request("POST", self.__url + url_suff, body, headers)
+            return self.__connection.getresponse().read()
+
+    def close(self):
+        self.__connection.close()
+
+
+class Frame_Log(object):
+    """
+    Append-only log of request/response pairs.
+
+    The log file is a sequence of frames:
+        <uint32 length> <float64 sent time> <float64 latency> <zlib compressed json [url_suff, key, response]>
+
+    Next to the log an index file (<log>.idx) holds one entry per frame:
+        <uint64 offset> <float64 sent time> <uint32 crc32 of url_suff and key>
+    If the index is missing or doesn't start at the first frame it is rebuilt from
+    the whole log, if it is shorter than the log the missing entries are added.
+    In append mode the rebuilt index is written back before new frames are appended
+    and an incomplete last frame (of a crashed recording) is cut off.
+
+    public methods:
+    append()     - appends a frame
+    read()       - reads the frame with the given number
+    find()       - returns frame numbers for a request key in recorded order
+    sent_time()  - returns the sent time of a frame
+    close()      - closes the log
+
+    """
+
+    _frame_header = struct.Struct('<Idd')
+    _index_entry = struct.Struct('<QdI')
+
+    def __init__(self, log_file, mode = 'a'):
+        """
+        :type log_file:  str
+        :param log_file: path to the log file
+
+        :type mode:  str
+        :param mode: 'a' to append frames, 'r' to read frames
+
+        """
+
+        self.__lock = Lock()
+        self.__offsets = array('L')
+        self.__sent = array('d')
+        self.__hashes = array('L')
+        self.__frames_by_hash = None
+
+        if mode == 'a':
+            self.__sync_index(log_file)
+            self.__log = open(log_file, 'ab')
+            self.__index = open(log_file + '.idx', 'ab')
+        elif mode == 'r':
+            self.__log = open(log_file, 'rb')
+            self.__index = None
+            self.__load_index(log_file)
+        else:
+            raise ValueError("Unsupported mode: " + mode + ". Only a and r supported")
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def append(self, sent, latency, url_suff, key, response):
+        blob = zlib.compress(json.dumps([url_suff, key, response]))
+        with self.__lock:
+            self.__log.seek(0, os.SEEK_END)
+            offset = self.__log.tell()
+            self.__log.write(self._frame_header.pack(len(blob), sent, latency) + blob)
+            self.__log.flush()
+            self.__index.write(self._index_entry.pack(offset, sent, _key_hash(url_suff, key)))
+            self.__index.flush()
+            self.__offsets.append(offset)
+            self.__sent.append(sent)
+            self.__hashes.append(_key_hash(url_suff, key))
+            self.__frames_by_hash = None
+
+    def read(self, number):
+        """
+        :return tuple with (sent, latency, url_suff, key, response)
+        """
+
+        with self.__lock:
+            self.__log.seek(self.__offsets[number])
+            length, sent, latency = self._frame_header.unpack(self.__log.read(self._frame_header.size))
+            url_suff, key, response = json.loads(zlib.decompress(self.__log.read(length)))
+        return (sent, latency, url_suff, key, response)
+
+    def find(self, url_suff, key):
+        """
+        :return deque with numbers of the frames recorded for url_suff and key
+        """
+
+        if self.__frames_by_hash is None:
+            self.__frames_by_hash = {}
+            for number, key_hash in enumerate(self.__hashes):
+                self.__frames_by_hash.setdefault(key_hash, []).append(number)
+        return deque(self.__frames_by_hash.get(_key_hash(url_suff, key), ()))
+
+    def sent_time(self, number):
+        return self.__sent[number]
+
+    def close(self):
+        self.__log.close()
+        if self.__index:
+            self.__index.close()
+
+    def __sync_index(self, log_file):
+        """Makes log and index of an existing log match before frames are appended"""
+
+        if not os.path.exists(log_file):
+            if os.path.exists(log_file + '.idx'):
+                os.remove(log_file + '.idx')
+            return
+
+        self.__log = open(log_file, 'rb')
+        try:
+            synced, end = self.__load_index(log_file)
+        finally:
+            self.__log.close()
+
+        if end < os.path.getsize(log_file):
+            with open(log_file, 'r+b') as log:
+                log.truncate(end)
+        if not synced:
+            temp_file = log_file + '.idx.tmp'
+            with open(temp_file, 'wb') as index:
+                for entry in zip(self.__offsets, self.__sent, self.__hashes):
+                    index.write(self._index_entry.pack(*entry))
+            os.rename(temp_file, log_file + '.idx')
+
+    def __load_index(self, log_file):
+        """
+        :return tuple with (True if the index file holds exactly the loaded entries,
+                            offset after the last complete frame)
+        """
+
+        entry_size = self._index_entry.size
+        log_size = os.path.getsize(log_file)
+        synced = os.path.exists(log_file + '.idx')
+        if synced:
+            with open(log_file + '.idx', 'rb') as index:
+                data = index.read()
+            synced = len(data) % entry_size == 0
+            for pos in xrange(0, len(data) - len(data) % entry_size, entry_size):
+                offset, sent, key_hash = self._index_entry.unpack_from(data, pos)
+                # An index that doesn't start at the first frame or points past the log is of no use
+                previous = self.__offsets[-1] if self.__offsets else -1
+                if offset <= previous or offset >= log_size or (previous < 0 and offset != 0):
+                    del self.__offsets[:], self.__sent[:], self.__hashes[:]
+                    synced = False
+                    break
+                self.__offsets.append(offset)
+                self.__sent.append(sent)
+                self.__hashes.append(key_hash)
+
+        offset = 0
+        while self.__offsets:
+            self.__log.seek(self.__offsets[-1])
+            header = self.__log.read(self._frame_header.size)
+            if len(header) == self._frame_header.size:
+                end = self.__offsets[-1] + len(header) + self._frame_header.unpack(header)[0]
+                if end <= log_size:
+                    offset = end
+                    break
+            # The log ends within the last indexed frame
+            self.__offsets.pop()
+            self.__sent.pop()
+            self.__hashes.pop()
+            synced = False
+
+        # Rebuild missing index entries from the log itself
+        while offset + self._frame_header.size <= log_size:
+            self.__log.seek(offset)
+            length, sent, latency = self._frame_header.unpack(self.__log.read(self._frame_header.size))
+            blob = self.__log.read(length)
+            if len(blob) < length:
+                break
+            url_suff, key, response = json.loads(zlib.decompress(blob))
+            self.__offsets.append(offset)
+            self.__sent.append(sent)
+            self.__hashes.append(_key_hash(url_suff, key))
+            offset += self._frame_header.size + length
+            synced = False
+        return (synced, offset)
+
+
+class Record_Transport(object):
+    """
+    Transport that forwards requests to another transport and records
+    every request/response pair in a Frame_Log.
+
+    public methods:
+    send()  - sends a request with the wrapped transport and records it
+    close() - closes the wrapped transport and the log
+
+    """
+
+    def __init__(self, transport, log_file):
+        """
+        :type transport:  Http_Transport
+        :param transport: transport that actually sends the requests
+
+        :type log_file:  str
+        :param log_file: path to the log file. Existing logs are appended to.
+
+        """
+
+        self.__transport = transport
+        self.__log = Frame_Log(log_file, 'a')
+
+    def send(self, url_suff, body, headers, resend = False):
+        sent = time.time()
+        response = self.__transport.send(url_suff, body, headers, resend)
+        self.__log.append(sent, time.time() - sent, url_suff, request_key(body), response)
+        return response
+
+    def close(self):
+        self.__transport.close()
+        self.__log.close()
+
+
+class Replay_Transport(object):
+    """
+    Transport that answers requests from a Frame_Log written by Record_Transport.
+    Requests are matched by url suffix and POST data without nonce.
+    Identical requests are answered in recorded order.
+
+    public methods:
+    send()  - returns the next recorded response for the request
+    clock() - returns the simulated time of the replay
+    close() - closes the log
+
+    """
+
+    def __init__(self, log_file, speed = None):
+        """
+        :type log_file:  str
+        :param log_file: path to the log file
+
+        :type speed:  float
+        :param speed: None replays at full speed. Otherwise the recorded time
+                      between requests is reproduced, divided by speed
+                      (1.0 = real time, 60.0 = one hour per minute).
+
+        """
+
+        self.__log = Frame_Log(log_file, 'r')
+        self.__speed = speed
+        self.__pending = {}
+        self.__start_sent = self.__log.sent_time(0) if len(self.__log) else 0.0
+        self.__start_wall = None
+        self.__now = self.__start_sent
+
+    def send(self, url_suff, body, headers, resend = False):
+        """
+        :Exception - If the log contains no (more) responses for the request
+        """
+
+        key = request_key(body)
+        if (url_suff, key) not in self.__pending:
+            self.__pending[(url_suff, key)] = self.__log.find(url_suff, key)
+
+        frames = self.__pending[(url_suff, key)]
+        while frames:
+            sent, latency, rec_url_suff, rec_key, response = self.__log.read(frames.popleft())
+            if rec_url_suff == url_suff and rec_key == key:
+                break
+        else:
+            raise Exception("No recorded response for " + url_suff + " " + key)
+
+        if self.__speed:
+            if self.__start_wall is None:
+                self.__start_wall = time.time() - (sent - self.__start_sent) / self.__speed
+            delay = self.__start_wall + (sent + latency - self.__start_sent) / self.__speed - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.__now = sent + latency
+        return response
+
+    def clock(self):
+        """
+        :return recorded time at which the last replayed response arrived
+        """
+
+        return self.__now
+
+    def close(self):
+        self.__log.close()
+
+
+def request_key(body):
+    """
+    Normalizes url encoded POST data for matching. The nonce is removed and the
+    parameters are sorted.
+
+    :type body:  str
+    :param body: url encoded POST data
+
+    :return normalized POST data as str
+    """
+
+    return urllib.urlencode(sorted(p for p in urlparse.parse_qsl(body, keep_blank_values=True) if p[0] != 'nonce'))
+
+
+def _key_hash(url_suff, key):
+    return zlib.crc32(url_suff + '?' + key) & 0xffffffff
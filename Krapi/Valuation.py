@@ -0,0 +1,224 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+from array import array
+from collections import deque
+
+_nan = float('nan')
+
+class Portfolio_Valuator(object):
+    """
+    Marks balances of one or many accounts to market in a single quote asset.
+
+    The conversion graph (assets as nodes, asset pairs as edges) is built once from
+    AssetPairs. On every tick update_rates() turns the cached tickers into one rate per
+    asset, walking the graph breadth first from the quote asset, so assets without a
+    direct pair are converted over the fewest intermediate assets (e.g. XREP -> XXBT -> ZEUR).
+    Valuing is then a dot product of a balance vector and the rate vector per account.
+
+    Balance keys are matched to the asset names of AssetPairs, staking and other
+    suffixes (XXBT.M, XBT.F) and missing X/Z prefixes (XBT, EUR) are resolved.
+
+    public methods:
+    get_required_pairs() - asset pairs whose tickers are needed for update_rates()
+    update_rates()       - computes the rate vector from Ticker results
+    get_rate()           - value of one unit of an asset in the quote asset
+    value()              - total value of one balance dict
+    value_accounts()     - total values of many balance dicts
+    value_vectors()      - total values of balance vectors in asset order
+    to_vector()          - converts a balance dict to a balance vector in asset order
+    breakdown()          - value per asset of one balance dict
+
+    public variables:
+    quote:  quote asset of all values
+    assets: list with all assets of the graph, defines the order of vectors
+
+    """
+
+    def __init__(self, asset_pairs, quote = 'ZUSD'):
+        """
+        :type asset_pairs:  dict
+        :param asset_pairs: Request_Tradable_Asset_Pairs.asset_pairs_dict
+
+        :type quote:  str
+        :param quote: asset all values are expressed in
+
+        :ValueError - If the quote asset is not part of any asset pair
+
+        """
+
+        self.assets = sorted(set([info['base'] for info in asset_pairs.itervalues()] +
+                                 [info['quote'] for info in asset_pairs.itervalues()]))
+        if quote not in self.assets:
+            raise ValueError("Quote asset " + quote + " is not part of any asset pair")
+
+        self.quote = quote
+        self.__index = dict((asset, i) for i, asset in enumerate(self.assets))
+        self.__aliases = {}
+
+        # Adjacency list: (neighbour index, pair, True if the asset is the base of the pair)
+        self.__edges = [[] for asset in self.assets]
+        self.__pairs = []
+        for pair, info in sorted(asset_pairs.iteritems()):
+            if pair.endswith('.d'):
+                # Dark pool pairs have no ticker
+                continue
+            self.__pairs.append(pair)
+            base, quote_asset = self.__index[info['base']], self.__index[info['quote']]
+            self.__edges[base].append((quote_asset, pair, True))
+            self.__edges[quote_asset].append((base, pair, False))
+
+        self.__order = self.__walk(frozenset())
+        self.__required = sorted(set(pair for child, parent, pair, is_base in self.__order))
+        self.__missing = frozenset()
+        self.__rates = array('d', [_nan] * len(self.assets))
+        self.__rates[self.__index[quote]] = 1.0
+
+    def get_required_pairs(self):
+        """
+        :return sorted list with the asset pairs of the shortest conversion paths
+        """
+
+        return list(self.__required)
+
+    def update_rates(self, tickers):
+        """
+        :type tickers:  dict
+        :param tickers: Request_Ticker_Information.asset_pairs_dict, the mid of best ask and bid is used
+
+        :return array('d') with one rate per asset (nan if the asset can't be converted)
+        """
+
+        prices = {}
+        for pair, ticker in tickers.iteritems():
+            prices[pair] = (float(ticker['a'][0]) + float(ticker['b'][0])) / 2
+
+        # The walk is only repeated if other pairs than on the last tick are without ticker
+        missing = frozenset(pair for pair in self.__pairs if pair not in prices)
+        if missing != self.__missing:
+            self.__order = self.__walk(missing)
+            self.__missing = missing
+
+        rates = array('d', [_nan] * len(self.assets))
+        rates[self.__index[self.quote]] = 1.0
+        for child, parent, pair, is_base in self.__order:
+            price = prices[pair]
+            rates[child] = rates[parent] * (price if is_base else 1.0 / price)
+        self.__rates = rates
+        return rates
+
+    def get_rate(self, asset):
+        index = self.__lookup(asset)
+        return self.__rates[index] if index is not None else _nan
+
+    def to_vector(self, balance):
+        """
+        :type balance:  dict
+        :param balance: Request_Balance.balance_dict or {asset: amount}
+
+        :return array('d') with the amounts in the order of assets. Unknown assets are left out
+        """
+
+        vector = array('d', [0.0] * len(self.assets))
+        for asset, amount in balance.iteritems():
+            index = self.__lookup(asset)
+            if index is not None:
+                vector[index] += float(amount)
+        return vector
+
+    def value(self, balance):
+        """
+        :return total value of a balance dict in the quote asset. Assets without rate are skipped
+        """
+
+        return self.value_vectors([self.to_vector(balance)])[0]
+
+    def value_accounts(self, balances):
+        """
+        :type balances:  list
+        :param balances: balance dicts of many accounts
+
+        :return array('d') with the total value per account
+        """
+
+        return self.value_vectors([self.to_vector(balance) for balance in balances])
+
+    def value_vectors(self, vectors):
+        """
+        :type vectors:  list
+        :param vectors: array('d') balance vectors in the order of assets (see to_vector())
+
+        :return array('d') with the total value per vector
+        """
+
+        # Assets without rate contribute nothing instead of turning the total into nan
+        priced = [(i, rate) for i, rate in enumerate(self.__rates) if rate == rate]
+        totals = array('d')
+        for vector in vectors:
+            totals.append(sum(vector[i] * rate for i, rate in priced))
+        return totals
+
+    def breakdown(self, balance):
+        """
+        :return dict with the value of every asset of a balance dict (nan if the asset has no rate)
+        """
+
+        values = {}
+        for asset, amount in balance.iteritems():
+            values[asset] = float(amount) * self.get_rate(asset)
+        return values
+
+    def __lookup(self, asset):
+        """Maps a balance key to the asset index, None if the asset is unknown"""
+
+        if asset in self.__index:
+            return self.__index[asset]
+        if asset not in self.__aliases:
+            name = asset.split('.')[0]
+            index = None
+            for candidate in (name, 'X' + name, 'Z' + name):
+                if candidate in self.__index:
+                    index = self.__index[candidate]
+                    break
+            self.__aliases[asset] = index
+        return self.__aliases[asset]
+
+    def __walk(self, missing):
+        """
+        Breadth first walk from the quote asset over pairs that are not missing.
+
+        :return list with (asset index, parent index, pair, asset is base) in walk order
+        """
+
+        start = self.__index[self.quote]
+        visited = set([start])
+        order = []
+        queue = deque([start])
+        while queue:
+            parent = queue.popleft()
+            for child, pair, parent_is_base in self.__edges[parent]:
+                if child in visited or pair in missing:
+                    continue
+                visited.add(child)
+                order.append((child, parent, pair, not parent_is_base))
+                queue.append(child)
+        return order
@@ -0,0 +1,232 @@
+#MIT License
+
+#Copyright (c) [2017] [Robin Hubbig]
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+import socket
+import ssl
+import struct
+import base64
+import hashlib
+import urlparse
+import os
+from threading import Lock
+
+_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+class Web_Socket(object):
+    """
+    Minimal RFC 6455 websocket on top of a plain or ssl socket.
+    Used by MarketFeed.py and its stand-in server MockKrakenFeed.py.
+
+    public methods:
+    connect()  - opens a client connection to a ws:// or wss:// url
+    accept()   - performs the server handshake on an accepted socket
+    send()     - sends a text message
+    recv()     - receives the next text message, None if the connection was closed
+    buffered() - True if received data is waiting in the buffer (select() won't report it)
+    close()    - closes the connection
+
+    """
+
+    def __init__(self, sock, client = True):
+        self.__sock = sock
+        self.__client = client
+        self.__buffer = ''
+        self.__send_lock = Lock()
+        self.closed = False
+
+    @classmethod
+    def connect(cls, url, timeout = 10):
+        """
+        :type url:  str
+        :param url: ws:// or wss:// url
+
+        :type timeout:  float
+        :param timeout: socket timeout in seconds, also used for recv()
+
+        :return Web_Socket
+
+        :IOError - If the handshake failed
+        :ssl.SSLError - If the certificate of a wss:// server could not be verified
+        """
+
+        parsed_url = urlparse.urlparse(url)
+        secure = parsed_url.scheme == 'wss'
+        port = parsed_url.port or (443 if secure else 80)
+        sock = socket.create_connection((parsed_url.hostname, port), timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if secure:
+            # Verifies the certificate chain and that it was issued for the host
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname = parsed_url.hostname)
+
+        key = base64.b64encode(os.urandom(16))
+        sock.sendall('GET ' + (parsed_url.path or '/') + ' HTTP/1.1\r\n'
+                     'Host: ' + parsed_url.netloc + '\r\n'
+                     'Upgrade: websocket\r\n'
+                     'Connection: Upgrade\r\n'
+                     'Sec-WebSocket-Key: ' + key + '\r\n'
+                     'Sec-WebSocket-Version: 13\r\n\r\n')
+
+        ws = cls(sock, client = True)
+        headers = ws.__read_headers()
+        accept = base64.b64encode(hashlib.sha1(key + _GUID).digest())
+        if not headers[0].startswith('HTTP/1.1 101') or headers[1].get('sec-websocket-accept') != accept:
+            sock.close()
+            raise IOError("Websocket handshake failed: " + headers[0])
+        return ws
+
+    @classmethod
+    def accept(cls, sock):
+        """
+        :type sock:  socket.socket
+        :param sock: accepted server side socket
+
+        :return Web_Socket
+
+        :IOError - If the request was no websocket upgrade
+        """
+
+        ws = cls(sock, client = False)
+        request_line, headers = ws.__read_headers()
+        key = headers.get('sec-websocket-key')
+        if not key:
+            sock.sendall('HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+            raise IOError("No websocket upgrade request: " + request_line)
+
+        accept = base64.b64encode(hashlib.sha1(key + _GUID).digest())
+        sock.sendall('HTTP/1.1 101 Switching Protocols\r\n'
+                     'Upgrade: websocket\r\n'
+                     'Connection: Upgrade\r\n'
+                     'Sec-WebSocket-Accept: ' + accept + '\r\n\r\n')
+        return ws
+
+    def send(self, text, opcode = OP_TEXT):
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+
+        header = chr(0x80 | opcode)
+        length = len(text)
+        mask_bit = 0x80 if self.__client else 0
+        if length < 126:
+            header += chr(mask_bit | length)
+        elif length < 65536:
+            header += chr(mask_bit | 126) + struct.pack('>H', length)
+        else:
+            header += chr(mask_bit | 127) + struct.pack('>Q', length)
+
+        if self.__client:
+            mask = os.urandom(4)
+            text = _apply_mask(mask, text)
+            header += mask
+
+        with self.__send_lock:
+            self.__sock.sendall(header + text)
+
+    def recv(self):
+        """
+        Receives the next text or binary message. Pings are answered automatically.
+
+        :return message as str or None if the connection was closed
+
+        :socket.timeout - If nothing was received within the socket timeout
+        """
+
+        message = []
+        while True:
+            byte1, byte2 = struct.unpack('BB', self.__read(2))
+            fin, opcode = byte1 & 0x80, byte1 & 0x0F
+            length = byte2 & 0x7F
+            if length == 126:
+                length = struct.unpack('>H', self.__read(2))[0]
+            elif length == 127:
+                length = struct.unpack('>Q', self.__read(8))[0]
+            mask = self.__read(4) if byte2 & 0x80 else None
+            payload = self.__read(length)
+            if mask:
+                payload = _apply_mask(mask, payload)
+
+            if opcode == OP_PING:
+                self.send(payload, OP_PONG)
+            elif opcode == OP_PONG:
+                pass
+            elif opcode == OP_CLOSE:
+                if not self.closed:
+                    self.closed = True
+                    try:
+                        self.send(payload[:2], OP_CLOSE)
+                    except socket.error:
+                        pass
+                return None
+            else:
+                message.append(payload)
+                if fin:
+                    return ''.join(message)
+
+    def buffered(self):
+        return len(self.__buffer) > 0
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self.send(struct.pack('>H', 1000), OP_CLOSE)
+            except (socket.error, ssl.SSLError):
+                pass
+        self.__sock.close()
+
+    def __read(self, n):
+        while len(self.__buffer) < n:
+            chunk = self.__sock.recv(max(4096, n - len(self.__buffer)))
+            if not chunk:
+                self.closed = True
+                raise socket.error("Connection closed")
+            self.__buffer += chunk
+        data, self.__buffer = self.__buffer[:n], self.__buffer[n:]
+        return data
+
+    def __read_headers(self):
+        while '\r\n\r\n' not in self.__buffer:
+            chunk = self.__sock.recv(4096)
+            if not chunk:
+                raise IOError("Connection closed during websocket handshake")
+            self.__buffer += chunk
+        head, self.__buffer = self.__buffer.split('\r\n\r\n', 1)
+        lines = head.split('\r\n')
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return (lines[0], headers)
+
+
+def _apply_mask(mask, data):
+    mask = bytearray(mask)
+    data = bytearray(data)
+    for i in xrange(len(data)):
+        data[i] ^= mask[i & 3]
+    return str(data)
@@ -0,0 +1,96 @@
+"""Stand-ins for the request manager used by the tests"""
+
+class Fake_Request_Mgr(object):
+    """
+    Answers requests from in-memory account and market state, like the api would.
+    Tests change balances, open_orders, trades, ledgers, tickers, books, candles and
+    public_trades between requests. Methods in errors are answered with these api
+    errors, methods in raises raise the exception instead.
+    """
+
+    def __init__(self, now = 1500000000.0):
+        self.now = now
+        self.balances = {}
+        self.open_orders = {}
+        self.trades = {}
+        self.ledgers = {}
+        self.asset_pairs = {}
+        self.trade_volume = {'currency':'ZUSD', 'volume':'0.0000', 'fees':{}, 'fees_maker':{}}
+        self.tickers = {}
+        self.books = {}
+        self.candles = {}
+        self.public_trades = {}
+        self.errors = {}
+        self.raises = {}
+        self.page_size = 50
+        self.sent = []
+
+    def time(self):
+        return self.now
+
+    def add_trade(self, txid, pair, side, volume, price, fee, ordertxid, trade_time):
+        self.trades[txid] = {'ordertxid':ordertxid, 'pair':pair, 'time':trade_time, 'type':side,
+                             'ordertype':'limit', 'price':str(price), 'cost':str(price * volume),
+                             'fee':str(fee), 'vol':str(volume), 'misc':''}
+
+    def add_ledger(self, ledger_id, asset, amount, fee, balance, entry_time, entry_type = 'trade'):
+        self.ledgers[ledger_id] = {'refid':'R' + ledger_id, 'time':entry_time, 'type':entry_type, 'aclass':'currency',
+                                   'asset':asset, 'amount':str(amount), 'fee':str(fee), 'balance':str(balance)}
+
+    def send_request(self, request):
+        method = request.get_method()
+        self.sent.append(method)
+        if method in self.raises:
+            raise self.raises[method]
+        if method in self.errors:
+            return request.validate_response({'error':list(self.errors[method])})
+
+        if method == 'Balance':
+            result = dict((asset, '%.10f' % amount) for asset, amount in self.balances.iteritems())
+        elif method == 'OpenOrders':
+            result = {'open':dict(self.open_orders)}
+        elif method == 'TradesHistory':
+            result = self.__page(self.trades, request.start, request.offset)
+            result = {'trades':result[0], 'count':result[1]}
+        elif method == 'Ledgers':
+            result = self.__page(self.ledgers, request.start, request.offset)
+            result = {'ledger':result[0], 'count':result[1]}
+        elif method == 'AssetPairs':
+            result = dict(self.asset_pairs)
+        elif method == 'TradeVolume':
+            result = dict(self.trade_volume)
+        elif method == 'Ticker':
+            result = dict((pair, self.tickers[pair]) for pair in request.asset_pair_list if pair in self.tickers)
+        elif method == 'Depth':
+            result = dict((pair, dict((side, levels[:request.count]) for side, levels in self.books[pair].iteritems()))
+                          for pair in request.asset_pair_list if pair in self.books)
+        elif method == 'OHLC':
+            result = self.__since(self.candles, request, 0)
+        elif method == 'Trades':
+            result = self.__since(self.public_trades, request, 2)
+        else:
+            raise ValueError("Request " + method + " is not supported by the fake")
+        return request.validate_response({'error':[], 'result':result})
+
+    def __page(self, entries, start, offset):
+        """Entries after start (exclusive), newest first, page_size per page"""
+
+        matching = [(key, info) for key, info in entries.iteritems()
+                    if start is None or float(info['time']) > float(start)]
+        matching.sort(key = lambda item: -float(item[1]['time']))
+        page = matching[int(offset or 0):int(offset or 0) + self.page_size]
+        return (dict(page), len(matching))
+
+    def __since(self, rows_by_pair, request, time_column):
+        """Rows of the requested pairs at or after since, last is the time of the newest row"""
+
+        result = {}
+        last = request.since or 0
+        for pair in request.asset_pair_list:
+            rows = [row for row in rows_by_pair.get(pair, [])
+                    if request.since is None or float(row[time_column]) >= float(request.since)]
+            result[pair] = rows
+            if rows:
+                last = max(last, rows[-1][time_column])
+        result['last'] = last
+        return result
@@ -0,0 +1,81 @@
+import unittest
+from AccountState import Account_State_Cache
+from tests.fakes import Fake_Request_Mgr
+
+PAIRS = {'XXBTZEUR':{'base':'XXBT', 'quote':'ZEUR'}}
+
+def _order(volume):
+    return {'status':'open', 'opentm':1499999000.0, 'vol':str(volume), 'vol_exec':'0',
+            'descr':{'pair':'XXBTZEUR', 'type':'buy', 'ordertype':'limit', 'price':'1000'}}
+
+
+class Account_State_Cache_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.req_mgr = Fake_Request_Mgr()
+        self.req_mgr.balances = {'XXBT':1.0, 'ZEUR':10000.0}
+        self.req_mgr.open_orders = {'O1':_order(2.0)}
+        self.req_mgr.add_trade('T0', 'XXBTZEUR', 'buy', 0.5, 1000.0, 1.0, 'O0', 1499999000.0)
+        self.cache = Account_State_Cache(self.req_mgr, reconcile_interval = 1000, fill_interval = 0,
+                                         asset_pairs = PAIRS)
+
+    def fill(self, txid, volume, trade_time):
+        """A fill on the server: trade history and balances change together"""
+
+        self.req_mgr.add_trade(txid, 'XXBTZEUR', 'buy', volume, 1000.0, 1.0, 'O1', trade_time)
+        self.req_mgr.balances['XXBT'] += volume
+        self.req_mgr.balances['ZEUR'] -= volume * 1000.0 + 1.0
+
+    def test_seed_does_not_apply_old_trades(self):
+        self.assertTrue(self.cache.refresh())
+        self.assertEqual(self.cache.get_balances(), {'XXBT':1.0, 'ZEUR':10000.0})
+        self.assertEqual(self.cache.reconciles, 1)
+
+    def test_fill_is_applied_once(self):
+        self.cache.refresh()
+        self.fill('T1', 0.5, 1500000010.0)
+
+        self.assertTrue(self.cache.refresh())
+        self.assertTrue(self.cache.refresh())
+        self.assertAlmostEqual(self.cache.get_balance('XXBT'), 1.5)
+        self.assertAlmostEqual(self.cache.get_balance('ZEUR'), 10000.0 - 501.0)
+        self.assertAlmostEqual(self.cache.get_open_order('O1').volume_exec, 0.5)
+        self.assertEqual(self.cache.reconciles, 1)
+
+    def test_fill_before_reconcile_is_not_applied_again(self):
+        self.cache.refresh()
+        self.fill('T1', 0.5, 1500000010.0)
+
+        # The reconciled balance already contains the fill
+        self.assertTrue(self.cache.reconcile())
+        self.assertTrue(self.cache.refresh())
+        self.assertAlmostEqual(self.cache.get_balance('XXBT'), 1.5)
+        self.assertAlmostEqual(self.cache.get_balance('ZEUR'), 10000.0 - 501.0)
+        self.assertAlmostEqual(self.cache.last_drift, 501.0)
+
+    def test_completed_order_is_removed(self):
+        self.cache.refresh()
+        self.fill('T1', 2.0, 1500000010.0)
+        self.cache.refresh()
+        self.assertIsNone(self.cache.get_open_order('O1'))
+
+    def test_fill_of_unknown_order_forces_reconcile(self):
+        self.cache.refresh()
+        self.req_mgr.add_trade('T1', 'XXBTZEUR', 'sell', 0.1, 1000.0, 0.1, 'OX', 1500000010.0)
+        self.req_mgr.balances['XXBT'] -= 0.1
+        self.cache.refresh()
+        self.cache.refresh()
+        self.assertEqual(self.cache.reconciles, 2)
+        self.assertAlmostEqual(self.cache.get_balance('XXBT'), 0.9)
+
+    def test_fills_are_paged(self):
+        self.req_mgr.page_size = 3
+        self.cache.refresh()
+        for i in xrange(7):
+            self.fill('T' + str(i + 1), 0.1, 1500000010.0 + i)
+        self.assertTrue(self.cache.refresh())
+        self.assertAlmostEqual(self.cache.get_balance('XXBT'), 1.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import math
+import unittest
+from PublicApiRequests import Request_OHLC_Data, Request_Recent_Trades, Request_Time
+from Records import Candle
+from RingBuffer import Ring_Buffer
+from Analytics import Candle_Resampler, Market_Analytics
+from tests.fakes import Fake_Request_Mgr
+
+
+def _row(time, close, volume = 1.0, count = 1):
+    return [time, str(close), str(close + 1), str(close - 1), str(close), str(close), str(volume), count]
+
+
+def _candle(time, close, volume = 1.0):
+    return Candle.from_response('XXBTZUSD', _row(time, close, volume))
+
+
+class Ring_Buffer_Test(unittest.TestCase):
+
+    def test_append_wraps_around(self):
+        buffer = Ring_Buffer(3)
+        buffer.extend([1, 2])
+        self.assertEqual(list(buffer), [1, 2])
+        buffer.extend([3, 4, 5])
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(list(buffer.to_array()), [3, 4, 5])
+        self.assertEqual((buffer[0], buffer[-1]), (3, 5))
+        self.assertRaises(IndexError, buffer.__getitem__, 3)
+        self.assertEqual(list(buffer.last(2)), [4, 5])
+        self.assertEqual(list(buffer.last(10)), [3, 4, 5])
+
+    def test_statistics_of_the_contained_values(self):
+        buffer = Ring_Buffer(4)
+        self.assertTrue(math.isnan(buffer.mean()))
+        buffer.append(100.0)
+        self.assertTrue(math.isnan(buffer.variance()))
+
+        buffer.extend([2.0, 4.0, 4.0, 6.0])
+        self.assertEqual(buffer.sum(), 16.0)
+        self.assertEqual(buffer.mean(), 4.0)
+        self.assertAlmostEqual(buffer.variance(), 8.0 / 3)
+        self.assertAlmostEqual(buffer.stdev(), math.sqrt(8.0 / 3))
+
+    def test_sums_stay_exact_over_many_appends(self):
+        buffer = Ring_Buffer(10)
+        for i in range(10000):
+            buffer.append(1e8 + i % 7)
+        values = list(buffer)
+        mean = sum(values) / len(values)
+        self.assertAlmostEqual(buffer.mean(), mean)
+        self.assertAlmostEqual(buffer.variance(), sum((v - mean) ** 2 for v in values) / 9, places = 4)
+
+    def test_quantiles(self):
+        buffer = Ring_Buffer(5)
+        self.assertTrue(math.isnan(buffer.quantile(0.5)))
+        buffer.extend([5, 1, 4, 2, 3])
+        self.assertEqual(buffer.quantiles([0, 0.5, 1]), [1, 3, 5])
+        self.assertEqual(buffer.quantile(0.25), 2)
+        self.assertEqual(buffer.quantile(0.5, n = 2), 2.5)
+
+    def test_clear_and_capacity(self):
+        buffer = Ring_Buffer(2)
+        buffer.extend([1, 2, 3])
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.sum(), 0.0)
+        buffer.append(7)
+        self.assertEqual(list(buffer), [7])
+        self.assertRaises(ValueError, Ring_Buffer, 0)
+
+
+class Candle_Resampler_Test(unittest.TestCase):
+
+    def test_completes_a_bucket_with_the_next_one(self):
+        resampler = Candle_Resampler(120)
+        self.assertIsNone(resampler.update(_candle(0, 100.0, 1.0)))
+        self.assertIsNone(resampler.update(_candle(60, 110.0, 3.0)))
+        # The uncommitted candle is replaced, not added
+        self.assertIsNone(resampler.update(_candle(60, 104.0, 3.0)))
+        self.assertEqual(resampler.current().close, 104.0)
+
+        completed = resampler.update(_candle(120, 90.0))
+        self.assertEqual((completed.time, completed.open, completed.high, completed.low, completed.close),
+                         (0, 100.0, 105.0, 99.0, 104.0))
+        self.assertEqual((completed.volume, completed.count), (4.0, 2))
+        self.assertAlmostEqual(completed.vwap, (100.0 * 1 + 104.0 * 3) / 4)
+        self.assertEqual(resampler.current().time, 120)
+
+        # Candles of a completed bucket are ignored
+        self.assertIsNone(resampler.update(_candle(60, 1.0)))
+        self.assertEqual(resampler.current().close, 90.0)
+
+
+class Market_Analytics_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.req_mgr = Fake_Request_Mgr()
+        self.analytics = Market_Analytics(base_interval = 60, intervals = (120,), vwap_window = 2,
+                                          volatility_window = 10)
+
+    def __poll_candles(self, since = None):
+        request = Request_OHLC_Data()
+        request.asset_pair_list = ['XXBTZUSD']
+        request.since = since
+        self.assertTrue(self.req_mgr.send_request(request))
+        self.analytics.update(request)
+        return request.last_id
+
+    def test_candles_from_ohlc_requests(self):
+        self.req_mgr.candles['XXBTZUSD'] = [_row(0, 100.0), _row(60, 110.0), _row(120, 99.0)]
+        last_id = self.__poll_candles()
+        self.assertEqual(last_id, 120)
+        self.assertEqual(self.analytics.get_pairs(), ['XXBTZUSD'])
+
+        # Only the committed candles count, the candle at 120 is still pending
+        self.assertTrue(math.isnan(self.analytics.get_volatility('XXBTZUSD')))
+        candles = self.analytics.get_candles('XXBTZUSD', 120)
+        self.assertEqual([(candle.time, candle.close) for candle in candles], [(0, 110.0)])
+        self.assertEqual(self.analytics.get_current_candle('XXBTZUSD', 120).close, 99.0)
+
+        # The api returns the pending candle again with updated values
+        self.req_mgr.candles['XXBTZUSD'][2] = _row(120, 88.0)
+        self.req_mgr.candles['XXBTZUSD'].append(_row(180, 96.8))
+        self.assertEqual(self.__poll_candles(last_id), 180)
+
+        returns = [math.log(110.0 / 100.0), math.log(88.0 / 110.0)]
+        self.assertAlmostEqual(self.analytics.get_volatility('XXBTZUSD'), abs(returns[0] - returns[1]) / math.sqrt(2))
+        self.assertAlmostEqual(self.analytics.get_volatility('XXBTZUSD', annualize = True),
+                               self.analytics.get_volatility('XXBTZUSD') * math.sqrt(365 * 24 * 60))
+        self.assertEqual(self.analytics.get_current_candle('XXBTZUSD', 120).close, 96.8)
+        self.assertEqual(self.analytics.get_current_candle('XXBTZUSD', 120).low, 87.0)
+        self.assertEqual(len(self.analytics.get_candles('XXBTZUSD', 120, n = 1)), 1)
+
+    def test_vwap_of_the_last_trades(self):
+        self.assertTrue(math.isnan(self.analytics.get_vwap('XXBTZUSD')))
+        self.req_mgr.public_trades['XXBTZUSD'] = [['100.0', '5.0', 1.0, 'b', 'l', ''],
+                                                  ['110.0', '1.0', 2.0, 's', 'm', ''],
+                                                  ['120.0', '3.0', 3.0, 'b', 'm', '']]
+        request = Request_Recent_Trades()
+        request.asset_pair_list = ['XXBTZUSD']
+        self.assertTrue(self.req_mgr.send_request(request))
+        self.analytics.update(request)
+        self.assertAlmostEqual(self.analytics.get_vwap('XXBTZUSD'), (110.0 * 1 + 120.0 * 3) / 4)
+
+    def test_candles_from_trades(self):
+        analytics = Market_Analytics(base_interval = 60, intervals = (120,), candles_from_trades = True)
+        self.req_mgr.public_trades['XXBTZUSD'] = [['100.0', '1.0', 10.0, 'b', 'l', ''],
+                                                  ['104.0', '1.0', 70.0, 'b', 'l', ''],
+                                                  ['90.0', '1.0', 130.0, 's', 'l', '']]
+        request = Request_Recent_Trades()
+        request.asset_pair_list = ['XXBTZUSD']
+        self.assertTrue(self.req_mgr.send_request(request))
+        analytics.update(request)
+        completed = analytics.get_candles('XXBTZUSD', 120)
+        self.assertEqual([(candle.time, candle.open, candle.close) for candle in completed], [(0, 100.0, 104.0)])
+        self.assertEqual(analytics.get_current_candle('XXBTZUSD', 120).close, 90.0)
+
+    def test_invalid_intervals_and_requests(self):
+        self.assertRaises(ValueError, Market_Analytics, 60, (90,))
+        request = Request_OHLC_Data()
+        request.interval = 5
+        self.assertRaises(ValueError, self.analytics.update, request)
+        self.assertRaises(ValueError, self.analytics.update, Request_Time())
+        self.assertEqual(self.analytics.get_candles('XXBTZUSD', 120), [])
+        self.assertIsNone(self.analytics.get_current_candle('XXBTZUSD', 120))
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+from BalanceHistory import Balance_History
+from ColumnarStore import Columnar_Writer, Columnar_Reader
+from Records import Ledger_Entry
+from tests.fakes import Fake_Request_Mgr
+
+
+def _entries(count, start_time = 1000.0, start_balance = 100.0):
+    """Deposits of 1 EUR with a fee of 0.1, one per second"""
+
+    entries = []
+    balance = start_balance
+    for i in range(count):
+        balance += 0.9
+        entries.append(Ledger_Entry('L' + str(i), 'R' + str(i), start_time + i, 'deposit', 'currency', 'ZEUR',
+                                    1.0, 0.1, balance))
+    return entries
+
+
+class Balance_History_Test(unittest.TestCase):
+
+    def test_balance_at_any_time(self):
+        history = Balance_History()
+        self.assertEqual(history.add_entries(_entries(10)), 10)
+
+        self.assertAlmostEqual(history.get_balance('ZEUR', 999.0), 100.0)
+        self.assertAlmostEqual(history.get_balance('ZEUR', 1000.0), 100.9)
+        self.assertAlmostEqual(history.get_balance('ZEUR', 1004.5), 104.5)
+        self.assertAlmostEqual(history.get_balance('ZEUR'), 109.0)
+        self.assertEqual(history.get_balance('XXBT'), 0.0)
+        self.assertEqual(history.get_last_time(), 1009.0)
+
+        times, balances = history.get_series('ZEUR', 1002.0, 1004.0)
+        self.assertEqual(list(times), [1002.0, 1003.0])
+        self.assertEqual([round(b, 6) for b in balances], [102.7, 103.6])
+        self.assertEqual([round(b, 6) for b in history.sample('ZEUR', [0.0, 1000.5, 2000.0])], [100.0, 100.9, 109.0])
+
+    def test_older_entries_are_merged(self):
+        entries = _entries(10)
+        history = Balance_History()
+        history.add_entries(entries[5:])
+        self.assertAlmostEqual(history.get_balance('ZEUR', 1005.0), 105.4)
+
+        # A backfill page with older entries and an entry added twice
+        self.assertEqual(history.add_entries(entries[:6]), 5)
+        self.assertAlmostEqual(history.get_balance('ZEUR', 999.0), 100.0)
+        self.assertAlmostEqual(history.get_balance('ZEUR', 1005.0), 105.4)
+        self.assertAlmostEqual(history.get_balance('ZEUR'), 109.0)
+
+    def test_update_pages_and_continues(self):
+        req_mgr = Fake_Request_Mgr(now = 2000.0)
+        for entry in _entries(120):
+            req_mgr.add_ledger(entry.ledger_id, entry.asset, entry.amount, entry.fee, entry.balance, entry.time)
+
+        history = Balance_History()
+        self.assertEqual(history.update(req_mgr), 120)
+        self.assertEqual(req_mgr.sent.count('Ledgers'), 3)
+        self.assertAlmostEqual(history.get_balance('ZEUR'), 100.0 + 120 * 0.9)
+
+        req_mgr.add_ledger('L120', 'ZEUR', -10.0, 0.0, 100.0 + 120 * 0.9 - 10.0, 1119.0, 'withdrawal')
+        self.assertEqual(history.update(req_mgr), 1)
+        self.assertAlmostEqual(history.get_balance('ZEUR'), 100.0 + 120 * 0.9 - 10.0)
+
+    def test_store_round_trips(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'ledgers.krc')
+            with Columnar_Writer(path, Ledger_Entry) as writer:
+                writer.write(_entries(10))
+            history = Balance_History()
+            with Columnar_Reader(path) as reader:
+                self.assertEqual(history.from_store(reader), 10)
+
+            history.save(os.path.join(directory, 'history.pickle'))
+            loaded = Balance_History.load(os.path.join(directory, 'history.pickle'))
+            self.assertEqual(loaded.get_assets(), ['ZEUR'])
+            self.assertAlmostEqual(loaded.get_balance('ZEUR', 1004.5), 104.5)
+            self.assertEqual(loaded.add_entries(_entries(10)), 0)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
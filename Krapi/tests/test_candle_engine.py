@@ -0,0 +1,45 @@
+import unittest
+from CandleEngine import Candle_Engine
+
+
+TIMES = [0.0, 10.0, 59.0, 60.0, 61.0, 130.0]
+PRICES = [100.0, 110.0, 90.0, 95.0, 105.0, 100.0]
+VOLUMES = [1.0, 2.0, 1.0, 1.0, 3.0, 1.0]
+
+
+class Candle_Engine_Test(unittest.TestCase):
+
+    def test_time_bars(self):
+        engine = Candle_Engine('XXBTZEUR', 'time', 60)
+        bars = engine.add_columns(TIMES, PRICES, VOLUMES)
+        self.assertEqual([(b.time, b.open, b.high, b.low, b.close, b.volume, b.count) for b in bars],
+                         [(0, 100.0, 110.0, 90.0, 90.0, 4.0, 3), (60, 95.0, 105.0, 95.0, 105.0, 4.0, 2)])
+        self.assertAlmostEqual(bars[0].vwap, (100.0 + 220.0 + 90.0) / 4.0)
+        self.assertEqual(engine.flush().time, 120)
+        self.assertEqual(engine.current(), None)
+
+    def test_streamed_batches_give_the_same_bars(self):
+        for bar_type, size in (('time', 60), ('volume', 3.0), ('tick', 2)):
+            whole = Candle_Engine('XXBTZEUR', bar_type, size)
+            bars = whole.add_columns(TIMES, PRICES, VOLUMES) + [whole.flush()]
+
+            streamed = Candle_Engine('XXBTZEUR', bar_type, size)
+            parts = []
+            for i in range(len(TIMES)):
+                parts.extend(streamed.add_columns(TIMES[i:i + 1], PRICES[i:i + 1], VOLUMES[i:i + 1]))
+            parts.append(streamed.flush())
+            self.assertEqual(parts, bars, bar_type)
+
+    def test_volume_and_tick_bars(self):
+        volume_bars = Candle_Engine('XXBTZEUR', 'volume', 3.0).add_columns(TIMES, PRICES, VOLUMES)
+        self.assertEqual([b.volume for b in volume_bars], [3.0, 5.0])
+        tick_bars = Candle_Engine('XXBTZEUR', 'tick', 4).add_columns(TIMES, PRICES, VOLUMES)
+        self.assertEqual([(b.time, b.count) for b in tick_bars], [(0, 4)])
+
+    def test_invalid_bars(self):
+        self.assertRaises(ValueError, Candle_Engine, 'XXBTZEUR', 'dollar', 60)
+        self.assertRaises(ValueError, Candle_Engine, 'XXBTZEUR', 'time', 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import logging
+import time
+import unittest
+from ClockSync import Clock_Sync
+from PublicApiRequests import Request_Time
+
+
+class _Server_Clock(object):
+    """Answers Time requests with the whole seconds of a server clock that is offset seconds ahead"""
+
+    def __init__(self, offset):
+        self.offset = offset
+
+    def send_request(self, request):
+        if not isinstance(request, Request_Time):
+            raise ValueError("Only Time requests are supported")
+        unixtime = int(time.time() + self.offset)
+        return request.validate_response({'error':[], 'result':{'unixtime':unixtime, 'rfc1123':''}})
+
+
+class _Failing_Server_Clock(_Server_Clock):
+    """Raises on the first failures requests"""
+
+    def __init__(self, offset, failures):
+        super(_Failing_Server_Clock, self).__init__(offset)
+        self.failures = failures
+
+    def send_request(self, request):
+        if self.failures:
+            self.failures -= 1
+            raise IOError("Connection reset")
+        return super(_Failing_Server_Clock, self).send_request(request)
+
+
+class Clock_Sync_Test(unittest.TestCase):
+
+    def test_offset_within_bounds(self):
+        clock = Clock_Sync(_Server_Clock(100.0))
+        self.assertEqual((clock.get_offset(), clock.get_uncertainty()), (0.0, None))
+
+        self.assertEqual(clock.sync(samples = 4, spacing = 0.3), 4)
+        self.assertLessEqual(abs(clock.get_offset() - 100.0), clock.get_uncertainty() + 0.01)
+        self.assertLess(clock.get_uncertainty(), 0.5)
+        self.assertAlmostEqual(clock.time() - time.time(), clock.get_offset(), places = 2)
+
+    def test_clock_step_drops_old_samples(self):
+        server = _Server_Clock(100.0)
+        clock = Clock_Sync(server)
+        clock.sync(samples = 2, spacing = 0.3)
+
+        server.offset = -50.0
+        self.assertTrue(clock.sample())
+        self.assertLessEqual(abs(clock.get_offset() + 50.0), 1.0)
+
+
+    def test_sampling_thread_survives_exceptions(self):
+        clock = Clock_Sync(_Failing_Server_Clock(100.0, failures = 2), interval = 0.05)
+        logging.disable(logging.CRITICAL)
+        clock.start()
+        try:
+            deadline = time.time() + 10.0
+            while clock.get_uncertainty() is None and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(clock.errors, 2)
+            self.assertLessEqual(abs(clock.get_offset() - 100.0), 1.0)
+        finally:
+            clock.stop()
+            logging.disable(logging.NOTSET)
+
+
+if __name__ == '__main__':
+    unittest.main()
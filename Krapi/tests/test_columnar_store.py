@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+from ColumnarStore import Columnar_Writer, Columnar_Reader
+from Records import Trade
+
+
+def _trades(count, start = 0):
+    pairs = ['XXBTZEUR', 'XETHZEUR']
+    return [Trade('T' + str(i), pairs[i % 2], 1500000000.0 + i, 1000.0 + i, 0.5, 'buy', 'limit', '', None, None, None)
+            for i in range(start, start + count)]
+
+
+class Columnar_Store_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'trades.krc')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip_and_filters(self):
+        trades = _trades(1000)
+        with Columnar_Writer(self.path, Trade, row_group_size = 300) as writer:
+            writer.write(trades)
+
+        with Columnar_Reader(self.path) as reader:
+            self.assertEqual((reader.rows, reader.row_groups, reader.recovered), (1000, 4, False))
+            self.assertEqual([tuple(r.to_tuple()) for r in reader.records()], [tuple(t.to_tuple()) for t in trades])
+
+            columns = reader.read_columns(['txid', 'price'], pairs = ['XETHZEUR'], start = 1500000100.0,
+                                          end = 1500000200.0)
+            expected = [t for t in trades if t.pair == 'XETHZEUR' and 1500000100.0 <= t.time < 1500000200.0]
+            self.assertEqual(columns['txid'], [t.txid for t in expected])
+            self.assertEqual(list(columns['price']), [t.price for t in expected])
+
+    def test_dictionaries_are_not_in_the_footer(self):
+        with Columnar_Writer(self.path, Trade) as writer:
+            writer.write(_trades(100))
+        with open(self.path, 'rb') as f:
+            self.assertNotIn('T99', f.read())
+
+    def test_flush_buffers_small_row_groups(self):
+        writer = Columnar_Writer(self.path, Trade, min_row_group_size = 100)
+        for start in range(0, 250, 50):
+            writer.write(_trades(50, start))
+            writer.flush()
+        self.assertFalse(writer.flush())
+        self.assertTrue(writer.flush(True))
+        writer.close()
+
+        with Columnar_Reader(self.path) as reader:
+            self.assertEqual((reader.rows, reader.row_groups), (250, 3))
+
+    def test_recovers_row_groups_without_footer(self):
+        writer = Columnar_Writer(self.path, Trade, min_row_group_size = 1)
+        writer.write(_trades(100))
+        writer.flush()
+        complete = os.path.getsize(self.path)
+        writer.write(_trades(100, 100))
+        writer.close()
+
+        # Crash while the second row group was written: the footer and part of the row group are missing
+        with open(self.path, 'r+b') as f:
+            f.truncate(complete + 50)
+
+        with Columnar_Reader(self.path) as reader:
+            self.assertTrue(reader.recovered)
+            self.assertEqual(reader.rows, 100)
+            self.assertEqual(list(reader.records())[-1].txid, 'T99')
+
+        with Columnar_Writer(self.path, Trade, append = True) as writer:
+            writer.write(_trades(100, 100))
+
+        with Columnar_Reader(self.path) as reader:
+            self.assertFalse(reader.recovered)
+            self.assertEqual([r.txid for r in reader.records()], ['T' + str(i) for i in range(200)])
+
+    def test_append_needs_same_record_class(self):
+        from Records import Candle
+        with Columnar_Writer(self.path, Trade) as writer:
+            writer.write(_trades(10))
+        self.assertRaises(ValueError, Columnar_Writer, self.path, Candle, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
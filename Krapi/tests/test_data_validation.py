@@ -0,0 +1,82 @@
+import unittest
+from DataValidation import validate_candles, validate_trades, validate_ledger, Stream_Validator
+from Records import Candle, Trade, Ledger_Entry
+
+
+def _public(time, price = 1000.0, volume = 0.1):
+    return Trade(None, 'XXBTZEUR', time, price, volume, 'buy', 'market', '', None, None, None)
+
+
+def _own(txid, time):
+    return Trade(txid, 'XXBTZEUR', time, 1000.0, 0.1, 'buy', 'limit', '', 'O1', 100.0, 0.16)
+
+
+def _candle(time, close = 1000.0):
+    return Candle('XXBTZEUR', time, close, close, close, close, close, 1.0, 1)
+
+
+class Validate_Trades_Test(unittest.TestCase):
+
+    def test_identical_public_trades_are_kept(self):
+        trades = [_public(1.0), _public(2.0), _public(2.0), _public(3.0)]
+        report = validate_trades(trades, repair = True)
+        self.assertEqual(report.records, trades)
+        self.assertEqual(report.counts, {'repeat':1})
+        self.assertEqual(report.issues[0].index, 2)
+
+    def test_duplicate_account_trades_are_dropped(self):
+        trades = [_own('T1', 1.0), _own('T2', 2.0), _own('T1', 1.0)]
+        report = validate_trades(trades, repair = True)
+        self.assertEqual([t.txid for t in report.records], ['T1', 'T2'])
+        self.assertEqual(report.counts, {'duplicate':1})
+
+    def test_order_and_gaps(self):
+        trades = [_public(1.0), _public(5.0), _public(3.0), _public(100.0)]
+        report = validate_trades(trades, repair = True, max_gap = 60.0)
+        self.assertEqual([t.time for t in report.records], [1.0, 3.0, 5.0, 100.0])
+        self.assertEqual(report.counts, {'order':1, 'gap':1})
+
+
+class Validate_Candles_Test(unittest.TestCase):
+
+    def test_last_conflicting_candle_wins_and_gaps_are_filled(self):
+        candles = [_candle(0), _candle(60), _candle(60, 1010.0), _candle(240)]
+        report = validate_candles(candles, 60, repair = True, fill_gaps = True)
+        self.assertEqual([c.time for c in report.records], [0, 60, 120, 180, 240])
+        self.assertEqual(report.records[1].close, 1010.0)
+        self.assertEqual(report.records[2].close, 1010.0)
+        self.assertEqual(report.records[2].volume, 0.0)
+        self.assertEqual(report.counts, {'conflict':1, 'gap':1})
+
+
+class Validate_Ledger_Test(unittest.TestCase):
+
+    def test_balance_mismatch(self):
+        entries = [Ledger_Entry('L1', 'R1', 1.0, 'deposit', 'currency', 'ZEUR', 100.0, 0.0, 100.0),
+                   Ledger_Entry('L2', 'R2', 2.0, 'trade', 'currency', 'ZEUR', -50.0, 1.0, 49.0),
+                   Ledger_Entry('L4', 'R4', 4.0, 'trade', 'currency', 'ZEUR', -10.0, 0.0, 29.0)]
+        report = validate_ledger(entries)
+        self.assertEqual([(issue.kind, issue.key) for issue in report.issues], [('balance', 'L4')])
+
+
+class Stream_Validator_Test(unittest.TestCase):
+
+    def test_keys_are_checked_across_pages(self):
+        validator = Stream_Validator()
+        records, issues = validator.add([_own('T2', 2.0), _own('T1', 1.0)])
+        self.assertEqual([t.txid for t in records], ['T1', 'T2'])
+        self.assertEqual([issue.kind for issue in issues], ['order'])
+
+        records, issues = validator.add([_own('T2', 2.0), _own('T3', 3.0)])
+        self.assertEqual([t.txid for t in records], ['T3'])
+        self.assertEqual([issue.kind for issue in issues], ['duplicate'])
+
+    def test_public_trades_are_never_dropped(self):
+        validator = Stream_Validator()
+        page = [_public(1.0), _public(1.0)]
+        self.assertEqual(validator.add(page), (page, []))
+        self.assertEqual(validator.add(page), (page, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
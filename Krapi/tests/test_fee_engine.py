@@ -0,0 +1,61 @@
+import unittest
+from array import array
+from FeeEngine import Fee_Engine
+from PrivateApiRequests import Request_Trade_Volume
+from PublicApiRequests import Request_Tradable_Asset_Pairs
+from tests.fakes import Fake_Request_Mgr
+
+
+class Fee_Engine_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.req_mgr = Fake_Request_Mgr()
+        self.req_mgr.asset_pairs = {'XXBTZUSD':{'fees':[[0, 0.26], [50000, 0.24], [100000, 0.22]],
+                                                'fees_maker':[[100000, 0.12], [0, 0.16], [50000, 0.14]]},
+                                    'USDTZUSD':{'fees':[[0, 0.2]]},
+                                    'XXBTZUSD.d':{}}
+        request = Request_Tradable_Asset_Pairs()
+        request.info = 'fees'
+        self.assertTrue(self.req_mgr.send_request(request))
+        self.engine = Fee_Engine(request.asset_pairs_dict)
+
+    def test_fee_rates_of_the_tiers(self):
+        self.assertEqual(self.engine.get_fee_rate('XXBTZUSD'), 0.26)
+        self.assertEqual(self.engine.get_fee_rate('XXBTZUSD', volume = 50000), 0.24)
+        self.assertEqual(self.engine.get_fee_rate('XXBTZUSD', maker = True, volume = 75000), 0.14)
+        self.assertEqual(self.engine.get_fee_rate('XXBTZUSD', maker = True, volume = 1e9), 0.12)
+        self.assertEqual(self.engine.get_fee_rate('USDTZUSD', maker = True), 0.2)
+        self.assertEqual(self.engine.get_fee_rate('XXBTZUSD.d'), 0.0)
+        self.assertRaises(KeyError, self.engine.get_fee_rate, 'XETHZUSD')
+
+    def test_next_tier(self):
+        self.assertEqual(self.engine.next_tier('XXBTZUSD', volume = 60000), (100000.0, 0.22, 40000.0))
+        self.assertEqual(self.engine.next_tier('XXBTZUSD', maker = True), (50000.0, 0.14, 50000.0))
+        self.assertIsNone(self.engine.next_tier('XXBTZUSD', volume = 100000))
+
+    def test_volume_from_trade_volume(self):
+        self.req_mgr.trade_volume = {'currency':'ZUSD', 'volume':'60000.5000', 'fees':{}, 'fees_maker':{}}
+        request = Request_Trade_Volume()
+        self.assertTrue(self.req_mgr.send_request(request))
+        self.engine.update_from_trade_volume(request)
+
+        self.assertEqual((self.engine.volume, self.engine.currency), (60000.5, 'ZUSD'))
+        self.assertEqual(self.engine.get_fee_rate('XXBTZUSD'), 0.24)
+
+    def test_compute_fees(self):
+        fees = self.engine.compute_fees(['XXBTZUSD', 'USDTZUSD', 'XXBTZUSD'], array('d', [1000.0, 1.0, 1000.0]),
+                                        array('d', [2.0, 500.0, 2.0]), makers = [False, False, True])
+        self.assertEqual([round(fee, 6) for fee in fees], [5.2, 1.0, 3.2])
+
+    def test_compute_fees_crosses_tiers(self):
+        self.engine.set_volume(47000)
+        fees = self.engine.compute_fees('XXBTZUSD', [1000.0] * 3, [2.0] * 3, volume_rate = 1.0)
+        self.assertEqual([round(fee, 6) for fee in fees], [5.2, 5.2, 4.8])
+        self.assertEqual(self.engine.volume, 47000.0)
+
+        fees = self.engine.compute_fees('XXBTZUSD', [1000.0] * 2, [2.0] * 2, volume = 99000, volume_rate = 1.0)
+        self.assertEqual([round(fee, 6) for fee in fees], [4.8, 4.4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+from Benchmark import create_credentials
+from KeyAgent import Key_Agent, request_credentials
+
+
+class Key_Agent_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, 'agent', 'agent.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hands_out_credentials(self):
+        cred_mgr = create_credentials(self.directory)
+        with Key_Agent(self.socket_path) as agent:
+            agent.add('bench', cred_mgr)
+            self.assertEqual(request_credentials('bench', self.socket_path), cred_mgr.get_credentials())
+            self.assertEqual(request_credentials('other', self.socket_path), None)
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_refuses_to_replace_a_running_agent(self):
+        with Key_Agent(self.socket_path):
+            self.assertRaises(Exception, Key_Agent, self.socket_path)
+            self.assertTrue(os.path.exists(self.socket_path))
+
+    def test_replaces_a_stale_socket(self):
+        os.mkdir(os.path.dirname(self.socket_path), 0700)
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+
+        with Key_Agent(self.socket_path):
+            self.assertEqual(request_credentials('bench', self.socket_path), None)
+
+    def test_refuses_other_files_and_open_directories(self):
+        os.mkdir(os.path.dirname(self.socket_path), 0700)
+        with open(self.socket_path, 'w') as f:
+            f.write('data')
+        self.assertRaises(Exception, Key_Agent, self.socket_path)
+        self.assertTrue(os.path.exists(self.socket_path))
+
+        os.remove(self.socket_path)
+        os.chmod(os.path.dirname(self.socket_path), 0755)
+        self.assertRaises(Exception, Key_Agent, self.socket_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import logging
+import time
+import unittest
+from MarketFeed import Market_Feed
+from MockKrakenFeed import Mock_Kraken_Feed
+
+
+class Market_Feed_Test(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.mock = Mock_Kraken_Feed(interval = 0.01)
+        self.mock.start()
+        self.feed = Market_Feed(self.mock.get_url(), reconnect_delay = 0.01, max_reconnect_delay = 0.05, timeout = 2.0)
+
+    def tearDown(self):
+        self.feed.stop()
+        self.mock.stop()
+        logging.disable(logging.NOTSET)
+
+    def wait_for(self, condition, timeout = 5.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_delivers_rest_like_requests(self):
+        subscription = self.feed.subscribe('ticker', 'XBT/EUR')
+        self.feed.start()
+        request = subscription.get(timeout = 5.0)
+        self.assertIsNotNone(request)
+        self.assertLess(float(request.get_best_bid('XBT/EUR')), float(request.get_best_ask('XBT/EUR')))
+
+    def test_reconnects_and_resubscribes(self):
+        subscription = self.feed.subscribe('spread', 'XBT/EUR')
+        self.feed.start()
+        self.assertIsNotNone(subscription.get(timeout = 5.0))
+
+        self.mock.drop_connections()
+        self.assertTrue(self.wait_for(lambda: self.feed.reconnects == 1))
+        self.assertEqual(self.mock.connections_accepted, 2)
+        subscription.get(timeout = 0)
+        self.assertIsNotNone(subscription.get(timeout = 5.0))
+
+    def test_resubscribes_book_on_checksum_mismatch(self):
+        subscription = self.feed.subscribe('book', 'XBT/EUR', depth = 10)
+        self.feed.start()
+        self.assertIsNotNone(subscription.get(timeout = 5.0))
+
+        self.mock.corrupt_checksum = True
+        self.assertTrue(self.wait_for(lambda: self.feed.checksum_failures == 1))
+        subscription.get(timeout = 0)
+        request = subscription.get(timeout = 5.0)
+        self.assertIsNotNone(request)
+        self.assertEqual(len(request.get_asks('XBT/EUR')), 10)
+        self.assertEqual(len(request.get_bids('XBT/EUR')), 10)
+        self.assertEqual(self.feed.reconnects, 0)
+
+    def test_conflates_ticker_and_queues_trades(self):
+        ticker = self.feed.subscribe('ticker', 'XBT/EUR')
+        trades = self.feed.subscribe('trade', 'XBT/EUR')
+        self.feed.start()
+        self.assertTrue(self.wait_for(lambda: self.mock.connections_accepted == 1))
+        time.sleep(0.3)
+        self.feed.stop()
+
+        self.assertIsNotNone(ticker.get(timeout = 0))
+        self.assertIsNone(ticker.get(timeout = 0))
+        self.assertEqual(ticker.dropped, 0)
+
+        queued = 0
+        while trades.get(timeout = 0) is not None:
+            queued += 1
+        self.assertGreater(queued, 1)
+
+    def test_failing_callback_doesnt_stop_dispatcher(self):
+        received = []
+
+        def failing(request):
+            raise ValueError("Consumer bug")
+
+        self.feed.subscribe('ticker', 'XBT/EUR', failing)
+        self.feed.subscribe('ticker', 'XBT/EUR', received.append)
+        self.feed.start()
+        self.assertTrue(self.wait_for(lambda: len(received) >= 2))
+        self.assertGreaterEqual(self.feed.errors, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
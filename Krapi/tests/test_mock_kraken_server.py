@@ -0,0 +1,224 @@
+import httplib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import urlparse
+from StringIO import StringIO
+from threading import Thread, Event
+import Benchmark
+from Benchmark import Benchmark_Result, compare, create_credentials, measure
+from KrakenConnector import Kraken_Connector
+from MockKrakenServer import Mock_Kraken_Server
+from PrivateApiRequests import Request_Ledger_Info, Request_Balance
+from PublicApiRequests import Request_Ticker_Information, Request_Recent_Trades
+
+
+def _run_threads(target, count):
+    """Runs target(index) in count threads that start at the same moment"""
+
+    go = Event()
+
+    def run(index):
+        go.wait()
+        target(index)
+
+    threads = [Thread(target = run, args = (index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    go.set()
+    for thread in threads:
+        thread.join()
+
+
+class _Slow_Random(random.Random):
+    """Gives other threads the chance to run in the middle of generating a payload"""
+
+    def uniform(self, a, b):
+        time.sleep(0.0001)
+        return random.Random.uniform(self, a, b)
+
+
+class Mock_Kraken_Server_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = Mock_Kraken_Server(size = 120)
+        self.server.start()
+        self.connector = Kraken_Connector(self.server.get_url())
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def __post(self, path, headers = {}):
+        connection = httplib.HTTPConnection(urlparse.urlparse(self.server.get_url()).netloc)
+        try:
+            connection.request('POST', path, '', headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def test_public_responses(self):
+        request = Request_Ticker_Information()
+        request.asset_pair_list = ['XXBTZEUR', 'XETHZEUR']
+        self.assertTrue(request.validate_response(self.connector.query_request(request)))
+        self.assertEqual(sorted(request.asset_pairs_dict), ['XETHZEUR', 'XXBTZEUR'])
+        best_ask = request.get_best_ask('XXBTZEUR')
+        self.assertGreater(best_ask, request.get_best_bid('XXBTZEUR'))
+
+        # Generated payloads are kept, the same request gets the same answer
+        self.assertTrue(request.validate_response(self.connector.query_request(request)))
+        self.assertEqual(request.get_best_ask('XXBTZEUR'), best_ask)
+        self.assertEqual(self.server.requests_served, 2)
+
+        # The same seed generates the same payloads
+        data = {'pair':'XXBTZEUR,XETHZEUR'}
+        with Mock_Kraken_Server(seed = 0) as other:
+            self.assertEqual(other.respond('public', 'Ticker', data), self.server.respond('public', 'Ticker', data))
+
+    def test_trades_since_are_paged(self):
+        request = Request_Recent_Trades()
+        request.asset_pair_list = ['XXBTZEUR']
+        request.since = 0
+        times = []
+        while True:
+            self.assertTrue(request.validate_response(self.connector.query_request(request)))
+            trades = list(request.get_trades('XXBTZEUR'))
+            if not trades:
+                break
+            self.assertLessEqual(len(trades), Mock_Kraken_Server.page_size)
+            times.extend(trade.time for trade in trades)
+            request.since = request.last_id
+        self.assertEqual(len(times), 120)
+        self.assertEqual(times, sorted(times))
+
+    def test_unknown_methods_and_paths(self):
+        self.assertEqual(json.loads(self.server.respond('public', 'Unknown', {}))['error'], ['EGeneral:Unknown method'])
+        self.assertEqual(self.__post('/0/other/Ticker')[0], 404)
+        status, body = self.__post('/0/private/Balance')
+        self.assertEqual((status, json.loads(body)['error']), (200, ['EAPI:Invalid key']))
+
+    def test_nonces(self):
+        self.assertTrue(self.server.check_nonce('key', '10'))
+        self.assertFalse(self.server.check_nonce('key', '10'))
+        self.assertFalse(self.server.check_nonce('key', '9'))
+        self.assertFalse(self.server.check_nonce('key', 'abc'))
+        self.assertTrue(self.server.check_nonce('other key', '5'))
+        self.assertTrue(self.server.check_nonce('key', '11'))
+
+        status, body = self.__post('/0/private/Balance', {'API-Key':'key'})
+        self.assertEqual(json.loads(body)['error'], ['EAPI:Invalid nonce'])
+
+    def test_private_requests(self):
+        cred_mgr = create_credentials(self.directory)
+        request = Request_Balance()
+        self.assertTrue(request.validate_response(self.connector.query_request(request, cred_mgr)))
+        self.assertEqual(sorted(request.balance_dict), ['XXBT', 'ZEUR'])
+
+        # Ledgers are paged newest first with the total count
+        request = Request_Ledger_Info()
+        request.offset = 0
+        ledgers = {}
+        while request.offset < 120:
+            self.assertTrue(request.validate_response(self.connector.query_request(request, cred_mgr)))
+            self.assertEqual(request.amount, 120)
+            ledgers.update(request.ledger_info_dict)
+            request.offset += len(request.ledger_info_dict)
+        self.assertEqual(len(ledgers), 120)
+
+    def test_concurrent_orders(self):
+        txids = []
+
+        def add_orders(index):
+            for _ in range(50):
+                response = json.loads(self.server.respond('private', 'AddOrder', {'pair':'XXBTZEUR', 'type':'buy',
+                                                                                   'ordertype':'limit', 'price':'1.0',
+                                                                                   'volume':'1.0'}))
+                txids.extend(response['result']['txid'])
+
+        _run_threads(add_orders, 8)
+        self.assertEqual(len(set(txids)), 400)
+        open_orders = json.loads(self.server.respond('private', 'OpenOrders', {}))['result']['open']
+        self.assertEqual(sorted(open_orders), sorted(txids))
+
+        canceled = []
+
+        def cancel_orders(index):
+            for txid in txids[index::8]:
+                canceled.append(json.loads(self.server.respond('private', 'CancelOrder', {'txid':txid}))['result'])
+
+        _run_threads(cancel_orders, 8)
+        self.assertEqual(canceled, [{'count':1}] * 400)
+        self.assertEqual(json.loads(self.server.respond('private', 'OpenOrders', {}))['result']['open'], {})
+        self.assertEqual(self.server.requests_served, 802)
+
+    def test_concurrent_generation(self):
+        self.server._random = _Slow_Random(0)
+        bodies = []
+
+        def ticker(index):
+            for _ in range(20):
+                bodies.append(self.server.respond('public', 'Ticker', {'pair':'XXBTZEUR'}))
+                self.server.respond('public', 'Depth', {'pair':'P' + str(index)})
+
+        _run_threads(ticker, 8)
+        self.assertEqual(len(set(bodies)), 1)
+
+
+class Benchmark_Test(unittest.TestCase):
+
+    def test_result(self):
+        result = Benchmark_Result('name', [0.3, 0.1, 0.2, 0.4], 0.2, 2.0, 1000)
+        self.assertEqual((result.percentile(0), result.percentile(50), result.percentile(100)), (0.1, 0.3, 0.4))
+        stats = result.to_dict()
+        self.assertEqual(stats['requests'], 4)
+        self.assertAlmostEqual(stats['throughput'], 2.0)
+        self.assertAlmostEqual(stats['cpu_per_request'], 0.05)
+        self.assertEqual(Benchmark_Result('empty', [], 0.0, 0.0, 0).to_dict()['throughput'], 0.0)
+
+    def test_measure(self):
+        calls = []
+        result = measure('name', lambda: calls.append(1), 5)
+        self.assertEqual((len(calls), len(result.latencies)), (5, 5))
+        self.assertRaises(Exception, measure, 'name', lambda: False, 1)
+
+    def test_compare(self):
+        baseline = {'a':{'throughput':100.0, 'cpu_per_request':0.01},
+                    'b':{'throughput':100.0, 'cpu_per_request':0.01},
+                    'c':{'throughput':100.0, 'cpu_per_request':0.01}}
+        results = {'a':{'throughput':85.0, 'cpu_per_request':0.0115},
+                   'b':{'throughput':70.0, 'cpu_per_request':0.01},
+                   'c':{'throughput':100.0, 'cpu_per_request':0.013},
+                   'new':{'throughput':1.0, 'cpu_per_request':1.0}}
+        self.assertEqual(sorted(compare(results, baseline, 0.2)), ['b', 'c'])
+
+    def test_main(self):
+        directory = tempfile.mkdtemp()
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            path = os.path.join(directory, 'result.json')
+            self.assertEqual(Benchmark.main(['--size', '5', '--iterations', '3', '--save', path]), 0)
+            with open(path, 'r') as f:
+                summary = json.load(f)
+            self.assertEqual(sorted(summary), ['batch.depth', 'batch.ohlc', 'batch.ticker', 'paginated.ledgers',
+                                               'paginated.trades_history', 'sync.ticker', 'sync.ticker_template'])
+            self.assertEqual(summary['sync.ticker']['requests'], 3)
+
+            # A much faster baseline is reported as regression
+            for stats in summary.itervalues():
+                stats['throughput'] *= 1000
+            with open(path, 'w') as f:
+                json.dump(summary, f)
+            self.assertEqual(Benchmark.main(['--size', '5', '--iterations', '3', '--scenarios', 'sync',
+                                             '--baseline', path]), 1)
+            self.assertIn('Regressions: ', sys.stdout.getvalue())
+        finally:
+            sys.stdout = stdout
+            shutil.rmtree(directory)
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+import time
+import unittest
+from threading import Thread
+from Benchmark import create_credentials
+from MockKrakenServer import Mock_Kraken_Server
+from OrderSubmitter import Order_Submitter
+from PrivateApiRequests import Request_Add_Order, Request_Balance, Request_Cancel_Order
+from RequestMgr import Request_Mgr
+
+
+def _order(volume = 1.0):
+    request = Request_Add_Order()
+    request.pair = 'XXBTZEUR'
+    request.price = 1000.0
+    request.volume = volume
+    return request
+
+
+class Order_Submitter_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cred_mgr = create_credentials(self.directory)
+        self.server = Mock_Kraken_Server()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def test_submit_and_cancel(self):
+        with Order_Submitter(self.cred_mgr, self.server.get_url(), keep_alive = None) as submitter:
+            order = _order()
+            self.assertTrue(submitter.submit(order))
+            self.assertEqual(len(order.txid), 1)
+            self.assertGreaterEqual(order.ack_latency, 0.0)
+
+            cancel = Request_Cancel_Order()
+            cancel.txid = order.txid[0]
+            self.assertTrue(submitter.submit(cancel))
+            self.assertEqual(cancel.count, 1)
+
+            # The order is gone on the server
+            self.assertFalse(submitter.submit(cancel))
+            self.assertEqual(submitter.get_latency_stats()['count'], 3)
+
+    def test_nonces_are_shared_with_request_mgr(self):
+        # The manager's clock runs ahead, like a Clock_Sync clock of a host that is behind the server
+        req_mgr = Request_Mgr(4, self.cred_mgr, self.server.get_url(), clock = lambda: time.time() + 5.0)
+        results = []
+
+        with Order_Submitter(self.cred_mgr, self.server.get_url(), keep_alive = None) as submitter:
+            def account():
+                for _ in range(10):
+                    request = Request_Balance()
+                    results.append((req_mgr.send_request(request), request.errors))
+
+            def orders():
+                for _ in range(10):
+                    request = _order()
+                    results.append((submitter.submit(request), request.errors))
+
+            threads = [Thread(target = account), Thread(target = orders)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual([errors for ok, errors in results if not ok], [])
+
+    def test_clock_is_used_for_nonces(self):
+        with Order_Submitter(self.cred_mgr, self.server.get_url(), keep_alive = None,
+                             clock = lambda: time.time() + 3600.0) as submitter:
+            self.assertTrue(submitter.submit(_order()))
+
+        # Nonces of the clock that runs an hour ahead are already spent
+        req_mgr = Request_Mgr(4, self.cred_mgr, self.server.get_url())
+        self.assertTrue(req_mgr.send_request(Request_Balance()))
+        self.assertFalse(self.server.check_nonce('benchmark', str(int(1000 * (time.time() + 3599.0)))))
+
+
+if __name__ == '__main__':
+    unittest.main()
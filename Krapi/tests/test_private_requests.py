@@ -0,0 +1,66 @@
+import unittest
+import urlparse
+from PrivateApiRequests import Request_Add_Order, Request_Cancel_Order, Request_Cancel_Order_Batch
+
+
+def _post_data(request):
+    return dict(urlparse.parse_qsl(request.get_post_data()))
+
+
+class Order_Request_Test(unittest.TestCase):
+
+    def test_add_order_drops_fields_of_earlier_sends(self):
+        request = Request_Add_Order()
+        request.pair = 'XXBTZEUR'
+        request.volume = 1.5
+        request.price = 1000.0
+        request.oflags = 'post'
+        request.validate = True
+        self.assertEqual(_post_data(request), {'pair':'XXBTZEUR', 'type':'buy', 'ordertype':'limit', 'volume':'1.5',
+                                               'price':'1000.0', 'oflags':'post', 'validate':'true'})
+
+        request.order_type = 'market'
+        request.price = None
+        request.oflags = None
+        request.validate = False
+        self.assertEqual(_post_data(request), {'pair':'XXBTZEUR', 'type':'buy', 'ordertype':'market', 'volume':'1.5'})
+
+    def test_add_order_needs_pair_and_volume(self):
+        request = Request_Add_Order()
+        request.pair = 'XXBTZEUR'
+        self.assertRaises(ValueError, request.get_post_data)
+
+        request.pair = None
+        request.volume = 1.0
+        self.assertRaises(ValueError, request.get_post_data)
+
+    def test_otp_is_kept(self):
+        request = Request_Cancel_Order()
+        request.txid = 'O1'
+        request.set_otp(123456)
+        self.assertEqual(_post_data(request), {'txid':'O1', 'otp':'123456'})
+
+    def test_cancel_order_needs_txid(self):
+        self.assertRaises(ValueError, Request_Cancel_Order().get_post_data)
+
+    def test_cancel_batch_drops_orders_of_earlier_sends(self):
+        request = Request_Cancel_Order_Batch()
+        request.txid = ['O1', 'O2', 'O3']
+        self.assertEqual(_post_data(request), {'orders[0]':'O1', 'orders[1]':'O2', 'orders[2]':'O3'})
+
+        request.txid = ['O4']
+        self.assertEqual(_post_data(request), {'orders[0]':'O4'})
+
+    def test_cancel_batch_rejects_missing_ids(self):
+        request = Request_Cancel_Order_Batch()
+        self.assertRaises(ValueError, request.get_post_data)
+
+        request.txid = ['O1', None]
+        self.assertRaises(ValueError, request.get_post_data)
+
+        request.txid = ['O' + str(i) for i in range(51)]
+        self.assertRaises(ValueError, request.get_post_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
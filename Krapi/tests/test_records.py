@@ -0,0 +1,93 @@
+import pickle
+import unittest
+from array import array
+from functools import partial
+from PublicApiRequests import Request_OHLC_Data, Request_Order_Book
+from PrivateApiRequests import Request_Trade_History
+from Records import Record_View, Trade, Candle, Book_Level, Ledger_Entry, Order
+
+
+_trade_rows = [['100.0', '1.5', 1500000000.5, 'b', 'l', ''],
+               ['101.0', '0.5', 1500000001.5, 's', 'm', ''],
+               ['102.0', '2.0', 1500000002.5, 'b', 'm', '']]
+
+
+class Records_Test(unittest.TestCase):
+
+    def test_records_from_responses(self):
+        self.assertEqual(Trade.from_public('XXBTZEUR', _trade_rows[0]),
+                         Trade(None, 'XXBTZEUR', 1500000000.5, 100.0, 1.5, 'buy', 'limit', '', None, None, None))
+        self.assertEqual(Trade.from_history('T1', {'pair':'XXBTZEUR', 'time':5.0, 'price':'100', 'vol':'2', 'type':'sell',
+                                                   'ordertype':'limit', 'ordertxid':'O1', 'cost':'200', 'fee':'0.3'}),
+                         Trade('T1', 'XXBTZEUR', 5.0, 100.0, 2.0, 'sell', 'limit', '', 'O1', 200.0, 0.3))
+        self.assertEqual(Ledger_Entry.from_response('L1', {'refid':'T1', 'time':5.0, 'type':'trade', 'aclass':'currency',
+                                                           'asset':'ZEUR', 'amount':'-200', 'fee':'0.3', 'balance':'800'}),
+                         Ledger_Entry('L1', 'T1', 5.0, 'trade', 'currency', 'ZEUR', -200.0, 0.3, 800.0))
+        self.assertEqual(Candle.from_response('XXBTZEUR', [60, '1', '3', '0.5', '2', '1.5', '10', 4]),
+                         Candle('XXBTZEUR', 60, 1.0, 3.0, 0.5, 2.0, 1.5, 10.0, 4))
+        self.assertEqual(Book_Level.from_response('XXBTZEUR', 'ask', ['100.5', '2', 1500000000]),
+                         Book_Level('XXBTZEUR', 'ask', 100.5, 2.0, 1500000000))
+
+        order = Order.from_response('O1', {'status':'open', 'opentm':5.0, 'vol':'2', 'vol_exec':'0.5',
+                                           'descr':{'pair':'XXBTZEUR', 'type':'buy', 'ordertype':'limit', 'price':'100'}})
+        self.assertEqual((order.txid, order.pair, order.side, order.price, order.volume, order.volume_exec, order.close_time),
+                         ('O1', 'XXBTZEUR', 'buy', 100.0, 2.0, 0.5, None))
+
+    def test_records_are_compact_and_picklable(self):
+        trade = Trade.from_public('XXBTZEUR', _trade_rows[0])
+        self.assertFalse(hasattr(trade, '__dict__'))
+        self.assertEqual(pickle.loads(pickle.dumps(trade, pickle.HIGHEST_PROTOCOL)), trade)
+        self.assertNotEqual(trade, Trade.from_public('XXBTZEUR', _trade_rows[1]))
+
+    def test_list_view(self):
+        view = Record_View(_trade_rows, partial(Trade.from_public, 'XXBTZEUR'))
+        self.assertEqual(len(view), 3)
+        self.assertEqual(view[1].price, 101.0)
+        self.assertEqual([trade.side for trade in view], ['buy', 'sell', 'buy'])
+
+        buys = view.filter(lambda trade: trade.side == 'buy')
+        self.assertEqual(len(buys), 2)
+        self.assertEqual([trade.price for trade in buys.filter(lambda trade: trade.volume > 1.6)], [102.0])
+        self.assertRaises(TypeError, buys.__getitem__, 0)
+        self.assertEqual(len(view), 3)
+
+    def test_mapping_view(self):
+        view = Record_View({'L1':{'refid':'T1', 'time':5.0, 'type':'trade', 'aclass':'currency', 'asset':'ZEUR',
+                                  'amount':'-200', 'fee':'0.3', 'balance':'800'}}, Ledger_Entry.from_response)
+        self.assertEqual([entry.ledger_id for entry in view], ['L1'])
+        self.assertRaises(TypeError, view.__getitem__, 0)
+
+    def test_materialized_records_and_columns_dont_reference_the_rows(self):
+        rows = [list(row) for row in _trade_rows]
+        view = Record_View(rows, partial(Trade.from_public, 'XXBTZEUR'))
+        records = view.to_list()
+        times, prices = view.filter(lambda trade: trade.side == 'buy').columns('time', 'price')
+        del rows[:]
+
+        self.assertEqual([trade.price for trade in records], [100.0, 101.0, 102.0])
+        self.assertEqual(times, array('d', [1500000000.5, 1500000002.5]))
+        self.assertEqual(prices, array('d', [100.0, 102.0]))
+        self.assertEqual(view.columns('price'), (array('d'),))
+
+    def test_request_views(self):
+        request = Request_OHLC_Data()
+        self.assertEqual(request.get_candles('XXBTZEUR').to_list(), [])
+        self.assertTrue(request.validate_response({'error':[], 'result':{'XXBTZEUR':[[60, '1', '3', '0.5', '2', '1.5', '10', 4]],
+                                                                         'last':60}}))
+        self.assertEqual([candle.close for candle in request.get_candles('XXBTZEUR')], [2.0])
+
+        request = Request_Order_Book()
+        self.assertTrue(request.validate_response({'error':[], 'result':{'XXBTZEUR':{'asks':[['101', '1', 5]],
+                                                                                     'bids':[['99', '2', 5], ['98', '1', 5]]}}}))
+        self.assertEqual([level.price for level in request.get_bids('XXBTZEUR')], [99.0, 98.0])
+        self.assertEqual(len(request.get_asks('XETHZEUR')), 0)
+
+        request = Request_Trade_History()
+        self.assertTrue(request.validate_response({'error':[], 'result':{'count':1, 'trades':{
+            'T1':{'pair':'XXBTZEUR', 'time':5.0, 'price':'100', 'vol':'2', 'type':'buy', 'ordertype':'market',
+                  'cost':'200', 'fee':'0.3'}}}}))
+        self.assertEqual([(trade.txid, trade.cost) for trade in request.get_trades()], [('T1', 200.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import inspect
+import json
+import unittest
+import PrivateApiRequests
+import PublicApiRequests
+from Request import Request, Lazy_Response
+
+
+def _request_classes():
+    for module in (PublicApiRequests, PrivateApiRequests):
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, Request) and name.startswith('Request_'):
+                yield cls
+
+
+class Request_Reset_Test(unittest.TestCase):
+
+    def test_result_fields_start_with_their_reset_value(self):
+        for cls in _request_classes():
+            request = cls()
+            for attr, value in cls._result_fields:
+                if hasattr(request, attr):
+                    self.assertEqual(getattr(request, attr), value, cls.__name__ + '.' + attr)
+
+    def test_reset_clears_results(self):
+        request = PublicApiRequests.Request_Recent_Trades()
+        request.asset_pair_list = ['XXBTZEUR']
+        request.since = 5
+        self.assertTrue(request.validate_response({'error':[], 'result':{'XXBTZEUR':[], 'last':'7'}}))
+        self.assertEqual(request.last_id, '7')
+
+        request.reset()
+        self.assertEqual((request.asset_pairs_dict, request.last_id, request.raw_response), (None, None, {}))
+        self.assertEqual(request.since, 5)
+
+    def test_reset_gives_new_containers(self):
+        request = PrivateApiRequests.Request_Add_Order()
+        self.assertTrue(request.validate_response({'error':[], 'result':{'descr':{'order':'buy'}, 'txid':['O1']}}))
+
+        request.reset()
+        self.assertEqual((request.descr, request.txid), ({}, []))
+        request.txid.append('O2')
+        self.assertEqual(PrivateApiRequests.Request_Add_Order._result_fields, (('descr', {}), ('txid', [])))
+
+
+
+class Lazy_Result_Test(unittest.TestCase):
+    """A malformed value raises ValueError when it is decoded, so the tests see which parts were decoded"""
+
+    def test_reads_one_pair_without_decoding_the_others(self):
+        request = PublicApiRequests.Request_Ticker_Information()
+        response = Lazy_Response('{"error":[],"result":{"XXBTZEUR":{"a":["100.5","1","1.000"],"b":["100.1","2","2.000"]},'
+                                 '"XETHZEUR":{"a":["1",}}}')
+        self.assertTrue(request.validate_response(response))
+        self.assertEqual(request.get_best_ask('XXBTZEUR'), 100.5)
+        self.assertEqual(request.get_best_bid('XXBTZEUR'), 100.1)
+        self.assertTrue('XETHZEUR' in request.asset_pairs_dict)
+        self.assertRaises(ValueError, request.get_best_ask, 'XETHZEUR')
+
+    def test_result_fields_are_decoded_on_first_access(self):
+        request = PublicApiRequests.Request_Recent_Trades()
+        self.assertTrue(request.validate_response(Lazy_Response('{"error":[],"result":{"last":"7","XXBTZEUR":[[}}')))
+        self.assertEqual(request.last_id, '7')
+        self.assertRaises(ValueError, request.get_trades, 'XXBTZEUR')
+
+        request = PublicApiRequests.Request_Time()
+        self.assertTrue(request.validate_response(Lazy_Response('{"error":[],"result":{"unixtime":1500000000,"rfc1123":}}')))
+        self.assertEqual(request.unixtime, 1500000000)
+        self.assertRaises(ValueError, getattr, request, 'rfc1123')
+
+        request = PrivateApiRequests.Request_Closed_Orders()
+        self.assertTrue(request.validate_response(Lazy_Response('{"result":{"count":3,"closed":{"O1":{]}},"error":[]}')))
+        self.assertEqual(request.count, 3)
+        self.assertRaises(ValueError, getattr, request, 'closed_dict')
+
+        request = PrivateApiRequests.Request_Ledger_Info()
+        self.assertTrue(request.validate_response(Lazy_Response('{"error":[],"result":{"ledger":{"L1":[}},"count":2}}')))
+        self.assertEqual(request.amount, 2)
+        self.assertRaises(ValueError, request.get_ledger_entries)
+
+    def test_errors_are_found_without_decoding_the_result(self):
+        request = PrivateApiRequests.Request_Open_Orders()
+        self.assertFalse(request.validate_response(Lazy_Response('{"error":["EAPI:Invalid nonce"]}')))
+        self.assertEqual(request.errors, ['EAPI:Invalid nonce'])
+        self.assertTrue(request.validate_response(Lazy_Response('{"error":[],"result":{"open":{"O1":[}}}')))
+        self.assertRaises(ValueError, getattr, request, 'open_orders_dict')
+
+    def test_result_fields_follow_the_last_response(self):
+        request = PrivateApiRequests.Request_Trade_History()
+        self.assertEqual((request.trades_dict, request.count), ({}, 0))
+        self.assertTrue(request.validate_response(Lazy_Response('{"error":[],"result":{"trades":{"T1":{"pair":"XXBTZEUR"}},"count":1}}')))
+        self.assertEqual((request.trades_dict, request.count), ({'T1':{'pair':'XXBTZEUR'}}, 1))
+        self.assertFalse(request.validate_response({'error':['EService:Unavailable']}))
+        self.assertEqual(request.count, 1)
+        self.assertTrue(request.validate_response({'error':[], 'result':{'trades':{}, 'count':0}}))
+        self.assertEqual((request.trades_dict, request.count), ({}, 0))
+
+    def test_matches_the_decoded_json(self):
+        text = ('{"error":[],"result":{"a":{"b":{"c":{"d":{"e":{"f":{"g":[1]}}}}}},"k\\"y":"x","b":[{"a":1}],'
+                '"s":"[{\\"b\\":2}]","n":-1.5e3,"t":true,"z":null,"e":{},"b2":{"b":3}}}')
+        expected = json.loads(text)['result']
+        for key in expected:
+            result = Lazy_Response(text)['result']
+            self.assertTrue(key in result)
+            self.assertEqual(result[key], expected[key])
+            self.assertFalse('missing' in result)
+        self.assertEqual(dict(Lazy_Response(text)['result']), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
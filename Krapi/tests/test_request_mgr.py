@@ -0,0 +1,44 @@
+import unittest
+from threading import Thread
+from MockKrakenServer import Mock_Kraken_Server
+from PublicApiRequests import Request_Time, Request_Ticker_Information
+from RequestMgr import Request_Mgr
+
+
+class Request_Mgr_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Mock_Kraken_Server(latency = 0.2)
+        self.server.start()
+        self.req_mgr = Request_Mgr(4, url = self.server.get_url(), connections = 4)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def send_concurrently(self, create_request, count = 4):
+        requests = [create_request() for _ in range(count)]
+        results = []
+        threads = [Thread(target = lambda r = r: results.append(self.req_mgr.send_request(r))) for r in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_requests_are_coalesced(self):
+        def ticker():
+            request = Request_Ticker_Information()
+            request.asset_pair_list = ['XXBTZEUR']
+            return request
+
+        self.assertEqual(self.send_concurrently(ticker), [True] * 4)
+        self.assertGreater(self.req_mgr.coalesced_requests, 0)
+
+    def test_time_requests_are_always_sent(self):
+        self.assertEqual(self.send_concurrently(Request_Time), [True] * 4)
+        self.assertEqual(self.req_mgr.coalesced_requests, 0)
+        self.assertEqual(self.server.requests_served, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
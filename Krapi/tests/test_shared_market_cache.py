@@ -0,0 +1,101 @@
+import mmap
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from threading import Thread
+from Records import Candle
+from SharedMarketCache import Shared_Market_Writer, Shared_Market_Reader, _SEQ
+
+
+def _ticker(ask, bid):
+    return {'a':[str(ask), '1', '1.000'], 'b':[str(bid), '2', '2.000'], 'c':[str(bid), '0.5'], 'v':['10', '100'],
+            'p':[str(bid), str(bid)], 't':[5, 50], 'l':[str(bid - 1), str(bid - 2)], 'h':[str(ask + 1), str(ask + 2)],
+            'o':str(bid)}
+
+
+class Shared_Market_Cache_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'market')
+        self.writer = Shared_Market_Writer(self.path, ['XXBTZEUR', 'XETHZEUR'], depth = 2, candles = 2)
+        self.reader = Shared_Market_Reader(self.path, timeout = 0.05)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        shutil.rmtree(self.directory)
+
+    def test_write_and_read(self):
+        before = time.time()
+        self.writer.write_ticker('XXBTZEUR', _ticker(101.0, 100.0))
+        self.writer.write_book('XXBTZEUR', {'asks':[['101', '1', 5], ['102', '2', 5], ['103', '3', 5]], 'bids':[['100', '4', 5]]})
+        self.writer.write_candles('XXBTZEUR', [[0, '1', '2', '0.5', '1.5', '1.2', '10', 3],
+                                               [60, '1.5', '3', '1', '2', '2.1', '5', 2],
+                                               [120, '2', '2', '2', '2', '2', '1', 1]])
+
+        self.assertEqual(self.reader.get_pairs(), ['XXBTZEUR', 'XETHZEUR'])
+        self.assertEqual((self.reader.get_best_ask('XXBTZEUR'), self.reader.get_best_bid('XXBTZEUR')), (101.0, 100.0))
+        self.assertEqual(self.reader.get_ticker('XXBTZEUR')['high_24h'], 103.0)
+        self.assertEqual(self.reader.get_book('XXBTZEUR'), ([(101.0, 1.0), (102.0, 2.0)], [(100.0, 4.0)]))
+        self.assertEqual(self.reader.get_candles('XXBTZEUR'),
+                         [Candle('XXBTZEUR', 60, 1.5, 3.0, 1.0, 2.0, 2.1, 5.0, 2), Candle('XXBTZEUR', 120, 2.0, 2.0, 2.0, 2.0, 2.0, 1.0, 1)])
+        self.assertTrue(before <= self.reader.get_updated('XXBTZEUR', 'book') <= time.time())
+
+    def test_never_written(self):
+        self.assertIsNone(self.reader.get_ticker('XETHZEUR'))
+        self.assertIsNone(self.reader.get_best_ask('XETHZEUR'))
+        self.assertIsNone(self.reader.get_book('XETHZEUR'))
+        self.assertEqual(self.reader.get_candles('XETHZEUR'), [])
+        self.assertIsNone(self.reader.get_updated('XETHZEUR'))
+
+    def test_unknown_pair(self):
+        self.assertRaises(ValueError, self.writer.write_ticker, 'XLTCZEUR', _ticker(101.0, 100.0))
+        self.assertRaises(KeyError, self.reader.get_ticker, 'XLTCZEUR')
+        self.assertRaises(KeyError, self.reader.get_updated, 'XLTCZEUR')
+
+    def test_reopen_after_new_writer(self):
+        self.writer.write_ticker('XXBTZEUR', _ticker(101.0, 100.0))
+        self.assertFalse(self.reader.reopen())
+
+        self.writer.close()
+        self.writer = Shared_Market_Writer(self.path, ['XLTCZEUR'], depth = 2, candles = 2)
+        self.writer.write_ticker('XLTCZEUR', _ticker(51.0, 50.0))
+        self.assertEqual(self.reader.get_best_ask('XXBTZEUR'), 101.0)
+
+        self.assertTrue(self.reader.reopen())
+        self.assertEqual(self.reader.get_pairs(), ['XLTCZEUR'])
+        self.assertEqual(self.reader.get_best_ask('XLTCZEUR'), 51.0)
+
+    def test_reader_retries_while_a_section_is_written(self):
+        self.writer.write_ticker('XXBTZEUR', _ticker(101.0, 100.0))
+        offset = self.writer._Shared_Market_Writer__layout.offsets[('XXBTZEUR', 'ticker')]
+
+        # A writer stopped in the middle of a write leaves the sequence number odd
+        with open(self.path, 'r+b') as segment_file:
+            mm = mmap.mmap(segment_file.fileno(), 0)
+            try:
+                _SEQ.pack_into(mm, offset, 3)
+                self.assertRaises(Exception, self.reader.get_best_ask, 'XXBTZEUR')
+                self.assertRaises(Exception, self.reader.get_updated, 'XXBTZEUR')
+
+                def finish_write():
+                    time.sleep(0.02)
+                    _SEQ.pack_into(mm, offset, 4)
+
+                thread = Thread(target = finish_write)
+                thread.start()
+                reader = Shared_Market_Reader(self.path, timeout = 5.0)
+                try:
+                    self.assertEqual(reader.get_best_ask('XXBTZEUR'), 101.0)
+                finally:
+                    reader.close()
+                    thread.join()
+            finally:
+                mm.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
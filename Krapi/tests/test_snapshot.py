@@ -0,0 +1,102 @@
+import socket
+import unittest
+from Snapshot import Snapshot_Builder
+from tests.fakes import Fake_Request_Mgr
+
+
+class _Fixed_Clock(object):
+    """Clock with a known offset for align"""
+
+    def __init__(self, offset):
+        self.offset = offset
+        self.refreshed = 0
+
+    def refresh(self):
+        self.refreshed += 1
+        return True
+
+    def get_uncertainty(self):
+        return 0.0
+
+    def get_offset(self):
+        return self.offset
+
+
+class Snapshot_Builder_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.req_mgr = Fake_Request_Mgr()
+        self.req_mgr.tickers = {'XXBTZUSD':{'a':['10010.0', '1', '1.000'], 'b':['9990.0', '2', '2.000']},
+                                'XETHZUSD':{'a':['501.0', '1', '1.000'], 'b':['499.0', '3', '3.000']}}
+        self.req_mgr.books = {'XXBTZUSD':{'asks':[['10010.0', '1.0', 1], ['10020.0', '2.0', 1]],
+                                          'bids':[['9990.0', '2.0', 1], ['9980.0', '1.0', 1]]},
+                              'XETHZUSD':{'asks':[['501.0', '1.0', 1]], 'bids':[['499.0', '3.0', 1]]}}
+        self.req_mgr.balances = {'ZUSD':1000.0, 'XXBT':0.5}
+        self.builder = Snapshot_Builder(self.req_mgr, ['XXBTZUSD', 'XETHZUSD'], depth = 1, timeout = 5)
+
+    def test_build(self):
+        self.assertEqual(self.builder.get_request_count(), 4)
+        snapshot = self.builder.build()
+
+        self.assertEqual(sorted(self.req_mgr.sent), ['Balance', 'Depth', 'Depth', 'Ticker'])
+        self.assertEqual(snapshot.pairs, ('XXBTZUSD', 'XETHZUSD'))
+        self.assertEqual((snapshot.get_best_ask('XXBTZUSD'), snapshot.get_best_bid('XXBTZUSD')), (10010.0, 9990.0))
+        self.assertEqual(snapshot.get_best_ask('XETHZUSD'), 501.0)
+        self.assertIsNone(snapshot.get_best_ask('XLTCZUSD'))
+        self.assertEqual(snapshot.get_book('XXBTZUSD')['asks'], (('10010.0', '1.0', 1),))
+        self.assertEqual(float(snapshot.get_balances()['XXBT']), 0.5)
+
+        self.assertEqual(sorted(component.name for component in snapshot.components),
+                         ['Balance', 'Depth XETHZUSD', 'Depth XXBTZUSD', 'Ticker'])
+        for component in snapshot.components:
+            self.assertTrue(component.sent <= component.received)
+            self.assertEqual(component.server_sent, component.sent)
+        self.assertTrue(0 <= snapshot.skew <= snapshot.window)
+        self.assertTrue(snapshot.max_latency <= snapshot.window)
+        self.assertEqual(snapshot.clock_offset, 0.0)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = self.builder.build()
+        self.assertRaises(AttributeError, setattr, snapshot, 'skew', 0.0)
+        self.assertRaises(AttributeError, setattr, snapshot.components[0], 'data', {})
+        with self.assertRaises(TypeError):
+            snapshot.get_balances()['ZUSD'] = '0'
+        with self.assertRaises(TypeError):
+            snapshot.get_book('XXBTZUSD')['asks'][0] = ('1.0', '1.0', 1)
+
+        # Later changes of the account don't show up in the snapshot
+        self.req_mgr.balances['ZUSD'] = 0.0
+        self.assertEqual(float(snapshot.get_balances()['ZUSD']), 1000.0)
+
+    def test_without_books_and_balance(self):
+        builder = Snapshot_Builder(self.req_mgr, ['XXBTZUSD'], books = False, balance = False)
+        self.assertEqual(builder.get_request_count(), 1)
+        snapshot = builder.build()
+        self.assertEqual(self.req_mgr.sent, ['Ticker'])
+        self.assertIsNone(snapshot.get_book('XXBTZUSD'))
+        self.assertIsNone(snapshot.get_balances())
+
+    def test_align(self):
+        clock = _Fixed_Clock(100.0)
+        builder = Snapshot_Builder(self.req_mgr, ['XXBTZUSD'], books = False, align = True, clock = clock)
+        snapshot = builder.build()
+        self.assertEqual(clock.refreshed, 1)
+        self.assertEqual(snapshot.clock_offset, 100.0)
+        for component in snapshot.components:
+            self.assertEqual(component.server_sent, component.sent + 100.0)
+            self.assertEqual(component.server_received, component.received + 100.0)
+
+    def test_error_responses(self):
+        self.req_mgr.errors['Balance'] = ['EAPI:Invalid key']
+        with self.assertRaises(Exception) as context:
+            self.builder.build()
+        self.assertIn('Balance (EAPI:Invalid key)', str(context.exception))
+        self.assertNotIn('Ticker', str(context.exception))
+
+    def test_raising_request_is_reported(self):
+        self.req_mgr.raises['Depth'] = socket.error('Connection reset by peer')
+        with self.assertRaises(Exception) as context:
+            self.builder.build()
+        message = str(context.exception)
+        self.assertIn('Depth XXBTZUSD (error: Connection reset by peer)', message)
+        self.assertNotIn('timeout', message)
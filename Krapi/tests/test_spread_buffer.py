@@ -0,0 +1,35 @@
+import unittest
+from SpreadBuffer import Spread_Buffer
+
+
+class Spread_Buffer_Test(unittest.TestCase):
+
+    def test_overlap_of_polls_is_added_once(self):
+        buffer = Spread_Buffer()
+        self.assertEqual(buffer.add_samples('XXBTZEUR', [(1, '99', '101'), (2, '99', '102'), (2, '98', '102')]), 3)
+
+        # The next poll with since = 2 returns the samples of second 2 again
+        self.assertEqual(buffer.add_samples('XXBTZEUR', [(2, '99', '102'), (2, '98', '102'), (2, '97', '103'),
+                                                         (3, '99', '101')]), 2)
+
+        times, bids, asks = buffer.get_samples('XXBTZEUR')
+        self.assertEqual(list(times), [1.0, 2.0, 2.0, 2.0, 3.0])
+        self.assertEqual(list(bids), [99.0, 99.0, 98.0, 97.0, 99.0])
+        self.assertEqual(buffer.get_last('XXBTZEUR'), (3.0, 99.0, 101.0))
+
+    def test_identical_samples_of_one_response_are_kept(self):
+        buffer = Spread_Buffer()
+        self.assertEqual(buffer.add_samples('XXBTZEUR', [(1, '99', '101'), (1, '99', '101')]), 2)
+        self.assertEqual(buffer.add_samples('XXBTZEUR', [(1, '99', '101'), (1, '99', '101'), (1, '99', '101')]), 1)
+        self.assertEqual(buffer.add_samples('XXBTZEUR', [(0, '99', '101')]), 0)
+
+    def test_window_statistics(self):
+        buffer = Spread_Buffer(capacity = 3)
+        buffer.add_samples('XXBTZEUR', [(t, '100', str(100 + t)) for t in range(1, 6)])
+        self.assertEqual(list(buffer.get_samples('XXBTZEUR')[0]), [3.0, 4.0, 5.0])
+        self.assertAlmostEqual(buffer.get_mean_spread('XXBTZEUR'), 4.0)
+        self.assertAlmostEqual(buffer.get_mean_spread('XXBTZEUR', n = 2), 4.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
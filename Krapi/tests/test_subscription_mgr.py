@@ -0,0 +1,66 @@
+import logging
+import time
+import unittest
+from SubscriptionMgr import Subscription_Mgr
+
+
+class _Flaky_Request_Mgr(object):
+    """Answers Ticker requests with a new last price per call, raises on the calls in failures"""
+
+    def __init__(self, failures):
+        self.calls = 0
+        self.failures = failures
+
+    def send_request(self, request):
+        self.calls += 1
+        if self.calls in self.failures:
+            raise IOError("Connection reset")
+        return request.validate_response({'error':[], 'result':{'XXBTZEUR':{'c':[str(self.calls), '1']}}})
+
+
+class Subscription_Mgr_Test(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def wait_for(self, condition, timeout = 5.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_poller_survives_exceptions(self):
+        req_mgr = _Flaky_Request_Mgr(failures = (1, 2))
+        mgr = Subscription_Mgr(req_mgr, calls_per_second = 100, min_interval = 0.01, max_interval = 0.05)
+        subscription = mgr.subscribe('Ticker', 'XXBTZEUR')
+        mgr.start()
+        try:
+            change = next(subscription.changes(timeout = 5.0))
+            self.assertEqual(change[0:2], ('Ticker', 'XXBTZEUR'))
+            self.assertEqual(mgr.errors, 2)
+        finally:
+            mgr.stop()
+
+    def test_failing_callback_doesnt_stop_other_subscriptions(self):
+        received = []
+
+        def failing(endpoint, pair, data):
+            raise ValueError("Consumer bug")
+
+        mgr = Subscription_Mgr(_Flaky_Request_Mgr(failures = ()), calls_per_second = 100, min_interval = 0.01,
+                               max_interval = 0.05)
+        mgr.subscribe('Ticker', 'XXBTZEUR', failing)
+        mgr.subscribe('Ticker', 'XXBTZEUR', lambda endpoint, pair, data: received.append(data))
+        mgr.start()
+        try:
+            self.assertTrue(self.wait_for(lambda: len(received) >= 2))
+            self.assertGreaterEqual(mgr.errors, 2)
+        finally:
+            mgr.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from PublicApiRequests import Request_Ticker_Information
+from TickerTracker import Ticker_Tracker, parse_ticker
+from tests.fakes import Fake_Request_Mgr
+
+
+def _ticker(ask, bid, last = None, volume = '10.0'):
+    last = last or ask
+    return {'a':[str(ask), '1', '1.000'], 'b':[str(bid), '2', '2.000'], 'c':[str(last), '0.5'],
+            'v':[volume, '20.0'], 'p':[str(bid), str(bid)], 't':[5, 9], 'l':[str(bid), str(bid)],
+            'h':[str(ask), str(ask)], 'o':str(bid)}
+
+
+def _field_changes(field, changes):
+    return [change for change in changes if change[1] == field]
+
+
+class Ticker_Tracker_Test(unittest.TestCase):
+
+    def test_new_pairs_are_reported_with_all_fields(self):
+        tracker = Ticker_Tracker()
+        changes = tracker.update({'XXBTZUSD':_ticker(101.0, 99.0)})
+        self.assertEqual(len(changes), len(Ticker_Tracker.fields))
+        self.assertEqual(changes[0], ('XXBTZUSD', 'ask', None, 101.0, None))
+        self.assertEqual(tracker.get_pairs(), ['XXBTZUSD'])
+
+        # An unchanged ticker reports nothing
+        self.assertEqual(tracker.update({'XXBTZUSD':_ticker(101.0, 99.0)}), [])
+
+    def test_only_changed_fields_are_reported(self):
+        tracker = Ticker_Tracker()
+        tracker.update({'XXBTZUSD':_ticker(101.0, 99.0), 'XETHZUSD':_ticker(11.0, 9.0)})
+        changes = tracker.update({'XXBTZUSD':_ticker(101.0, 99.0, last = 100.0), 'XETHZUSD':_ticker(11.0, 9.0)})
+        self.assertEqual(changes, [('XXBTZUSD', 'last', 101.0, 100.0, -1.0)])
+
+        # Pairs missing in an update keep their values
+        changes = tracker.update({'XETHZUSD':_ticker(12.0, 9.0, last = 11.0)})
+        self.assertEqual(sorted(change[1] for change in changes), ['ask', 'high_24h', 'high_today'])
+        self.assertEqual(tracker.get('XXBTZUSD', 'last'), 100.0)
+        self.assertEqual(tracker.get('XETHZUSD', 'ask'), 12.0)
+
+    def test_thresholds_add_up_small_moves(self):
+        tracker = Ticker_Tracker({'bid':1.0})
+        tracker.update({'XXBTZUSD':_ticker(101.0, 99.0)})
+
+        self.assertEqual(_field_changes('bid', tracker.update({'XXBTZUSD':_ticker(101.0, 99.5)})), [])
+        self.assertEqual(tracker.get('XXBTZUSD', 'bid'), 99.0)
+        self.assertEqual(_field_changes('bid', tracker.update({'XXBTZUSD':_ticker(101.0, 99.75)})), [])
+        self.assertEqual(_field_changes('bid', tracker.update({'XXBTZUSD':_ticker(101.0, 100.0)})),
+                         [('XXBTZUSD', 'bid', 99.0, 100.0, 1.0)])
+        self.assertEqual(tracker.get('XXBTZUSD', 'bid'), 100.0)
+
+        self.assertRaises(ValueError, Ticker_Tracker, {'spread':1.0})
+
+    def test_getters(self):
+        tracker = Ticker_Tracker()
+        tracker.update({'XXBTZUSD':_ticker(101.0, 99.0)})
+        tracker.update({'XETHZUSD':_ticker(11.0, 9.0)})
+
+        self.assertIsNone(tracker.get('XLTCZUSD', 'ask'))
+        self.assertIsNone(tracker.get_ticker('XLTCZUSD'))
+        ticker = tracker.get_ticker('XXBTZUSD')
+        self.assertEqual((ticker['ask'], ticker['bid'], ticker['trades_24h'], ticker['open']), (101.0, 99.0, 9.0, 99.0))
+        self.assertEqual(list(tracker.get_column('ask')), [101.0, 11.0])
+
+    def test_parse_ticker_accepts_open_as_list(self):
+        ticker = _ticker(101.0, 99.0)
+        ticker['o'] = ['98.0', '97.0']
+        self.assertEqual(parse_ticker(ticker)[-1], 98.0)
+
+    def test_update_from_ticker_request(self):
+        req_mgr = Fake_Request_Mgr()
+        req_mgr.tickers = {'XXBTZUSD':_ticker(101.0, 99.0), 'XETHZUSD':_ticker(11.0, 9.0)}
+        request = Request_Ticker_Information()
+        request.asset_pair_list = ['XXBTZUSD', 'XETHZUSD']
+        tracker = Ticker_Tracker()
+
+        self.assertTrue(req_mgr.send_request(request))
+        tracker.update(request)
+        self.assertEqual(sorted(tracker.get_pairs()), ['XETHZUSD', 'XXBTZUSD'])
+
+        req_mgr.tickers['XXBTZUSD'] = _ticker(101.0, 99.0, volume = '12.5')
+        self.assertTrue(req_mgr.send_request(request))
+        self.assertEqual(tracker.update(request), [('XXBTZUSD', 'volume_today', 10.0, 12.5, 2.5)])
@@ -0,0 +1,141 @@
+import BaseHTTPServer
+import SocketServer
+import httplib
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+from threading import Thread
+from Transport import Frame_Log, Http_Transport
+
+
+class _Lossy_Http_Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Counts the received requests and closes the connection instead of answering the first drops requests.
+    With keep_alive False the connection is closed after every response.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, drops):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), _Lossy_Handler)
+        self.drops = drops
+        self.keep_alive = True
+        self.received = []
+
+
+class _Lossy_Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.getheader('content-length', 0)))
+        self.server.received.append(body)
+        if self.server.drops:
+            self.server.drops -= 1
+            self.close_connection = 1
+            return
+        response = '{"error":[],"result":{"n":' + str(len(self.server.received)) + '}}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+        self.close_connection = 0 if self.server.keep_alive else 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Frame_Log_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'requests.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, numbers):
+        log = Frame_Log(self.path, 'a')
+        for number in numbers:
+            log.append(float(number), 0.01, '/0/public/Time', 'n=' + str(number), '{"n":' + str(number) + '}')
+        log.close()
+
+    def recorded(self):
+        log = Frame_Log(self.path, 'r')
+        try:
+            return [log.read(number)[4] for number in range(len(log))]
+        finally:
+            log.close()
+
+    def test_missing_index_is_rebuilt_before_appending(self):
+        self.record(range(3))
+        os.remove(self.path + '.idx')
+        self.record(range(3, 5))
+
+        self.assertEqual(self.recorded(), ['{"n":' + str(n) + '}' for n in range(5)])
+        os.remove(self.path)
+        self.record(range(2))
+        self.assertEqual(self.recorded(), ['{"n":0}', '{"n":1}'])
+
+    def test_short_index_is_completed_before_appending(self):
+        self.record(range(3))
+        with open(self.path + '.idx', 'r+b') as index:
+            index.truncate(os.path.getsize(self.path + '.idx') - 5)
+        self.record([3])
+
+        self.assertEqual(self.recorded(), ['{"n":' + str(n) + '}' for n in range(4)])
+        log = Frame_Log(self.path, 'r')
+        self.assertEqual(list(log.find('/0/public/Time', 'n=2')), [2])
+        log.close()
+
+    def test_incomplete_frame_is_cut_off(self):
+        self.record(range(2))
+        with open(self.path, 'ab') as log:
+            log.write('\x40\x00\x00\x00partial')
+        self.record([2])
+
+        self.assertEqual(self.recorded(), ['{"n":0}', '{"n":1}', '{"n":2}'])
+
+
+
+class Http_Transport_Test(unittest.TestCase):
+
+    def serve(self, drops):
+        server = _Lossy_Http_Server(drops)
+        thread = Thread(target = server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        transport = Http_Transport('http://%s:%d' % server.server_address)
+        self.addCleanup(transport.close)
+        return server, transport
+
+    def test_lost_response_is_not_resent_without_resend(self):
+        server, transport = self.serve(drops = 1)
+        self.assertRaises((httplib.BadStatusLine, socket.error), transport.send, '/0/private/AddOrder', 'nonce=1', {})
+        self.assertEqual(server.received, ['nonce=1'])
+
+        self.assertEqual(transport.send('/0/private/AddOrder', 'nonce=2', {}), '{"error":[],"result":{"n":2}}')
+        self.assertEqual(server.received, ['nonce=1', 'nonce=2'])
+
+    def test_lost_response_is_resent_with_resend(self):
+        server, transport = self.serve(drops = 1)
+        self.assertEqual(transport.send('/0/public/Time', '', {}, resend = True), '{"error":[],"result":{"n":2}}')
+        self.assertEqual(server.received, ['', ''])
+
+    def test_closed_idle_connection_is_reopened(self):
+        server, transport = self.serve(drops = 0)
+        server.keep_alive = False
+        self.assertEqual(transport.send('/0/private/Balance', 'nonce=1', {}), '{"error":[],"result":{"n":1}}')
+        time.sleep(0.1)
+
+        self.assertEqual(transport.send('/0/private/Balance', 'nonce=2', {}), '{"error":[],"result":{"n":2}}')
+        self.assertEqual(server.received, ['nonce=1', 'nonce=2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
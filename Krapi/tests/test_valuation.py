@@ -0,0 +1,73 @@
+import math
+import unittest
+from PublicApiRequests import Request_Tradable_Asset_Pairs
+from Valuation import Portfolio_Valuator
+from tests.fakes import Fake_Request_Mgr
+
+
+def _ticker(mid):
+    return {'a':[str(mid * 1.001)], 'b':[str(mid * 0.999)]}
+
+
+class Portfolio_Valuator_Test(unittest.TestCase):
+
+    def setUp(self):
+        req_mgr = Fake_Request_Mgr()
+        req_mgr.asset_pairs = {'XXBTZUSD':{'base':'XXBT', 'quote':'ZUSD'},
+                               'XXBTZUSD.d':{'base':'XXBT', 'quote':'ZUSD'},
+                               'XETHXXBT':{'base':'XETH', 'quote':'XXBT'},
+                               'XETHZUSD':{'base':'XETH', 'quote':'ZUSD'},
+                               'XREPXETH':{'base':'XREP', 'quote':'XETH'},
+                               'ZEURZUSD':{'base':'ZEUR', 'quote':'ZUSD'},
+                               'XLTCZJPY':{'base':'XLTC', 'quote':'ZJPY'}}
+        request = Request_Tradable_Asset_Pairs()
+        self.assertTrue(req_mgr.send_request(request))
+        self.valuator = Portfolio_Valuator(request.asset_pairs_dict, 'ZUSD')
+        self.tickers = {'XXBTZUSD':_ticker(10000.0), 'XETHXXBT':_ticker(0.04), 'XETHZUSD':_ticker(500.0),
+                        'XREPXETH':_ticker(0.1), 'ZEURZUSD':_ticker(1.2)}
+
+    def test_shortest_paths(self):
+        # XETHXXBT is no shortest path, the dark pool pair has no ticker
+        self.assertEqual(self.valuator.get_required_pairs(), ['XETHZUSD', 'XREPXETH', 'XXBTZUSD', 'ZEURZUSD'])
+
+        self.valuator.update_rates(self.tickers)
+        self.assertAlmostEqual(self.valuator.get_rate('XXBT'), 10000.0)
+        self.assertAlmostEqual(self.valuator.get_rate('XREP'), 50.0)
+        self.assertEqual(self.valuator.get_rate('ZUSD'), 1.0)
+        self.assertTrue(math.isnan(self.valuator.get_rate('XLTC')))
+        self.assertTrue(math.isnan(self.valuator.get_rate('UNKNOWN')))
+
+    def test_missing_ticker_takes_another_path(self):
+        del self.tickers['XETHZUSD']
+        self.valuator.update_rates(self.tickers)
+        self.assertAlmostEqual(self.valuator.get_rate('XETH'), 400.0)
+        self.assertAlmostEqual(self.valuator.get_rate('XREP'), 40.0)
+
+        self.tickers['XETHZUSD'] = _ticker(500.0)
+        self.valuator.update_rates(self.tickers)
+        self.assertAlmostEqual(self.valuator.get_rate('XETH'), 500.0)
+
+    def test_values_balances_with_aliases(self):
+        self.valuator.update_rates(self.tickers)
+        balance = {'XXBT':'1.0', 'XETH.F':'2.0', 'REP':'10', 'EUR':'100', 'XLTC':'5', 'UNKNOWN':'7'}
+        self.assertAlmostEqual(self.valuator.value(balance), 10000.0 + 1000.0 + 500.0 + 120.0)
+
+        breakdown = self.valuator.breakdown(balance)
+        self.assertAlmostEqual(breakdown['XETH.F'], 1000.0)
+        self.assertTrue(math.isnan(breakdown['XLTC']))
+
+        totals = self.valuator.value_accounts([{'XXBT':'0.5'}, {}, {'ZUSD':'3', 'XBT':'0.1'}])
+        self.assertEqual(len(totals), 3)
+        self.assertAlmostEqual(totals[0], 5000.0)
+        self.assertEqual(totals[1], 0.0)
+        self.assertAlmostEqual(totals[2], 1003.0)
+
+        vector = self.valuator.to_vector({'XXBT':'1', 'XBT.M':'1'})
+        self.assertEqual(vector[self.valuator.assets.index('XXBT')], 2.0)
+
+    def test_unknown_quote(self):
+        self.assertRaises(ValueError, Portfolio_Valuator, {'XXBTZUSD':{'base':'XXBT', 'quote':'ZUSD'}}, 'ZEUR')
+
+
+if __name__ == '__main__':
+    unittest.main()